@@ -17,4 +17,26 @@ __all__ = [
     "utils",
     "settings",
     "audio",
+    "generator",
+    "tiles",
+    "resolution",
+    "bench",
+    "profiler",
+    "tracing",
+    "allocations",
+    "pacing",
+    "timing",
+    "env",
+    "pixels",
+    "capture",
+    "replay",
+    "verify",
+    "ghosts",
+    "rewind",
+    "savestate",
+    "fixedpoint",
+    "net",
+    "coedit",
+    "asyncloop",
+    "scheduler",
 ]
\ No newline at end of file
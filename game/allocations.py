@@ -0,0 +1,185 @@
+"""
+Allocation instrumentation for the game loop (F5 toggles it, F6 dumps the samples to CSV).
+
+While it is on:
+- tracemalloc measures the bytes allocated during every frame (peak and net growth)
+- every ALLOC_SNAPSHOT_EVERY frames a snapshot taken at the start of the frame is compared
+  with one taken right after drawing, which gives the top allocating call sites of a frame
+- gc.callbacks time every garbage collector pause, stored next to the frame time,
+  so a slow frame can be matched with the collection that caused it
+Everything is switched off (tracemalloc stopped, callback removed) when disabled.
+"""
+import csv
+import gc
+import time
+import tracemalloc
+from array import array
+from typing import List, Optional, Tuple
+
+import pygame
+
+from .settings import (
+    ALLOC_SNAPSHOT_EVERY, ALLOC_TOP, ALLOC_STACK_DEPTH, ALLOC_RING,
+    GC_HITCH_MS,
+)
+from .utils import get_font, units
+
+#Columns stored per frame in the ring buffer
+COLUMNS = ("frame_us", "gc_us", "gc_collections", "gc_max_gen", "alloc_peak_b", "alloc_net_b", "snapshot")
+
+
+class AllocationTracker:
+    """
+    Per-frame allocation and GC pause recorder.
+    Usage per frame: begin_frame(), after_draw(), end_frame().
+    """
+    def __init__(self, size: int = ALLOC_RING, snapshot_every: int = ALLOC_SNAPSHOT_EVERY) -> None:
+        self.enabled = False
+        self.size = size
+        self.snapshot_every = snapshot_every
+        self.columns = {c: array("q", [0]) * size for c in COLUMNS}
+        self.count = 0
+        #Top call sites from the last snapshot comparison: (location, bytes, blocks)
+        self.top_sites: List[Tuple[str, int, int]] = []
+        #Recent GC hitches: (frame number, gc pause ms, frame ms, generation)
+        self.hitches: List[Tuple[int, float, float, int]] = []
+        self._frame_start_ns = 0
+        self._start_mem = 0
+        self._start_snapshot: Optional[tracemalloc.Snapshot] = None
+        #GC state of the frame in progress
+        self._gc_start_ns = 0
+        self._gc_ns = 0
+        self._gc_count = 0
+        self._gc_max_gen = -1
+        self._filters = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ]
+
+    def toggle(self) -> None:
+        if self.enabled:
+            self.enabled = False
+            gc.callbacks.remove(self._on_gc)
+            tracemalloc.stop()
+        else:
+            self.enabled = True
+            self._frame_start_ns = 0
+            tracemalloc.start(ALLOC_STACK_DEPTH)
+            gc.callbacks.append(self._on_gc)
+
+    def _on_gc(self, phase: str, info: dict) -> None:
+        #Called by the garbage collector before and after every collection
+        if phase == "start":
+            self._gc_start_ns = time.perf_counter_ns()
+        elif self._gc_start_ns:
+            self._gc_ns += time.perf_counter_ns() - self._gc_start_ns
+            self._gc_count += 1
+            self._gc_max_gen = max(self._gc_max_gen, info.get("generation", 0))
+            self._gc_start_ns = 0
+
+    def _sampling(self) -> bool:
+        return self.count % self.snapshot_every == 0
+
+    def begin_frame(self) -> None:
+        if not self.enabled:
+            return
+        self._gc_ns = self._gc_count = 0
+        self._gc_max_gen = -1
+        if self._sampling():
+            self._start_snapshot = tracemalloc.take_snapshot().filter_traces(self._filters)
+        tracemalloc.reset_peak()
+        self._start_mem = tracemalloc.get_traced_memory()[0]
+        self._frame_start_ns = time.perf_counter_ns()
+
+    def after_draw(self) -> None:
+        """
+        On sampled frames, compares the memory live now with the start of the frame.
+        Objects made while drawing (rects, rendered text, glow surfaces) are still alive here.
+        """
+        if not self.enabled or self._start_snapshot is None:
+            return
+        snap = tracemalloc.take_snapshot().filter_traces(self._filters)
+        diff = snap.compare_to(self._start_snapshot, "lineno")
+        diff = [d for d in diff if d.size_diff > 0]
+        diff.sort(key=lambda d: d.size_diff, reverse=True)
+        self.top_sites = [
+            (f"{_short(d.traceback[0].filename)}:{d.traceback[0].lineno}", d.size_diff, d.count_diff)
+            for d in diff[:ALLOC_TOP]
+        ]
+        self._start_snapshot = None
+
+    def end_frame(self) -> None:
+        if not self.enabled or self._frame_start_ns == 0:
+            return
+        frame_ns = time.perf_counter_ns() - self._frame_start_ns
+        current, peak = tracemalloc.get_traced_memory()
+        slot = self.count % self.size
+        row = {
+            "frame_us": frame_ns // 1000,
+            "gc_us": self._gc_ns // 1000,
+            "gc_collections": self._gc_count,
+            "gc_max_gen": self._gc_max_gen,
+            "alloc_peak_b": peak - self._start_mem,
+            "alloc_net_b": current - self._start_mem,
+            "snapshot": 1 if self._sampling() else 0,
+        }
+        for c, v in row.items():
+            self.columns[c][slot] = v
+        if self._gc_ns / 1e6 >= GC_HITCH_MS:
+            self.hitches.append((self.count, self._gc_ns / 1e6, frame_ns / 1e6, self._gc_max_gen))
+            del self.hitches[:-ALLOC_TOP]
+        self.count += 1
+
+    def _recent(self, column: str) -> List[int]:
+        #Values of a column, oldest first
+        values = self.columns[column]
+        if self.count <= self.size:
+            return list(values[:self.count])
+        start = self.count % self.size
+        return list(values[start:]) + list(values[:start])
+
+    def dump_csv(self, path: str) -> int:
+        cols = {c: self._recent(c) for c in COLUMNS}
+        rows = len(cols["frame_us"])
+        first = self.count - rows
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(("frame",) + COLUMNS)
+            for i in range(rows):
+                writer.writerow([first + i] + [cols[c][i] for c in COLUMNS])
+        return rows
+
+    def draw_overlay(self, surface: pygame.Surface) -> None:
+        """
+        Bottom-left panel: bytes per frame, GC pauses, recent hitches and top call sites.
+        """
+        if not self.enabled or self.count == 0:
+            return
+        n = min(self.count, 60)
+        peaks = self._recent("alloc_peak_b")[-n:]
+        frames = self._recent("frame_us")[-n:]
+        gcs = self._recent("gc_us")[-n:]
+        lines = [
+            f"ALLOC/FRAME avg {sum(peaks) / n / 1024:.1f}KB max {max(peaks) / 1024:.1f}KB",
+            f"FRAME avg {sum(frames) / n / 1000:.2f}ms  GC avg {sum(gcs) / n / 1000:.2f}ms max {max(gcs) / 1000:.2f}ms",
+        ]
+        for frame, gc_ms, frame_ms, gen in self.hitches[-3:]:
+            lines.append(f"GC HITCH #{frame} gen{gen} {gc_ms:.2f}ms of {frame_ms:.2f}ms")
+        for site, size, blocks in self.top_sites:
+            lines.append(f"{site} +{size / 1024:.1f}KB ({blocks:+d})")
+
+        font = get_font(units(surface, 24))
+        line_h = font.get_linesize()
+        pad = units(surface, 8)
+        width = max(font.size(line)[0] for line in lines) + 2 * pad
+        panel = pygame.Rect(units(surface, 10), 0, width, len(lines) * line_h + 2 * pad)
+        panel.bottom = surface.get_height() - units(surface, 10)
+        pygame.draw.rect(surface, (0, 0, 0), panel)
+        for i, line in enumerate(lines):
+            surface.blit(font.render(line, False, (255, 255, 255)), (panel.x + pad, panel.y + pad + i * line_h))
+
+
+def _short(path: str) -> str:
+    #Keeps only "folder/file.py" of a path so the overlay lines stay short
+    parts = path.replace("\\", "/").split("/")
+    return "/".join(parts[-2:])
@@ -1,39 +1,88 @@
+import math
 import os
+import random
+import sys
+import time
 import pygame
 from typing import List, Optional
 from .audio import init_audio, play_music
 
 #Import the configuration/constants from settings.py
 from .settings import (
-    SCREEN_W, SCREEN_H, FPS, ASSETS_DIR,
+    SCREEN_W, SCREEN_H, ASSETS_DIR,
     BACKGROUND_FILE,
     GOAL_W, GOAL_H,
     DEFAULT_PLAT_W, DEFAULT_PLAT_H,
     STATE_MENU, STATE_NAME, STATE_SCOREBOARD, STATE_GAME,
     WINDOW_TITLE,
+    GEN_LOOKAHEAD, GEN_CHUNK_SIZE, BG_TILE_SIZE,
+    PROFILE_CSV_FILE, ALLOC_CSV_FILE,
+    TRACE_FILE, TRACE_SAMPLE,
+    FRAME_PACING,
+    SPLIT_FRACTIONS, PLAYER_H,
+    CAPTURE_DIR,
+    REPLAY_DIR, REPLAY_DT_RANGE,
+    REWIND_SPEED, FPS,
+    SAVE_FILE,
+    PHYSICS_MODE,
+    EDIT_SERVER, EDIT_PORT,
 )
 #Import the helper functions + game systems from other python modules
-from .utils import safe_load_image, get_font, format_time
+from .utils import get_font, format_time, units
 from .scores import add_score
 from .effects import draw_goal_glow
 from .camera import Camera
-from .platform import Platform
-from .player import Player
-from .screens import run_menu, run_name_input, run_scoreboard
+from .platform import Platform, draw_platforms
+from .player import Player, input_mask
+from .generator import TowerGenerator
+from .screens import MenuScreen, NameInputScreen, ScoreboardScreen
+from .tiles import TiledBackground, ScrollingBackground
+from .resolution import DynamicResolution
+from .profiler import FrameProfiler
+from .allocations import AllocationTracker
+from .pacing import FramePacer
+from .timing import RunTimer, entry_fraction
+from .capture import FrameRecorder
+from .replay import RunRecorder, replay_path, level_key, write_replay
+from .ghosts import GhostRace
+from .rewind import RewindBuffer
+from . import savestate
+from .fixedpoint import FixedPointBody, FixedStepper, STEP_DT
+from .coedit import EditClient
+from .asyncloop import FrameIO, drive_async, WAKE_MARGIN_S
+from .scheduler import FrameScheduler, HIGH, LOW
+from . import tracing
+from .tracing import traced
 
 
-def load_background_world() -> pygame.Surface:
+def _float_steps(dt: float) -> List[float]:
+    #Float physics steps for a frame of dt seconds: a hitch is split into equal steps no longer
+    #than a verified replay allows (the recorder stores exactly these)
+    lo, hi = REPLAY_DT_RANGE
+    if dt <= hi:
+        return [max(dt, lo)]
+    n = math.ceil(dt / hi)
+    return [dt / n] * n
+
+
+def _write_score(name: str, time_s: float, splits: List[float], replay: Optional[str], data: Optional[bytes]) -> None:
+    #File side of GameApp._store_score
+    if replay is not None:
+        write_replay(replay, data)
+    add_score(name, time_s, splits=splits, replay=replay)
+
+
+@traced(cat="assets")
+def load_background_world() -> TiledBackground:
     """
-    Loads the gameplay background image from the assets folder.
+    Opens the gameplay background as tiles (cut from the image in the assets folder on first use).
     This background image also defines the "world size" because we use its
     width and height to set the world boundaries for the camera and player.
+    Tiles are decoded lazily, so the full image is never held in memory.
     """
     path = os.path.join(ASSETS_DIR, BACKGROUND_FILE)
-    img = safe_load_image(path, convert_alpha=False)
     #If the image is missing, we raise an error (the game cannot run without a world background)
-    if img is None:
-        raise FileNotFoundError(f"Background not found at: {path}")
-    return img
+    return TiledBackground.open(path)
 
 #Main application class that owns the whole game system.
 class GameApp:
@@ -45,25 +94,46 @@ class GameApp:
     - drawing everything on screen
     """
     def __init__(self) -> None:
+        #Optional Chrome trace of the whole session (TOWER_TRACE=trace.json)
+        if TRACE_FILE:
+            tracing.start(TRACE_FILE, TRACE_SAMPLE)
         pygame.init()
         init_audio()
         play_music()
-        self.screen = pygame.display.set_mode((SCREEN_W, SCREEN_H))
-        pygame.display.set_caption(WINDOW_TITLE)
         #Used to control FPS and compute delta time (dt)
         self.clock = pygame.time.Clock()
-        #Fonts used during the game (HUD + editor overlay)
-        self.font_hud = get_font(42)
-        self.font_editor = get_font(32)
+        #Waits between frames with the chosen strategy and measures jitter / input latency
+        self.pacer = FramePacer(self.clock, FRAME_PACING)
+        self.window = self.pacer.open_window((SCREEN_W, SCREEN_H))
+        pygame.display.set_caption(WINDOW_TITLE)
+        #The world is drawn on self.screen, which is the window itself at full resolution
+        #or a smaller internal surface when the dynamic resolution lowers the render scale
+        self.screen = self.window
+        self.resolution = DynamicResolution(SCREEN_W, SCREEN_H)
+        #Per-phase frame timing (off until F3 is pressed)
+        self.profiler = FrameProfiler()
+        #Bytes allocated and GC pauses per frame (off until F5 is pressed, tracemalloc is slow)
+        self.allocations = AllocationTracker()
+        #Video recording in progress (F8), frames are encoded by a background thread
+        self.recorder: Optional[FrameRecorder] = None
         #Load background and define the world size based on the image dimensions        
         self.background = load_background_world()
-        self.world_w, self.world_h = self.background.get_width(), self.background.get_height()
+        self.world_w, self.world_h = self.background.get_size()
+        #Background layer of the last frame, scrolled by the camera movement instead of redrawn
+        self.background_layer = ScrollingBackground(self.background, SCREEN_W, SCREEN_H)
         #Camera converts world coordinates -> screen coordinates (important for scrolling)        
         self.camera = Camera(SCREEN_W, SCREEN_H, self.world_w, self.world_h)
+        #Menu screens live as long as the game, their static layers are built on the first visit
+        self.menu_screen = MenuScreen(self.window)
+        self.name_screen = NameInputScreen(self.window)
+        self.scoreboard_screen = ScoreboardScreen(self.window)
         #Level data, list of platforms (starts with a "floor" platform at the bottom)
         self.platforms: List[Platform] = [Platform(0, self.world_h - 40, self.world_w, 40)]
         #Goal collision area (goal is drawn as a circle glow, but collision is a Rect)
-        self.goal_rect = pygame.Rect(self.world_w // 2, 120, GOAL_W, GOAL_H)
+        self.default_goal_rect = pygame.Rect(self.world_w // 2, 120, GOAL_W, GOAL_H)
+        self.goal_rect = self.default_goal_rect.copy()
+        #Procedural tower (G in game), None when the player builds the tower themselves
+        self.tower: Optional[TowerGenerator] = None
         #Spawn position where the player starts
         self.spawn_x, self.spawn_y = 80, self.world_h - 140
         #Editor mode settings (allows placing/removing platforms during the game)        
@@ -74,11 +144,42 @@ class GameApp:
         self.state = STATE_MENU
         self.player_name = "Unknown"
         self.win = False
-        #Timing variables 
-        self.run_start_ms: Optional[int] = None
+        #Timing variables (the run time is counted in physics ticks, see timing.py)
+        self.timer = RunTimer()
         self.final_time_s: Optional[float] = None
+        #Why the score of the finished run couldn't be written (shown in the HUD), None if it was
+        self.score_error: Optional[str] = None
+        #Inputs of the run in progress, saved as a replay when the run is finished (see verify.py)
+        self.run_recorder = RunRecorder(PHYSICS_MODE)
+        #Ghosts of the best runs on the same level
+        self.ghosts = GhostRace()
+        #Last seconds of player states and platform edits (hold BACKSPACE to go back)
+        self.rewind = RewindBuffer()
+        self.rewinding = False
+        #Run in progress saved on exit (written by a background thread), True once resumed from it
+        self.saver = savestate.SaveWriter()
+        self.resumed = False
         #Create the Player object
         self.player = Player(self.spawn_x, self.spawn_y)
+        #Fixed-point physics (TOWER_PHYSICS=fixed): integer steps of 1/FPS s drive the player
+        self.fixed = FixedPointBody(self.player) if PHYSICS_MODE == "fixed" else None
+        self.stepper = FixedStepper()
+        #I/O tasks between frames, only with the asyncio main loop (run_async)
+        self.io: Optional[FrameIO] = None
+        #Deferred work run in the leftover frame time (tower chunks, tile warmups, score files)
+        self.scheduler = FrameScheduler()
+        self._chunk_job = None
+        self._warmup_job = None
+        self._warmup_key = None
+        #Shared editor (TOWER_EDIT_SERVER=host:port): the platforms are the edit server's level
+        self.shared: Optional[EditClient] = None
+        if EDIT_SERVER:
+            host, _, port = EDIT_SERVER.partition(":")
+            try:
+                self.shared = EditClient(host, int(port or EDIT_PORT))
+                self.platforms = self.shared.platforms
+            except OSError as e:
+                print(f"Edit server {EDIT_SERVER} not reachable ({e}), editing locally")
     
     def reset_run(self, clear_platforms: bool) -> None:
         """
@@ -86,13 +187,106 @@ class GameApp:
         If clear_platforms is True, it also resets the level back to only the base floor.
         """
         self.win = False
-        self.run_start_ms = pygame.time.get_ticks()
+        self.resumed = False
+        self.timer.start(self._checkpoints())
+        self.run_recorder.start((self.spawn_x, self.spawn_y))
+        self.rewind.clear()
         self.final_time_s = None
+        self.score_error = None
         self.player.reset(self.spawn_x, self.spawn_y)
+        #The camera jumps back to the spawn, so redraw the whole background
+        self.background_layer.invalidate()
         #If the player wants a "fresh run" (R), remove custom platforms and keep only the floor
+        #(a shared level is never cleared, it belongs to every builder)
         if clear_platforms:
-            self.platforms = [Platform(0, self.world_h - 40, self.world_w, 40)]
+            self._cancel_chunk()
+            if self.shared is None:
+                self.platforms = [Platform(0, self.world_h - 40, self.world_w, 40)]
+            else:
+                self.platforms = self.shared.platforms
+            self.tower = None
+            self.goal_rect = self.default_goal_rect.copy()
+        self._race_ghosts()
+
+    def _race_ghosts(self) -> None:
+        #The level of the run is known: tag the replay with it and load the ghosts recorded on it
+        level = level_key(self.platforms, self.tower.seed if self.tower is not None else None)
+        self.run_recorder.level = level
+        self.ghosts.start(level)
+
+    def _checkpoints(self) -> List[int]:
+        #Split heights between the spawn and the goal (the top of the world for towers)
+        bottom = self.spawn_y + PLAYER_H
+        top = self.default_goal_rect.bottom
+        return [int(bottom - f * (bottom - top)) for f in SPLIT_FRACTIONS]
+
+    def start_tower(self, seed: int) -> None:
+        """
+        Starts a fresh run on a procedural tower generated from the seed.
+        Only the first chunk is generated now, the rest is generated while climbing.
+        """
+        self.reset_run(clear_platforms=True)
+        self.tower = TowerGenerator(seed, self.world_w, self.world_h)
+        self.tower.chunk()
+        self.platforms = list(self.tower.platforms)
+        #(a short tower can already be complete)
+        if self.tower.goal_rect is not None:
+            self.goal_rect = self.tower.goal_rect.copy()
+        self._race_ghosts()
 
+    def _extend_tower(self) -> None:
+        #Generate the next chunk once the top of the tower gets close to the camera
+        #(a deferred job, one platform per slice of leftover frame time)
+        if self.tower is None or self.tower.finished:
+            return
+        if self._chunk_job is None and self.tower.top > self.camera.offset_y - GEN_LOOKAHEAD:
+            self._chunk_job = self.scheduler.submit(self._grow_tower, self.tower, priority=HIGH,
+                                                    name="tower chunk", on_done=self._chunk_done)
+
+    def _grow_tower(self, tower: TowerGenerator):
+        #Next chunk of the tower, one platform per step (stops if the tower was replaced meanwhile)
+        for _ in range(GEN_CHUNK_SIZE):
+            if self.tower is not tower:
+                return
+            p = tower.next_platform()
+            if p is None:
+                break
+            self.platforms.append(p)
+            yield
+        #Once the tower is complete, the goal moves above its last platform
+        if tower.goal_rect is not None:
+            self.goal_rect = tower.goal_rect.copy()
+
+    def _chunk_done(self, job) -> None:
+        self._chunk_job = None
+
+    def _cancel_chunk(self) -> None:
+        if self._chunk_job is not None:
+            self._chunk_job.cancel()
+            self._chunk_job = None
+
+    def _warm_tiles(self, scale: float, rect: pygame.Rect):
+        #Background tiles around the view (one tile of margin) decoded ahead, one per step
+        for tx, ty in self.background.visible_tiles(rect, scale):
+            self.background.get_tile(tx, ty, scale)
+            yield
+
+    def _schedule_warmup(self) -> None:
+        #A new warmup each time the view enters another tile (or the render scale changes)
+        scale = self.camera.zoom
+        tile = round(BG_TILE_SIZE * scale)
+        x, y = int(self.camera.offset_x * scale), int(self.camera.offset_y * scale)
+        key = (x // tile, y // tile, scale)
+        if key == self._warmup_key:
+            return
+        self._warmup_key = key
+        if self._warmup_job is not None:
+            self._warmup_job.cancel()
+        w, h = self.screen.get_size()
+        rect = pygame.Rect(x - tile, y - tile, w + 2 * tile, h + 2 * tile)
+        self._warmup_job = self.scheduler.submit(self._warm_tiles, scale, rect, priority=LOW, name="tile warmup")
+
+    @traced("GameApp.run")
     def run(self) -> None:
         """
         Main application loop.
@@ -100,33 +294,160 @@ class GameApp:
         screen/state (menu, name input, scoreboard, gameplay).
         """
         while True:
+            #Screens show files the worker jobs may still be writing (scores)
+            if self.state != STATE_GAME:
+                self.scheduler.wait_threads()
             #Menu state
             if self.state == STATE_MENU:
-                next_state = run_menu(self.screen, self.clock)
-                if next_state == "quit":
+                #The save of the run just left may still be being written
+                self.saver.wait()
+                if not self._leave_menu(self.menu_screen.run(can_resume=os.path.exists(SAVE_FILE))):
                     break
-                self.state = next_state
             #Name input state
             elif self.state == STATE_NAME:
-                name = run_name_input(self.screen, self.clock)
-                if name is None:
-                    self.state = STATE_MENU
-                else:
-                    self.player_name = name
-                    self.reset_run(clear_platforms=True)
-                    self.state = STATE_GAME
+                self._leave_name(self.name_screen.run())
             #Scoreboard state
             elif self.state == STATE_SCOREBOARD:
-                next_state = run_scoreboard(self.screen, self.clock)
-                if next_state == "quit":
+                if not self._leave_scoreboard(self.scoreboard_screen.run()):
                     break
-                self.state = next_state
             #GAMEPLAY state
             elif self.state == STATE_GAME:
                 self._run_game_frame()
-        #If we escape this loop, pygame will quit
+        self._shutdown()
+
+    async def run_async(self) -> None:
+        """
+        Same states as run, on an asyncio event loop (TOWER_LOOP=asyncio, see asyncloop.py):
+        the time between frames goes to the I/O tasks instead of a sleep.
+        """
+        self.io = FrameIO()
+        while True:
+            #Screens show files the tasks may still be writing (scores, save)
+            if self.state != STATE_GAME:
+                await self.io.drain()
+                await self.io.run_blocking(self.scheduler.wait_threads)
+            if self.state == STATE_MENU:
+                await self.io.run_blocking(self.saver.wait)
+                steps = self.menu_screen.steps(can_resume=os.path.exists(SAVE_FILE))
+                if not self._leave_menu(await drive_async(steps, self.io)):
+                    break
+            elif self.state == STATE_NAME:
+                self._leave_name(await drive_async(self.name_screen.steps(), self.io))
+            elif self.state == STATE_SCOREBOARD:
+                if not self._leave_scoreboard(await drive_async(self.scoreboard_screen.steps(), self.io)):
+                    break
+            elif self.state == STATE_GAME:
+                #The sleep until the next frame, pacer.wait() then only waits for the last bit
+                await self.io.idle(self.pacer.time_left() - WAKE_MARGIN_S)
+                self._run_game_frame()
+        await self.io.drain()
+        self._shutdown()
+
+    def _leave_menu(self, next_state: str) -> bool:
+        #State after the menu, False to quit the game
+        self.pacer.resume()
+        if next_state == "quit":
+            return False
+        if next_state == "resume":
+            next_state = STATE_GAME if self.resume_run() else STATE_MENU
+        self.state = next_state
+        return True
+
+    def _leave_name(self, name: Optional[str]) -> None:
+        self.pacer.resume()
+        if name is None:
+            self.state = STATE_MENU
+        else:
+            self.player_name = name
+            self.reset_run(clear_platforms=True)
+            self.state = STATE_GAME
+
+    def _leave_scoreboard(self, next_state: str) -> bool:
+        self.pacer.resume()
+        if next_state == "quit":
+            return False
+        self.state = next_state
+        return True
+
+    def _shutdown(self) -> None:
+        #If we escape the main loop, pygame will quit (and the trace / video files are completed)
+        self._stop_recording()
+        self.saver.wait()
+        self.scheduler.shutdown()
+        if self.shared is not None:
+            self.shared.close()
+        tracing.stop()
         pygame.quit()
-    #runs one frame of gameplay
+
+    def save_run(self) -> None:
+        """
+        Saves the run in progress (player, platforms, timer, editor settings and the inputs
+        recorded so far) so it can be resumed from the menu. Finished runs are not saved.
+        """
+        if self.win:
+            return
+        p = self.player
+        rec = self.run_recorder
+        header = {
+            "name": self.player_name,
+            "player": [p.rect.x, p.rect.y, p.vx, p.vy, p.on_ground, p.facing_right],
+            "timer": {"ticks": self.timer.ticks, "elapsed": self.timer.elapsed_s,
+                      "checkpoints": self.timer.checkpoints, "splits": self.timer.splits},
+            "plat_w": self.plat_w,
+            "plat_h": self.plat_h,
+            "editor_mode": self.editor_mode,
+            "goal": list(self.goal_rect),
+            "tower": None if self.tower is None else {
+                "seed": self.tower.seed, "platforms": len(self.tower.platforms), "finished": self.tower.finished},
+            "replay": {"spawn": list(rec.spawn), "level": rec.level, "edited": rec.edited},
+            #Subpixel state of the fixed-point physics (the pixel position alone would change the run)
+            "fixed": None if self.fixed is None else list(self.fixed.state()[:4]),
+        }
+        data = savestate.encode(header, self.platforms, {"dts": rec.dts, "masks": rec.masks, "xs": rec.xs, "ys": rec.ys})
+        self.saver.save(SAVE_FILE, data)
+
+    def resume_run(self) -> bool:
+        #Continues the saved run, False if there is no valid save
+        saved = savestate.load(SAVE_FILE)
+        if saved is None:
+            return False
+        header, platforms, arrays = saved
+        self.player_name = header["name"]
+        self.reset_run(clear_platforms=True)
+        tower = header["tower"]
+        #On a shared level the platforms are the shared ones: a tower would add its own past
+        #SharedLevel.apply, so only the player and the timer of such a save are resumed
+        if tower is not None and self.shared is None:
+            #The generator is rebuilt from its seed, platform by platform up to where the saved
+            #run was (the tower grows in scheduler slices, so a save can end inside a chunk)
+            self.tower = TowerGenerator(tower["seed"], self.world_w, self.world_h)
+            while len(self.tower.platforms) < tower["platforms"] and self.tower.next_platform() is not None:
+                pass
+            if tower["finished"] and not self.tower.finished:
+                self.tower.next_platform()
+        if self.shared is None:
+            self.platforms = platforms
+            self.goal_rect = pygame.Rect(header["goal"])
+        self._race_ghosts()
+        x, y, vx, vy, on_ground, facing_right = header["player"]
+        self.player.rect.topleft = (x, y)
+        self.player.vx, self.player.vy = vx, vy
+        self.player.on_ground, self.player.facing_right = on_ground, facing_right
+        if self.fixed is not None and header.get("fixed") is not None:
+            self.fixed.restore(*header["fixed"])
+        t = header["timer"]
+        self.timer.resume(t["ticks"], t["elapsed"], t["checkpoints"], t["splits"])
+        rec, replay = self.run_recorder, header["replay"]
+        rec.start(tuple(replay["spawn"]), replay["level"])
+        rec.dts, rec.masks, rec.xs, rec.ys = arrays["dts"], arrays["masks"], arrays["xs"], arrays["ys"]
+        rec.edited = replay["edited"]
+        self.plat_w, self.plat_h = header["plat_w"], header["plat_h"]
+        self.editor_mode = header["editor_mode"]
+        self.resumed = True
+        return True
+
+    #runs one frame of gameplay (one sampled trace span per frame)
+    @traced("GameApp._run_game_frame", sample=True)
     def _run_game_frame(self) -> None:
         """
         - handle events
@@ -134,16 +455,21 @@ class GameApp:
         - update camera
         - draw everything
         """
+        prof = self.profiler
+        prof.begin_frame()
+        self.allocations.begin_frame()
         #dt = delta time (seconds per frame). This keeps movement stable across FPS changes.        
-        dt = self.clock.tick(FPS) / 1000.0
-        #If timer hasn't started yet, start it now
-        if self.run_start_ms is None:
-            self.run_start_ms = pygame.time.get_ticks()
+        dt = self.pacer.wait()
+        prof.mark("sleep")
+        #Work time of this frame (without the sleep in tick), used by the dynamic resolution
+        frame_start = time.perf_counter()
         #Keyboard + mouse event handling
         for event in pygame.event.get():
             #close window
             if event.type == pygame.QUIT:
-                pygame.quit()
+                #Same exit as the menu's quit: the video, the save and the jobs are completed
+                self.save_run()
+                self._shutdown()
                 raise SystemExit
             #keyboard presses
             if event.type == pygame.KEYDOWN:
@@ -152,7 +478,32 @@ class GameApp:
                     self.reset_run(clear_platforms=True)
                 #Clicking ESC will go back to menu page
                 if event.key == pygame.K_ESCAPE:
+                    self.save_run()
                     self.state = STATE_MENU
+                    self._stop_recording()
+                    self.ghosts.stop()
+                #F3 shows the frame profiler, F4 saves its samples to a CSV file
+                if event.key == pygame.K_F3:
+                    prof.toggle()
+                if event.key == pygame.K_F4:
+                    prof.dump_csv(PROFILE_CSV_FILE)
+                #F5 tracks allocations and GC pauses, F6 saves them to a CSV file
+                if event.key == pygame.K_F5:
+                    self.allocations.toggle()
+                if event.key == pygame.K_F6:
+                    self.allocations.dump_csv(ALLOC_CSV_FILE)
+                #F7 switches the frame pacing between sleep and sleep + spin
+                if event.key == pygame.K_F7:
+                    self.pacer.cycle()
+                #F8 starts / stops recording a video of the game
+                if event.key == pygame.K_F8:
+                    if self.recorder is None:
+                        self._start_recording()
+                    else:
+                        self._stop_recording()
+                #Clicking G will start a new procedural tower with a random seed (not on a shared level)
+                if event.key == pygame.K_g and self.shared is None:
+                    self.start_tower(random.randrange(1_000_000))
                 #Clicking E will go in builder/editor mode
                 if event.key == pygame.K_e:
                     self.editor_mode = not self.editor_mode
@@ -175,68 +526,191 @@ class GameApp:
                 wx = mx + self.camera.offset_x
                 wy = my + self.camera.offset_y
                 #Left click will add a platform centered on the mouse
+                #(on a shared level the edit goes to the other builders, and rewind doesn't undo it)
                 if event.button == 1:
                     x = int(wx - self.plat_w / 2)
                     y = int(wy - self.plat_h / 2)
-                    self.platforms.append(Platform(x, y, self.plat_w, self.plat_h))
+                    if self.shared is not None:
+                        self.shared.add(x, y, self.plat_w, self.plat_h)
+                    else:
+                        self.platforms.append(Platform(x, y, self.plat_w, self.plat_h))
+                        self.rewind.add(len(self.platforms) - 1, self.platforms[-1])
                 #Right click will remove the nearest platform (but never remove the base floor)
-                if event.button == 3 and len(self.platforms) > 1:
+                if event.button == 3 and self.shared is not None:
+                    self.shared.remove_nearest(wx, wy)
+                elif event.button == 3 and len(self.platforms) > 1:
                     def dist2(p: Platform):
                         cx, cy = p.rect.center
                         return (cx - wx) ** 2 + (cy - wy) ** 2
                     nearest = min(self.platforms[1:], key=dist2)
-                    self.platforms.remove(nearest)
+                    index = self.platforms.index(nearest)
+                    del self.platforms[index]
+                    self.rewind.remove(index, nearest)
+        prof.mark("events")
+        #If timer hasn't started yet, start it now
+        #(ticked after the events, so a restart in this frame doesn't count this frame twice)
+        if not self.timer.running and self.final_time_s is None:
+            self.timer.start(self._checkpoints())
+        #Physics steps of this frame: dt (split after a hitch), or whole steps of 1/FPS s with the fixed-point physics
+        steps = _float_steps(dt) if self.fixed is None else [STEP_DT] * self.stepper.steps(dt)
+        #A run that used the editor can't be replayed on a fixed level
+        if self.editor_mode:
+            self.run_recorder.edited = True
+        #Procedural tower grows while climbing
+        self._extend_tower()
+        #Edits of the other builders on a shared level (they change the level too)
+        if self.shared is not None and self.shared.tick():
+            self.run_recorder.edited = True
         #GAmeplay updates
-        keys = pygame.key.get_pressed()
-        #Update the physics if we're not editing and haven't wont yet
-        if not self.editor_mode and not self.win:
-            self.player.handle_input(keys)
-            self.player.try_jump(keys)
-            self.player.move_and_collide(dt, self.platforms)
-            self.player.clamp_to_world_x(self.world_w)
-            #Win condition here, if only the player collides with the green goal area circle
-            if self.player.rect.colliderect(self.goal_rect):
-                self.win = True
-                self.player.vx = 0.0
-                self.player.vy = 0.0
-                #Save final time and then add it to the scoreboard (once)
-                if self.run_start_ms is not None and self.final_time_s is None:
-                    elapsed_ms = pygame.time.get_ticks() - self.run_start_ms
-                    self.final_time_s = elapsed_ms / 1000.0
-                    add_score(self.player_name, self.final_time_s)
+        #Keys are latched here, as late as possible before the simulation uses them
+        keys = self.pacer.latch_input()
+        #Holding BACKSPACE goes back in time instead of simulating (the timer keeps running,
+        #and the run can't be verified any more, so its replay is not saved)
+        self.rewinding = bool(keys[pygame.K_BACKSPACE]) and not self.win
+        if self.rewinding:
+            #Even with nothing left to rewind: the timer ticks without a recorded step
+            self.timer.tick(dt)
+            self.run_recorder.edited = True
+            self.rewind.rewind(REWIND_SPEED, self.player, self.platforms)
         else:
-            #If we're editing or the run is finished, we will freeze the player movement
-            self.player.vx = 0.0
-            self.player.vy = 0.0
+            for step_dt in steps:
+                self.timer.tick(step_dt)
+                self._physics_step(keys, step_dt)
+            self.rewind.push(self.player)
+        self.ghosts.update(self.timer.elapsed_s)
         #this is to prevent infinte falling or player disappearing or camera following the player 
         #endlessly downward 
         if self.player.rect.top > self.world_h + 400:
             self.reset_run(clear_platforms=False)
+        prof.mark("physics")
         #camera follows player center (world -> screen handled by camera.apply)
         self.camera.follow(self.player.rect.centerx, self.player.rect.centery)
+        self._schedule_warmup()
+        prof.mark("camera")
         #draw everything for this frame
         self._draw()
+        self.allocations.after_draw()
         #If player has won/finished the race, grant "S" shortcut to check out his scores and see with
         #the others how he did
         if self.win and self.final_time_s is not None:
             if pygame.key.get_pressed()[pygame.K_s]:
                 self.state = STATE_SCOREBOARD
     
+        prof.mark("draw")
+        flip_start = time.perf_counter()
         pygame.display.flip()
+        #Under vsync flip() blocks until the refresh: that wait is the frame's idle time, not work
+        waited = time.perf_counter() - flip_start if self.pacer.strategy == "vsync" else 0.0
+        self.pacer.presented()
+        #Copy of the presented frame for the video (dropped if the encoder is behind)
+        if self.recorder is not None:
+            self.recorder.capture(self.window, self.timer.ticks)
+        prof.mark("flip")
+        #Deferred jobs fill what is left of the frame budget, so the resolution doesn't count them
+        work_ms = (time.perf_counter() - frame_start - waited) * 1000.0
+        self.scheduler.run(frame_start + waited)
+        prof.mark("jobs")
+        prof.end_frame()
+        self.allocations.end_frame()
+        #Lower or raise the internal resolution if frames are over or well under budget
+        if self.resolution.record(work_ms):
+            self._set_render_scale()
+
+    def _physics_step(self, keys, dt: float) -> None:
+        #One physics step of dt seconds with the latched keys (float or fixed-point physics)
+        #Update the physics if we're not editing and haven't wont yet
+        if not self.editor_mode and not self.win:
+            before = self.player.rect.copy()
+            mask = input_mask(keys)
+            if self.fixed is not None:
+                self.fixed.step(mask, self.platforms, self.world_w)
+            else:
+                self.player.step(mask, dt, self.platforms, self.world_w)
+            self.run_recorder.record(dt, mask, self.player.rect.topleft)
+            self.timer.check_splits(before, self.player.rect)
+            #Win condition here, if only the player collides with the green goal area circle
+            if self.player.rect.colliderect(self.goal_rect):
+                self.win = True
+                self.player.vx = 0.0
+                self.player.vy = 0.0
+                #Save final time (at the exact point of this tick where the goal was touched)
+                #and then add it to the scoreboard (once)
+                if self.timer.running and self.final_time_s is None:
+                    self.final_time_s = self.timer.finish(entry_fraction(before, self.player.rect, self.goal_rect))
+                    self._store_score()
+                    #The saved run this one continued is finished now
+                    if self.resumed:
+                        self.saver.delete(SAVE_FILE)
+        else:
+            #If we're editing or the run is finished, we will freeze the player movement
+            self.player.vx = 0.0
+            self.player.vy = 0.0
+
+    def _store_score(self) -> None:
+        """
+        Writes the replay of the finished run (not for edited runs, they can't be verified)
+        and adds it to the scoreboard. The bytes are built now, the files are written on a
+        worker thread (a scheduler job, or an I/O task with the asyncio main loop).
+        """
+        replay, data = None, None
+        if not self.run_recorder.edited:
+            replay = replay_path(REPLAY_DIR, self.player_name)
+            data = self.run_recorder.encode(self.player_name, self.final_time_s, self.timer.finish_fraction,
+                                            self.platforms, self.goal_rect, self.world_w, self.world_h)
+        args = (self.player_name, self.final_time_s, list(self.timer.splits), replay, data)
+        if self.io is not None:
+            fut = self.io.run_blocking(_write_score, *args)
+            fut.add_done_callback(lambda fut: self._score_written(None if fut.cancelled() else fut.exception()))
+        else:
+            self.scheduler.submit(_write_score, *args, thread=True, name="score files",
+                                  on_done=lambda job: self._score_written(job.error))
 
+    def _score_written(self, error: Optional[BaseException]) -> None:
+        #A finished run whose files couldn't be written must not disappear without a word
+        if error is not None:
+            self.score_error = f"SCORE NOT SAVED: {error}"
+            print(f"Score of {self.player_name} not saved: {error!r}", file=sys.stderr)
+
+    def _start_recording(self) -> None:
+        path = os.path.join(CAPTURE_DIR, time.strftime("run_%Y%m%d_%H%M%S.trec"))
+        self.recorder = FrameRecorder(path, self.window)
+
+    def _stop_recording(self) -> None:
+        #Waits for the encoder to finish the file
+        if self.recorder is not None:
+            recorder, self.recorder = self.recorder, None
+            recorder.close()
+
+    @traced("GameApp._draw")
     def _draw(self) -> None:
         """
         Draws the background, goal, platforms, player, HUD, and overlays.
         This method does NOT update physics, it only renders visuals.
+        The world is drawn at the internal resolution, then scaled to the window,
+        and the HUD is drawn on the window so text stays sharp.
         """
+        self._draw_world()
+        self._present()
+        self._draw_hud(self.window)
+        if self.profiler.enabled:
+            tiles = self.background.stats()
+            self.profiler.draw_overlay(self.window, [
+                f"SCALE {self.resolution.scale:.3f} {self.screen.get_width()}x{self.screen.get_height()}",
+                f"TILES {tiles['tiles']} HIT {tiles['hit_rate'] * 100:.1f}% {tiles['resident_bytes'] // 1024}KB",
+            ] + self.pacer.overlay_lines() + self.scheduler.overlay_lines())
+        self.allocations.draw_overlay(self.window)
+
+    def _draw_world(self) -> None:
         #Draw world background using camera offsets (creates a scrolling effect)        
-        self.screen.blit(self.background, (-self.camera.offset_x, -self.camera.offset_y))
+        #Only the strips uncovered since the last frame are drawn from the tiles
+        zoom = self.camera.zoom
+        self.background_layer.draw(self.screen, self.camera.offset_x, self.camera.offset_y, zoom)
         #Draw a spawn circle marker (made it orange like the flag in the background)
         sx, sy = self.camera.apply(self.spawn_x, self.spawn_y)
-        pygame.draw.circle(self.screen, (255, 165, 0), (sx, sy), 6)
+        pygame.draw.circle(self.screen, (255, 165, 0), (sx, sy), max(1, self.camera.scale(6)))
         #Draw goal glow effect (visual circle) at the goal's center
         gx, gy = self.camera.apply(self.goal_rect.centerx, self.goal_rect.centery)
-        draw_goal_glow(self.screen, (gx, gy))
+        draw_goal_glow(self.screen, (gx, gy), zoom)
         
         #In editor mode, to help the players built their platforms,
         #we will show a "ghost"/preview of the platform size at the mouse position
@@ -248,52 +722,99 @@ class GameApp:
             ghost_x = int(wx - self.plat_w / 2)
             ghost_y = int(wy - self.plat_h / 2)
             gx2, gy2 = self.camera.apply(ghost_x, ghost_y)
-            ghost_rect = pygame.Rect(gx2, gy2, self.plat_w, self.plat_h)
+            ghost_rect = pygame.Rect(gx2, gy2, self.camera.scale(self.plat_w), self.camera.scale(self.plat_h))
 
-            ghost_r = max(2, self.plat_h // 2)
-            pygame.draw.rect(self.screen, (150, 200, 255), ghost_rect, 2, border_radius=ghost_r)
+            ghost_r = max(2, ghost_rect.h // 2)
+            pygame.draw.rect(self.screen, (150, 200, 255), ghost_rect, max(1, self.camera.scale(2)), border_radius=ghost_r)
+        #Draw platforms (visible ones only, pre-rendered sprites in one blits call)
+        #(a shared level gives the candidates from its grid index instead of the whole list)
+        draw_platforms(self.screen, self.camera, self.platforms if self.shared is None else self.shared.visible(self.camera))
+        #Ghosts behind the player
+        self.ghosts.draw(self.screen, self.camera, self.player)
+        #Draw the player
+        self.player.draw(self.screen, self.camera)
+
+    def _present(self) -> None:
+        #Scale the internal surface up to the window (nothing to do at full resolution)
+        if self.screen is not self.window:
+            pygame.transform.scale(self.screen, self.window.get_size(), self.window)
+
+    def _set_render_scale(self) -> None:
+        """
+        Rebuilds the internal surface after the dynamic resolution changed.
+        At full resolution we draw straight into the window.
+        """
+        if self.resolution.scale == 1.0:
+            self.screen = self.window
+        else:
+            self.screen = pygame.Surface(self.resolution.size).convert()
+        self.camera.zoom = self.resolution.scale
+        self.background_layer.resize(*self.screen.get_size())
+
+    def _draw_hud(self, surface: pygame.Surface) -> None:
+        #HUD layout is in design units (see utils.units) so it fits any window size
+        def u(v: float) -> int:
+            return units(surface, v)
+        font_hud = get_font(u(42))
+        if self.editor_mode:
             #display the possibilities in editor mode
-            hud = self.font_editor.render(
-                "EDITOR ON | [ ] width | -/+ height | LMB add | RMB remove | E toggle | R restart",
+            hud = get_font(u(32)).render(
+                "EDITOR ON | [ ] width | -/+ height | LMB add | RMB remove | E toggle | R restart | G new tower",
                 True,
                 (0, 0, 0),)
-            self.screen.blit(hud, (20, 20))
-        #Draw platforms 
-        for p in self.platforms:
-            p.draw(self.screen, self.camera)
-        #Draw the player
-        self.player.draw(self.screen, self.camera)
+            surface.blit(hud, (u(20), u(20)))
         
         #HUD : player name + timer
-        if self.run_start_ms is not None and self.final_time_s is None:
-            elapsed_s = (pygame.time.get_ticks() - self.run_start_ms) / 1000.0
-            timer_text = format_time(elapsed_s)
+        if self.timer.running:
+            timer_text = format_time(self.timer.elapsed_s)
         elif self.final_time_s is not None:
             timer_text = format_time(self.final_time_s)
         else:
             timer_text = "00:00.00"
         
-        hud_name = self.font_hud.render(f"PLAYER: {self.player_name}", True, (0, 0, 0))
-        hud_time = self.font_hud.render(f"TIME: {timer_text}", True, (0, 0, 0))
-        self.screen.blit(hud_name, (20, 70))
-        self.screen.blit(hud_time, (20, 120))
+        hud_name = font_hud.render(f"PLAYER: {self.player_name}", True, (0, 0, 0))
+        hud_time = font_hud.render(f"TIME: {timer_text}", True, (0, 0, 0))
+        surface.blit(hud_name, (u(20), u(70)))
+        surface.blit(hud_time, (u(20), u(120)))
+        line_y = u(170)
+        if self.timer.splits:
+            n = len(self.timer.splits)
+            hud_split = font_hud.render(f"SPLIT {n}: {format_time(self.timer.splits[-1])}", True, (0, 0, 0))
+            surface.blit(hud_split, (u(20), line_y))
+            line_y += u(50)
+        if self.tower is not None:
+            hud_seed = font_hud.render(f"TOWER SEED: {self.tower.seed}", True, (0, 0, 0))
+            surface.blit(hud_seed, (u(20), line_y))
+            line_y += u(50)
+        if self.rewinding:
+            hud_rewind = font_hud.render(f"<< REWIND {self.rewind.available() / FPS:.1f} s", True, (0, 0, 160))
+            surface.blit(hud_rewind, (u(20), line_y))
+            line_y += u(50)
+        if self.recorder is not None:
+            rec = self.recorder.stats()
+            hud_rec = font_hud.render(f"REC {rec['captured']} DROPPED {rec['dropped']}", True, (200, 0, 0))
+            surface.blit(hud_rec, (u(20), line_y))
+            line_y += u(50)
+        if self.score_error is not None:
+            hud_error = font_hud.render(self.score_error, True, (200, 0, 0))
+            surface.blit(hud_error, (u(20), line_y))
         
         #Win overlay
         if self.win and self.final_time_s is not None:
-            big = get_font(84)
-            small = get_font(44)
+            big = get_font(u(84))
+            small = get_font(u(44))
 
             msg1 = big.render("YOU REACHED THE FLAG!", True, (255, 255, 255))
             msg2 = small.render(f"YOUR TIME: {format_time(self.final_time_s)}", True, (255, 255, 255))
             msg3 = small.render("R RESTART (CLEARS PLATFORMS) | ESC MENU | S SCOREBOARD", True, (255, 255, 255))
             #Create the winning message board with a centered back box behind the win message(msg1)
-            box_w = max(msg1.get_width(), msg2.get_width(), msg3.get_width()) + 80
-            box_h = msg1.get_height() + msg2.get_height() + msg3.get_height() + 80
-            box_x = (SCREEN_W - box_w) // 2
-            box_y = (SCREEN_H - box_h) // 2
-            pygame.draw.rect(self.screen, (0, 0, 0), pygame.Rect(box_x, box_y, box_w, box_h))
-            pygame.draw.rect(self.screen, (255, 255, 255), pygame.Rect(box_x, box_y, box_w, box_h), 2)
+            box_w = max(msg1.get_width(), msg2.get_width(), msg3.get_width()) + u(80)
+            box_h = msg1.get_height() + msg2.get_height() + msg3.get_height() + u(80)
+            box_x = (surface.get_width() - box_w) // 2
+            box_y = (surface.get_height() - box_h) // 2
+            pygame.draw.rect(surface, (0, 0, 0), pygame.Rect(box_x, box_y, box_w, box_h))
+            pygame.draw.rect(surface, (255, 255, 255), pygame.Rect(box_x, box_y, box_w, box_h), 2)
             #Draw the message inside the box
-            self.screen.blit(msg1, (box_x + 40, box_y + 25))
-            self.screen.blit(msg2, (box_x + 40, box_y + 25 + msg1.get_height() + 15))
-            self.screen.blit(msg3, (box_x + 40, box_y + 25 + msg1.get_height() + msg2.get_height() + 30))
\ No newline at end of file
+            surface.blit(msg1, (box_x + u(40), box_y + u(25)))
+            surface.blit(msg2, (box_x + u(40), box_y + u(25) + msg1.get_height() + u(15)))
+            surface.blit(msg3, (box_x + u(40), box_y + u(25) + msg1.get_height() + msg2.get_height() + u(30)))
@@ -0,0 +1,139 @@
+"""
+Optional asyncio main loop (TOWER_LOOP=asyncio).
+
+GameApp.run_async goes through the same states as GameApp.run, but every frame (and every
+step of a menu screen) is a step of a coroutine. The time a frame would spend sleeping
+until the next one is given to the event loop instead, so I/O tasks run between frames:
+- blocking work (writing a replay and the scores, waiting for the save writer) goes to a
+  worker thread with run_blocking and never stalls a frame,
+- coroutines started with spawn can await checkpoint() between pieces of work: it returns
+  at once while the frame's I/O budget (IO_BUDGET_MS) lasts, otherwise waits for the next frame
+  (and then takes at least one step, so tasks progress even when frames are over budget).
+A task step that doesn't give the loop back in time makes the next frame late, which is
+counted as an overrun in stats().
+
+Menu screens poll for events once per frame and give the rest of the time to the tasks
+(the blocking loop sleeps in pygame.event.wait instead).
+"""
+import asyncio
+import time
+from typing import Any, Callable, Coroutine, Dict, Optional, Set
+
+import pygame
+
+from .screens import ScreenSteps
+from .settings import FPS, IO_BUDGET_MS, SCREEN_WAIT_MS
+
+#A frame woken up later than this (seconds) after its idle time counts as an overrun
+_LATE_S = 0.002
+#The event loop's timers can wake up a little late, frames give the tasks this much less than
+#their sleep and the pacer waits for the rest
+WAKE_MARGIN_S = 0.0015
+
+
+class FrameIO:
+    """
+    I/O tasks of the asyncio loop. idle(seconds) is awaited by the loop where a frame would
+    sleep: the tasks run during that time, cooperative ones for at most the budget.
+    """
+    def __init__(self, budget_ms: float = IO_BUDGET_MS) -> None:
+        self.budget_s = budget_ms / 1000.0
+        self._tasks: Set[asyncio.Future] = set()
+        #End of the current budget, and the event that opens the next one
+        self._deadline = 0.0
+        self._next = asyncio.Event()
+        #Statistics
+        self.windows = 0
+        self.overruns = 0
+        self.late_ms_max = 0.0
+        self.done = 0
+        self.failed = 0
+        #Exception of the last task that failed (tasks don't print, see stats())
+        self.last_error: Optional[BaseException] = None
+
+    def _track(self, fut: asyncio.Future) -> asyncio.Future:
+        self._tasks.add(fut)
+        fut.add_done_callback(self._finished)
+        return fut
+
+    def _finished(self, fut: asyncio.Future) -> None:
+        self._tasks.discard(fut)
+        if fut.cancelled() or fut.exception() is not None:
+            self.failed += 1
+            if not fut.cancelled():
+                self.last_error = fut.exception()
+        else:
+            self.done += 1
+
+    def spawn(self, coro: Coroutine) -> asyncio.Task:
+        #Runs a coroutine between frames (it should await checkpoint() in long loops)
+        return self._track(asyncio.get_running_loop().create_task(coro))
+
+    def run_blocking(self, fn: Callable, *args: Any) -> asyncio.Future:
+        #Runs a blocking function on a worker thread
+        return self._track(asyncio.get_running_loop().run_in_executor(None, fn, *args))
+
+    async def checkpoint(self) -> None:
+        #Waits for the next frame's idle time once this frame's I/O budget is spent. A task woken
+        #by a new window always takes one step, even when that window has no budget (idle(0))
+        if time.perf_counter() >= self._deadline:
+            await self._next.wait()
+
+    async def idle(self, seconds: float) -> None:
+        """
+        Gives `seconds` to the I/O tasks (0 or less still lets the ready ones take a step).
+        """
+        seconds = max(0.0, seconds)
+        start = time.perf_counter()
+        self._deadline = start + min(seconds, self.budget_s)
+        opened, self._next = self._next, asyncio.Event()
+        opened.set()
+        await asyncio.sleep(seconds)
+        self._deadline = 0.0
+        self.windows += 1
+        late = time.perf_counter() - start - seconds
+        if late > _LATE_S:
+            self.overruns += 1
+            self.late_ms_max = max(self.late_ms_max, late * 1000.0)
+
+    async def drain(self) -> None:
+        #Waits for every task still running (before a screen shows their results, or on exit)
+        while self._tasks:
+            await asyncio.wait(list(self._tasks))
+
+    @property
+    def pending(self) -> int:
+        return len(self._tasks)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "windows": self.windows,
+            "overruns": self.overruns,
+            "late_ms_max": self.late_ms_max,
+            "done": self.done,
+            "failed": self.failed,
+            "pending": self.pending,
+        }
+
+
+async def wait_events_async(io: FrameIO, timeout_ms: int = SCREEN_WAIT_MS) -> list:
+    """
+    Same as the blocking screens' wait for events, but polling once per frame and giving
+    the time in between to the I/O tasks.
+    """
+    end = time.perf_counter() + timeout_ms / 1000.0
+    while True:
+        events = pygame.event.get()
+        if events or time.perf_counter() >= end:
+            return events
+        await io.idle(1.0 / FPS)
+
+
+async def drive_async(steps: ScreenSteps, io: FrameIO) -> Any:
+    #Runs the steps of a screen (see screens.drive) on the event loop
+    try:
+        next(steps)
+        while True:
+            steps.send(await wait_events_async(io))
+    except StopIteration as done:
+        return done.value
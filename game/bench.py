@@ -0,0 +1,306 @@
+"""
+Benchmarks that run without a real window (SDL dummy drivers).
+
+Full suite (JSON results, compared against a stored baseline):
+    python -m game.bench suite --out bench_results.json
+    python -m game.bench suite --save-baseline          #store the current numbers
+    python -m game.bench suite --threshold 0.25         #fail if 25% slower than the baseline
+
+Platform drawing, frame time against the number of visible platforms:
+    python -m game.bench platforms
+"""
+import argparse
+import json
+import os
+import platform as py_platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+#Headless: must be set before pygame opens a display
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+from .camera import Camera
+from .platform import Platform, draw_platforms
+from .player import PlayerBody, INPUT_RIGHT
+from .effects import draw_goal_glow
+from .scores import load_scores, add_score, save_scores
+from .settings import SCREEN_W, SCREEN_H, FPS
+
+#Default files of the suite
+BENCH_RESULTS_FILE = "bench_results.json"
+BENCH_BASELINE_FILE = "bench_baseline.json"
+#A result this much slower than the baseline (0.2 = 20%) counts as a regression
+DEFAULT_THRESHOLD = 0.2
+#Parameters of the suite (the quick variant is used with --quick)
+PLATFORM_COUNTS = (10, 100, 1000, 10_000, 100_000)
+PLATFORM_COUNTS_QUICK = (10, 1000, 100_000)
+SCORE_COUNTS = (10, 100, 1000, 10_000)
+SCORE_COUNTS_QUICK = (10, 1000)
+
+
+def _time_ms(fn: Callable[[], None], frames: int) -> float:
+    #Average milliseconds per call (one call = one frame)
+    fn()
+    start = time.perf_counter()
+    for _ in range(frames):
+        fn()
+    return (time.perf_counter() - start) * 1000.0 / frames
+
+
+def measure(fn: Callable[[], None], setup: Optional[Callable[[], None]] = None,
+            repeats: int = 5, min_time: float = 0.05) -> Dict:
+    """
+    Times fn in `repeats` samples. Each sample runs fn enough times to last min_time seconds
+    (setup runs before every call and is not timed). Returns ms per call.
+    """
+    if setup:
+        setup()
+    fn()
+    samples = []
+    for _ in range(repeats):
+        total, calls = 0.0, 0
+        while total < min_time or calls == 0:
+            if setup:
+                setup()
+            start = time.perf_counter()
+            fn()
+            total += time.perf_counter() - start
+            calls += 1
+        samples.append(total * 1000.0 / calls)
+    return {
+        "median_ms": statistics.median(samples),
+        "min_ms": min(samples),
+        "max_ms": max(samples),
+        "repeats": repeats,
+    }
+
+
+def _visible_platforms(n: int, seed: int = 0, sizes: int = 8) -> List[Platform]:
+    #Random editor-like platforms all inside the view, sharing a handful of (w, h) sizes
+    #(widths step by 20 and heights by 4 like in the editor)
+    rng = random.Random(seed)
+    shapes = [(rng.randrange(40, 601, 20), rng.randrange(8, 81, 4)) for _ in range(sizes)]
+    platforms = []
+    for _ in range(n):
+        w, h = rng.choice(shapes)
+        platforms.append(Platform(rng.randint(0, SCREEN_W - w), rng.randint(0, SCREEN_H - h), w, h))
+    return platforms
+
+
+def _tower_platforms(n: int, world_w: int, world_h: int, seed: int = 0) -> List[Platform]:
+    #A floor plus n platforms stacked 10px apart on average going up from the floor,
+    #so the number visible on screen stays about the same while the tower gets taller
+    rng = random.Random(seed)
+    platforms = [Platform(0, world_h - 40, world_w, 40)]
+    for _ in range(n):
+        y = world_h - 80 - rng.randint(0, n * 10)
+        platforms.append(Platform(rng.randint(0, world_w - 160), y, rng.randrange(80, 241, 20), 16))
+    return platforms
+
+
+def bench_platforms(counts=(10, 100, 1000, 5000), frames: int = 30) -> List[Dict]:
+    """
+    Frame time of drawing N visible platforms: one draw call per platform (Platform.draw)
+    against the cached sprites submitted with one Surface.blits call (draw_platforms).
+    """
+    pygame.init()
+    screen = pygame.display.set_mode((SCREEN_W, SCREEN_H))
+    camera = Camera(SCREEN_W, SCREEN_H, SCREEN_W, SCREEN_H)
+    results = []
+    for n in counts:
+        platforms = _visible_platforms(n)
+
+        def direct() -> None:
+            for p in platforms:
+                p.draw(screen, camera)
+
+        def batched() -> None:
+            draw_platforms(screen, camera, platforms)
+
+        direct_ms = _time_ms(direct, frames)
+        batched_ms = _time_ms(batched, frames)
+        results.append({
+            "platforms": n,
+            "direct_ms": direct_ms,
+            "batched_ms": batched_ms,
+            "speedup": direct_ms / batched_ms if batched_ms > 0 else 0.0,
+        })
+    return results
+
+
+def bench_move_and_collide(counts) -> Dict[str, Dict]:
+    #One physics step of a player running along the floor with N platforms in the level
+    out = {}
+    for n in counts:
+        platforms = _tower_platforms(n, SCREEN_W, SCREEN_H)
+        body = PlayerBody(80, SCREEN_H - 88)
+
+        def step() -> None:
+            body.steer(INPUT_RIGHT)
+            body.move_and_collide(1.0 / FPS, platforms)
+            if body.rect.right >= SCREEN_W:
+                body.rect.x = 0
+        out[f"move_and_collide[platforms={n}]"] = measure(step)
+    return out
+
+
+def bench_fixed_step(counts) -> Dict[str, Dict]:
+    #Same as bench_move_and_collide with the fixed-point physics (see fixedpoint.py)
+    from .fixedpoint import FixedPointBody
+    out = {}
+    for n in counts:
+        platforms = _tower_platforms(n, SCREEN_W, SCREEN_H)
+        body = FixedPointBody(PlayerBody(80, SCREEN_H - 88))
+
+        def step() -> None:
+            body.step(INPUT_RIGHT, platforms, SCREEN_W)
+            if body.body.rect.right >= SCREEN_W:
+                body.body.rect.x = 0
+        out[f"fixed_step[platforms={n}]"] = measure(step)
+    return out
+
+
+def bench_draw(app, counts) -> Dict[str, Dict]:
+    #GameApp._draw (world, scaling, HUD) with N platforms in a tall tower
+    out = {}
+    saved = app.platforms
+    for n in counts:
+        app.platforms = _tower_platforms(n, app.world_w, app.world_h)
+        out[f"GameApp._draw[platforms={n}]"] = measure(app._draw)
+    app.platforms = saved
+    return out
+
+
+def bench_goal_glow(screen: pygame.Surface) -> Dict[str, Dict]:
+    return {"draw_goal_glow": measure(lambda: draw_goal_glow(screen, (SCREEN_W // 2, SCREEN_H // 2)))}
+
+
+def bench_scores(counts) -> Dict[str, Dict]:
+    #load_scores and add_score on a temporary score file holding N entries
+    out = {}
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "scores.json")
+        for n in counts:
+            table = [{"name": f"P{i}", "time": rng.uniform(5.0, 120.0)} for i in range(n)]
+
+            def reset() -> None:
+                save_scores(table, path)
+            reset()
+            out[f"load_scores[scores={n}]"] = measure(lambda: load_scores(path))
+            out[f"add_score[scores={n}]"] = measure(lambda: add_score("BENCH", 42.0, path), setup=reset)
+    return out
+
+
+def bench_startup(repeats: int = 3) -> Dict[str, Dict]:
+    #Cold start in a fresh interpreter: imports + GameApp() (window, assets, audio)
+    code = "import time; t=time.perf_counter(); from game.app import GameApp; GameApp(); print(time.perf_counter()-t)"
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    samples = []
+    for _ in range(repeats):
+        res = subprocess.run([sys.executable, "-c", code], cwd=root, env=dict(os.environ),
+                             capture_output=True, text=True, check=True)
+        samples.append(float(res.stdout.strip().splitlines()[-1]) * 1000.0)
+    return {"startup": {
+        "median_ms": statistics.median(samples), "min_ms": min(samples), "max_ms": max(samples), "repeats": repeats,
+    }}
+
+
+def run_suite(quick: bool = False) -> Dict:
+    """
+    Runs every benchmark and returns the results as a JSON-ready dictionary.
+    """
+    from .app import GameApp
+    platform_counts = PLATFORM_COUNTS_QUICK if quick else PLATFORM_COUNTS
+    score_counts = SCORE_COUNTS_QUICK if quick else SCORE_COUNTS
+    app = GameApp()
+    results: Dict[str, Dict] = {}
+    results.update(bench_move_and_collide(platform_counts))
+    results.update(bench_fixed_step(platform_counts))
+    results.update(bench_draw(app, platform_counts))
+    results.update(bench_goal_glow(app.screen))
+    results.update(bench_scores(score_counts))
+    results.update(bench_startup())
+    pygame.quit()
+    return {
+        "meta": {
+            "python": py_platform.python_version(),
+            "pygame": pygame.version.ver,
+            "machine": py_platform.platform(),
+            "quick": quick,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """
+    Returns one line per benchmark that got slower than baseline * (1 + threshold).
+    Benchmarks missing from the baseline are ignored.
+    """
+    regressions = []
+    for name, res in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if base is None:
+            continue
+        limit = base["median_ms"] * (1.0 + threshold)
+        if res["median_ms"] > limit:
+            regressions.append(
+                f"{name}: {res['median_ms']:.3f} ms vs baseline {base['median_ms']:.3f} ms "
+                f"(+{(res['median_ms'] / base['median_ms'] - 1.0) * 100:.0f}%)"
+            )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Headless benchmarks.")
+    parser.add_argument("name", choices=["suite", "platforms"])
+    parser.add_argument("--frames", type=int, default=30, help="frames per size (platforms)")
+    parser.add_argument("--quick", action="store_true", help="smaller parameter sets (suite)")
+    parser.add_argument("--out", default=BENCH_RESULTS_FILE, help="JSON results file (suite)")
+    parser.add_argument("--baseline", default=BENCH_BASELINE_FILE, help="baseline JSON file (suite)")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="allowed slowdown (suite)")
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the new baseline")
+    args = parser.parse_args()
+
+    if args.name == "platforms":
+        print(f"{'platforms':>10} {'direct ms':>10} {'batched ms':>11} {'speedup':>8}")
+        for r in bench_platforms(frames=args.frames):
+            print(f"{r['platforms']:>10} {r['direct_ms']:>10.3f} {r['batched_ms']:>11.3f} {r['speedup']:>7.1f}x")
+        return
+
+    current = run_suite(args.quick)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(current, f, indent=2)
+    for name, res in current["results"].items():
+        print(f"{name:<40} {res['median_ms']:>10.3f} ms")
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+        print(f"baseline saved to {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}, run with --save-baseline first")
+        return
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(current, baseline, args.threshold)
+    if regressions:
+        print(f"{len(regressions)} regression(s) over {args.threshold * 100:.0f}%:")
+        for line in regressions:
+            print("  " + line)
+        sys.exit(1)
+    print(f"no regression over {args.threshold * 100:.0f}%")
+
+
+if __name__ == "__main__":
+    main()
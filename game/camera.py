@@ -18,6 +18,8 @@ class Camera:
         #camera offsets (how much the world is shifted when drawn)
         self.offset_x = 0.0
         self.offset_y = 0.0
+        #render scale (internal resolution / window resolution), 1.0 means one world pixel per screen pixel
+        self.zoom = 1.0
 
     def follow(self, target_x: float, target_y: float) -> None:
         """
@@ -34,4 +36,10 @@ class Camera:
     #Converts world coordinates into screen coordinates
     #Every object in the world is drawn using this transformation.
     def apply(self, world_x: float, world_y: float) -> Tuple[int, int]:
-        return int(world_x - self.offset_x), int(world_y - self.offset_y)
\ No newline at end of file
+        if self.zoom == 1.0:
+            return int(world_x - self.offset_x), int(world_y - self.offset_y)
+        return int((world_x - self.offset_x) * self.zoom), int((world_y - self.offset_y) * self.zoom)
+
+    #Converts a world length (width, height, radius) into screen pixels
+    def scale(self, length: float) -> int:
+        return int(length * self.zoom)
\ No newline at end of file
@@ -0,0 +1,187 @@
+"""
+Gameplay video capture (F8 starts / stops a recording in game).
+
+The main thread only copies the presented frame into one of a few preallocated surfaces
+(a plain blit in the window's own pixel format). A background thread scales the frame down,
+converts it to RGB24 in a buffer it owns, compresses it with zlib (lossless) and writes it
+to disk. When all the surfaces are still waiting for the encoder, the frame is dropped and
+counted: the game never waits for the disk.
+
+File format (.trec): a header line, then for every frame a 4-byte little endian length
+followed by the zlib-compressed RGB24 pixels. An index (.trec.idx.json) lists the frames
+with their game tick, time and byte offset, plus the dropped frames.
+
+Convert a recording to Y4M (plays in ffplay / mpv / VLC, needs NumPy):
+    python -m game.capture recordings/run.trec recordings/run.y4m
+"""
+import argparse
+import json
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import pygame
+
+from .settings import CAPTURE_SLOTS, CAPTURE_SCALE, CAPTURE_ZLIB_LEVEL, FPS
+
+MAGIC = b"TREC1 "
+_LENGTH = struct.Struct("<I")
+
+
+class FrameRecorder:
+    """
+    Records frames of a surface to a .trec file from a background encoder thread.
+    Usage: capture(surface, tick) after every presented frame, close() at the end.
+    """
+    def __init__(self, path: str, source: pygame.Surface, scale: float = CAPTURE_SCALE,
+                 slots: int = CAPTURE_SLOTS, fps: int = FPS, level: int = CAPTURE_ZLIB_LEVEL) -> None:
+        self.path = path
+        self.source_size = source.get_size()
+        self.size = (max(1, int(self.source_size[0] * scale)), max(1, int(self.source_size[1] * scale)))
+        self.level = level
+        w, h = self.size
+        #Frame copies in the same format as the source, so capture() is a straight copy
+        self._slots = [pygame.Surface(self.source_size, 0, source) for _ in range(slots)]
+        #Encoder side: the scaled frame, and the RGB24 buffer with a surface on top of it (see pixels.py)
+        self._scaled = pygame.Surface(self.size, 0, source)
+        self._rgb = bytearray(w * h * 3)
+        self._rgb_surface = pygame.image.frombuffer(self._rgb, self.size, "RGB")
+        self._free: "queue.Queue[int]" = queue.Queue()
+        for i in range(slots):
+            self._free.put(i)
+        #Filled buffers waiting for the encoder: (slot, frame number, tick, time in s), None stops it
+        self._filled: "queue.Queue[Optional[Tuple[int, int, int, float]]]" = queue.Queue()
+        self._index: List[List] = []
+        self._start_ns = time.perf_counter_ns()
+        #Statistics
+        self.captured = 0
+        self.encoded = 0
+        self.dropped = 0
+        self.bytes_written = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "wb")
+        header = {"w": w, "h": h, "fps": fps, "pixels": "rgb24", "compression": "zlib"}
+        self._file.write(MAGIC + json.dumps(header).encode("utf-8") + b"\n")
+        self._writer = threading.Thread(target=self._encode_loop, name="capture-encoder", daemon=True)
+        self._writer.start()
+
+    def capture(self, surface: pygame.Surface, tick: int = 0) -> bool:
+        """
+        Copies the frame into a free buffer. Returns False if the frame was dropped.
+        """
+        try:
+            slot = self._free.get_nowait()
+        except queue.Empty:
+            self.dropped += 1
+            return False
+        self._slots[slot].blit(surface, (0, 0))
+        number = self.captured + self.dropped
+        self.captured += 1
+        self._filled.put((slot, number, tick, (time.perf_counter_ns() - self._start_ns) / 1e9))
+        return True
+
+    def _encode_loop(self) -> None:
+        while True:
+            item = self._filled.get()
+            if item is None:
+                break
+            slot, number, tick, t = item
+            frame = self._slots[slot]
+            if self.size != self.source_size:
+                pygame.transform.scale(frame, self.size, self._scaled)
+                frame = self._scaled
+            self._rgb_surface.blit(frame, (0, 0))
+            self._free.put(slot)
+            #zlib releases the GIL while compressing, so the game keeps running meanwhile
+            data = zlib.compress(self._rgb, self.level)
+            offset = self._file.tell()
+            self._file.write(_LENGTH.pack(len(data)))
+            self._file.write(data)
+            self._index.append([number, tick, round(t, 6), offset, len(data)])
+            self.encoded += 1
+            self.bytes_written += len(data) + _LENGTH.size
+
+    def pending(self) -> int:
+        #Frames captured but not written yet
+        return self.captured - self.encoded
+
+    def close(self) -> Dict:
+        """
+        Waits for the encoder to write the remaining frames and writes the index.
+        """
+        self._filled.put(None)
+        self._writer.join()
+        self._file.close()
+        with open(self.path + ".idx.json", "w", encoding="utf-8") as f:
+            json.dump({"size": list(self.size), "dropped": self.dropped, "frames": self._index}, f)
+        return self.stats()
+
+    def stats(self) -> Dict:
+        return {
+            "captured": self.captured,
+            "encoded": self.encoded,
+            "dropped": self.dropped,
+            "pending": self.pending(),
+            "bytes_written": self.bytes_written,
+        }
+
+
+def read_frames(path: str) -> Iterator[bytes]:
+    #Decoded RGB24 frames of a .trec file, one at a time
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"not a .trec recording: {path}")
+        f.readline()
+        while True:
+            raw = f.read(_LENGTH.size)
+            if len(raw) < _LENGTH.size:
+                return
+            (length,) = _LENGTH.unpack(raw)
+            yield zlib.decompress(f.read(length))
+
+
+def read_header(path: str) -> Dict:
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"not a .trec recording: {path}")
+        return json.loads(f.readline())
+
+
+def export_y4m(path: str, out_path: str) -> int:
+    """
+    Writes a Y4M video (4:4:4 YCbCr, full range BT.601) from a recording. Returns the frame count.
+    """
+    import numpy as np
+    header = read_header(path)
+    w, h = header["w"], header["h"]
+    count = 0
+    with open(out_path, "wb") as out:
+        out.write(f"YUV4MPEG2 W{w} H{h} F{header['fps']}:1 Ip A1:1 C444 XCOLORRANGE=FULL\n".encode("ascii"))
+        for frame in read_frames(path):
+            rgb = np.frombuffer(frame, dtype=np.uint8).reshape(h, w, 3).astype(np.float32)
+            r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+            y = 0.299 * r + 0.587 * g + 0.114 * b
+            u = (b - y) * 0.564 + 128.0
+            v = (r - y) * 0.713 + 128.0
+            out.write(b"FRAME\n")
+            for plane in (y, u, v):
+                out.write(np.clip(plane + 0.5, 0, 255).astype(np.uint8).tobytes())
+            count += 1
+    return count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Convert a .trec recording to Y4M.")
+    parser.add_argument("recording")
+    parser.add_argument("out")
+    args = parser.parse_args()
+    n = export_y4m(args.recording, args.out)
+    print(f"wrote {n} frames to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,477 @@
+"""
+Shared editor: several builders edit the same tower at once (TOWER_EDIT_SERVER=host:port).
+
+Every platform of a shared level has a stable id: the id of the peer that added it in the
+high bits and a counter of that peer in the low bits, so ids are made without asking the
+server. Adds and removes are operations (add id x y w h, remove id): they are applied at once
+on the peer that made them, sent in batches every EDIT_BATCH_FRAMES frames, and the server
+(a small asyncio TCP stand-in, so nothing is lost or reordered) puts them in a single order,
+drops the ones that no longer apply (a platform removed twice) and forwards them to the other
+peers. Adds never conflict and a removed id never comes back, so every peer ends up with the
+same platforms. Ids fit in 32 bits: PEER_MAX peers at once, and the id of a peer that left is
+given to the next one with the counter where it stopped. A peer whose counter is used up can
+only remove platforms, and a server with every id taken turns new peers away.
+
+Operations are applied one by one: the platform list, the id table and the grid index (used
+to find the visible platforms to draw and the platform to remove) are updated per operation,
+never rebuilt. Platform sprites are cached by size (see platform.py), an edit at most adds one.
+
+    python -m game.coedit serve                          #stand-in edit server on EDIT_PORT
+    python -m game.coedit bench --peers 8 --ops 20000    #peers editing through a local server
+"""
+import argparse
+import asyncio
+import random
+import socket
+import struct
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import pygame
+
+from .camera import Camera
+from .platform import Platform
+from .settings import SCREEN_W, SCREEN_H, EDIT_PORT, EDIT_BATCH_FRAMES, EDIT_GRID_CELL
+
+#Frame types (server -> peer: WELCOME then EDITS, peer -> server: EDITS)
+WELCOME = 1
+EDITS = 2
+#type, peer id (the new peer's for WELCOME, the author's for EDITS), number of operations
+_FRAME = struct.Struct("<BHI")
+#After a WELCOME header: the last counter already used with that peer id (ids are reused)
+_COUNTER = struct.Struct("<I")
+#kind, platform id, x, y, w, h (only the id is used by a remove)
+_OP = struct.Struct("<BIiiHH")
+ADD = 1
+REMOVE = 2
+#Platform ids: peer id << ID_BITS | counter, in 32 bits. Id 0 is the floor (never removed)
+ID_BITS = 20
+COUNTER_MAX = (1 << ID_BITS) - 1
+PEER_MAX = (1 << (32 - ID_BITS)) - 1
+FLOOR_ID = 0
+
+Op = Tuple[int, int, int, int, int, int]
+
+
+def _ring(cx: int, cy: int, r: int):
+    #Cells at distance r (in cells, Chebyshev) around (cx, cy)
+    if r == 0:
+        yield cx, cy
+        return
+    for kx in range(cx - r, cx + r + 1):
+        yield kx, cy - r
+        yield kx, cy + r
+    for ky in range(cy - r + 1, cy + r):
+        yield cx - r, ky
+        yield cx + r, ky
+
+
+class PlatformGrid:
+    """
+    Uniform grid of cells holding the platforms that overlap them (insertion ordered).
+    add / remove touch only the cells of that platform.
+    """
+    def __init__(self, cell: int = EDIT_GRID_CELL) -> None:
+        self.cell = cell
+        self._cells: Dict[Tuple[int, int], Dict[int, Platform]] = {}
+        #Cell range ever used (min x, min y, max x, max y), bounds the nearest search
+        self._bounds: Optional[List[int]] = None
+
+    def _keys(self, rect: pygame.Rect):
+        c = self.cell
+        for cx in range(rect.left // c, (rect.right - 1) // c + 1):
+            for cy in range(rect.top // c, (rect.bottom - 1) // c + 1):
+                yield cx, cy
+
+    def add(self, pid: int, platform: Platform) -> None:
+        for key in self._keys(platform.rect):
+            self._cells.setdefault(key, {})[pid] = platform
+        c = self.cell
+        r = platform.rect
+        b = self._bounds
+        if b is None:
+            self._bounds = [r.left // c, r.top // c, (r.right - 1) // c, (r.bottom - 1) // c]
+        else:
+            b[0], b[1] = min(b[0], r.left // c), min(b[1], r.top // c)
+            b[2], b[3] = max(b[2], (r.right - 1) // c), max(b[3], (r.bottom - 1) // c)
+
+    def remove(self, pid: int, platform: Platform) -> None:
+        for key in self._keys(platform.rect):
+            cell = self._cells.get(key)
+            if cell is not None:
+                cell.pop(pid, None)
+                if not cell:
+                    del self._cells[key]
+
+    def query(self, rect: pygame.Rect) -> List[Platform]:
+        #Platforms in the cells the rect covers (a platform is listed once)
+        found: Dict[int, Platform] = {}
+        for key in self._keys(rect):
+            found.update(self._cells.get(key, ()))
+        return list(found.values())
+
+    def nearest(self, x: float, y: float, exclude: int = FLOOR_ID) -> Optional[int]:
+        """
+        Id of the platform whose center is nearest to (x, y), searching rings of cells
+        outwards until no unvisited cell can hold a nearer center.
+        """
+        if self._bounds is None:
+            return None
+        c = self.cell
+        cx, cy = int(x // c), int(y // c)
+        x0, y0, x1, y1 = self._bounds
+        span = max(cx - x0, x1 - cx, cy - y0, y1 - cy, 0)
+        best, best_d2 = None, float("inf")
+        for r in range(span + 1):
+            for kx, ky in _ring(cx, cy, r):
+                for pid, p in self._cells.get((kx, ky), {}).items():
+                    if pid == exclude:
+                        continue
+                    px, py = p.rect.center
+                    d2 = (px - x) ** 2 + (py - y) ** 2
+                    if d2 < best_d2:
+                        best, best_d2 = pid, d2
+            #Centers in the next ring are at least r cells away
+            if best is not None and best_d2 <= (r * c) ** 2:
+                break
+        return best
+
+
+class SharedLevel:
+    """
+    The platforms of a shared level with their ids. apply() runs one operation and
+    returns False if it doesn't apply (id already there, or already removed).
+    """
+    def __init__(self) -> None:
+        self.platforms: List[Platform] = []
+        self.by_id: Dict[int, Platform] = {}
+        self.ids: Dict[Platform, int] = {}
+        self.grid = PlatformGrid()
+
+    def apply(self, kind: int, pid: int, x: int = 0, y: int = 0, w: int = 0, h: int = 0) -> bool:
+        if kind == ADD:
+            if pid in self.by_id:
+                return False
+            p = Platform(x, y, w, h)
+            self.platforms.append(p)
+            self.by_id[pid] = p
+            self.ids[p] = pid
+            self.grid.add(pid, p)
+            return True
+        p = self.by_id.pop(pid, None) if pid != FLOOR_ID else None
+        if p is None:
+            return False
+        del self.ids[p]
+        self.grid.remove(pid, p)
+        #The list keeps its order (collisions go through it in order)
+        self.platforms.remove(p)
+        return True
+
+    def ops(self) -> List[Op]:
+        #The whole level as add operations (sent to a peer that joins)
+        return [(ADD, self.ids[p], p.rect.x, p.rect.y, p.rect.w, p.rect.h) for p in self.platforms]
+
+
+def _pack(kind: int, peer: int, ops: Sequence[Op], counter: Optional[int] = None) -> bytes:
+    head = _FRAME.pack(kind, peer, len(ops))
+    if counter is not None:
+        head += _COUNTER.pack(counter)
+    return head + b"".join(_OP.pack(*op) for op in ops)
+
+
+class EditServer:
+    """
+    Stand-in edit server: orders the operations of all peers and forwards them.
+    """
+    def __init__(self, world_w: int = SCREEN_W, world_h: int = SCREEN_H) -> None:
+        self.level = SharedLevel()
+        self.level.apply(ADD, FLOOR_ID, 0, world_h - 40, world_w, 40)
+        self.writers: Dict[int, asyncio.StreamWriter] = {}
+        #Last counter used by each peer id, so a reused id never makes an id twice
+        self._counters: Dict[int, int] = {}
+        self.accepted = self.rejected = 0
+        self.refused = 0
+        self.bytes_out = 0
+
+    def _free_peer(self) -> Optional[int]:
+        #The lowest peer id not connected and with counters left
+        for peer in range(1, PEER_MAX + 1):
+            if peer not in self.writers and self._counters.get(peer, 0) < COUNTER_MAX:
+                return peer
+        return None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        peer = self._free_peer()
+        if peer is None:
+            #Every id is taken: the peer's connection is closed before the welcome
+            self.refused += 1
+            writer.close()
+            return
+        data = _pack(WELCOME, peer, self.level.ops(), self._counters.get(peer, 0))
+        writer.write(data)
+        self.bytes_out += len(data)
+        self.writers[peer] = writer
+        try:
+            while True:
+                kind, _, count = _FRAME.unpack(await reader.readexactly(_FRAME.size))
+                body = await reader.readexactly(count * _OP.size)
+                if kind != EDITS:
+                    continue
+                accepted = []
+                for op in _OP.iter_unpack(body):
+                    #A peer only adds ids of its own range
+                    own = op[0] != ADD or op[1] >> ID_BITS == peer
+                    if own and self.level.apply(*op):
+                        accepted.append(op)
+                        if op[0] == ADD:
+                            counter = op[1] & COUNTER_MAX
+                            self._counters[peer] = max(self._counters.get(peer, 0), counter)
+                self.accepted += len(accepted)
+                self.rejected += count - len(accepted)
+                if accepted:
+                    data = _pack(EDITS, peer, accepted)
+                    for other, w in self.writers.items():
+                        if other != peer:
+                            w.write(data)
+                            self.bytes_out += len(data)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            del self.writers[peer]
+            writer.close()
+
+    async def start(self, host: str = "0.0.0.0", port: int = EDIT_PORT) -> asyncio.AbstractServer:
+        return await asyncio.start_server(self._handle, host, port)
+
+
+class EditClient:
+    """
+    A peer of a shared level, for the game loop: add / remove_nearest from the editor,
+    tick() once per frame (sends the batch every EDIT_BATCH_FRAMES frames, applies what arrived).
+    platforms is the shared list the game draws and collides with.
+    """
+    def __init__(self, host: str, port: int = EDIT_PORT, timeout: float = 5.0) -> None:
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.level = SharedLevel()
+        self.peer_id: Optional[int] = None
+        self.connected = True
+        self._counter = 0
+        self._pending: List[Op] = []
+        self._inbox = bytearray()
+        self._outbox = bytearray()
+        self._frame = 0
+        self.bytes_out = 0
+        #The level arrives with the welcome, wait for it before the game starts
+        while self.peer_id is None:
+            chunk = self.sock.recv(65536)
+            if not chunk:
+                self.sock.close()
+                raise ConnectionError("edit server closed the connection")
+            self._inbox += chunk
+            self._read_frames()
+        self.sock.setblocking(False)
+
+    @property
+    def platforms(self) -> List[Platform]:
+        return self.level.platforms
+
+    def add(self, x: int, y: int, w: int, h: int) -> Optional[Platform]:
+        #None once this peer's ids are used up (a new connection gets a fresh range)
+        if self._counter >= COUNTER_MAX:
+            return None
+        self._counter += 1
+        op = (ADD, self.peer_id << ID_BITS | self._counter, x, y, w, h)
+        self.level.apply(*op)
+        self._pending.append(op)
+        return self.level.platforms[-1]
+
+    def remove_nearest(self, x: float, y: float) -> Optional[Platform]:
+        #Removes the platform nearest to the point (never the floor)
+        pid = self.level.grid.nearest(x, y)
+        if pid is None:
+            return None
+        p = self.level.by_id[pid]
+        op = (REMOVE, pid, 0, 0, 0, 0)
+        self.level.apply(*op)
+        self._pending.append(op)
+        return p
+
+    def visible(self, camera: Camera) -> List[Platform]:
+        #Candidates for drawing, from the grid cells under the camera view
+        view = pygame.Rect(int(camera.offset_x), int(camera.offset_y), camera.screen_w + 1, camera.screen_h + 1)
+        return self.level.grid.query(view)
+
+    def tick(self) -> int:
+        """
+        Once per frame. Returns the number of operations from other peers applied.
+        """
+        self._frame += 1
+        if self._pending and self._frame % EDIT_BATCH_FRAMES == 0:
+            self._outbox += _pack(EDITS, self.peer_id, self._pending)
+            self._pending.clear()
+        if not self.connected:
+            return 0
+        try:
+            if self._outbox:
+                sent = self.sock.send(self._outbox)
+                self.bytes_out += sent
+                del self._outbox[:sent]
+            while True:
+                chunk = self.sock.recv(65536)
+                if not chunk:
+                    #Server gone: the level stays as it is and edits stay local
+                    self.connected = False
+                    break
+                self._inbox += chunk
+        except BlockingIOError:
+            pass
+        except OSError:
+            self.connected = False
+        return self._read_frames()
+
+    def _read_frames(self) -> int:
+        applied = 0
+        buf = self._inbox
+        pos = 0
+        while len(buf) - pos >= _FRAME.size:
+            kind, peer, count = _FRAME.unpack_from(buf, pos)
+            start = pos + _FRAME.size + (_COUNTER.size if kind == WELCOME else 0)
+            end = start + count * _OP.size
+            if len(buf) < end:
+                break
+            ops = _OP.iter_unpack(bytes(buf[start:end]))
+            if kind == WELCOME:
+                self.peer_id = peer
+                self._counter, = _COUNTER.unpack_from(buf, pos + _FRAME.size)
+                for op in ops:
+                    self.level.apply(*op)
+            else:
+                for op in ops:
+                    applied += self.level.apply(*op)
+            pos = end
+        del buf[:pos]
+        return applied
+
+    def close(self) -> None:
+        #Sends what is still pending, then disconnects
+        if self._pending and self.connected:
+            self._outbox += _pack(EDITS, self.peer_id, self._pending)
+            self._pending.clear()
+        try:
+            self.sock.setblocking(True)
+            self.sock.sendall(self._outbox)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+def _server_thread(port: int) -> Tuple[EditServer, asyncio.AbstractEventLoop]:
+    #Runs a stand-in server on its own event loop in a daemon thread
+    server = EditServer()
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+
+    def run() -> None:
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(server.start("127.0.0.1", port))
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, name="edit-server", daemon=True).start()
+    ready.wait()
+    return server, loop
+
+
+def bench(peers: int, ops: int, port: int, seed: int = 1) -> Dict:
+    """
+    Peers make random adds / removes (one per peer per frame) through a local server, then
+    check that every peer converged to the server's level. Also times an incremental edit
+    against rebuilding the grid index of the final level.
+    """
+    server, loop = _server_thread(port)
+    rng = random.Random(seed)
+    clients = [EditClient("127.0.0.1", port) for _ in range(peers)]
+    start = time.perf_counter()
+    frames = 0
+    done = 0
+    while done < ops:
+        frames += 1
+        for c in clients:
+            if done < ops:
+                if rng.random() < 0.7 or len(c.platforms) < 2:
+                    c.add(rng.randrange(0, SCREEN_W * 4), rng.randrange(0, SCREEN_H * 20), rng.choice((80, 120, 160)), 16)
+                else:
+                    c.remove_nearest(rng.randrange(0, SCREEN_W * 4), rng.randrange(0, SCREEN_H * 20))
+                done += 1
+            c.tick()
+    #Let the last batches go around
+    settle = time.perf_counter()
+    target = {pid: tuple(p.rect) for pid, p in server.level.by_id.items()}
+    while time.perf_counter() - settle < 5.0:
+        for c in clients:
+            c.tick()
+        time.sleep(0.005)
+        target = {pid: tuple(p.rect) for pid, p in server.level.by_id.items()}
+        if all({pid: tuple(p.rect) for pid, p in c.level.by_id.items()} == target for c in clients):
+            break
+    elapsed = time.perf_counter() - start
+    converged = sum({pid: tuple(p.rect) for pid, p in c.level.by_id.items()} == target for c in clients)
+    #Cost of one incremental edit on the final level, and of rebuilding its grid instead
+    level = clients[0].level
+    t = time.perf_counter()
+    for i in range(1000):
+        level.apply(ADD, (1 << 30) + i, rng.randrange(0, SCREEN_W * 4), rng.randrange(0, SCREEN_H * 20), 120, 16)
+    for i in range(1000):
+        level.apply(REMOVE, (1 << 30) + i)
+    edit_us = (time.perf_counter() - t) / 2000 * 1e6
+    t = time.perf_counter()
+    grid = PlatformGrid()
+    for p in level.platforms:
+        grid.add(level.ids[p], p)
+    rebuild_ms = (time.perf_counter() - t) * 1000.0
+    for c in clients:
+        c.close()
+    #The server's handlers end when they see the peers leave
+    deadline = time.perf_counter() + 2.0
+    while server.writers and time.perf_counter() < deadline:
+        time.sleep(0.01)
+    loop.call_soon_threadsafe(loop.stop)
+    return {
+        "peers": peers, "ops": ops, "frames": frames, "seconds": elapsed,
+        "platforms": len(target), "converged": converged,
+        "accepted": server.accepted, "rejected": server.rejected,
+        "bytes_up": sum(c.bytes_out for c in clients), "bytes_down": server.bytes_out,
+        "edit_us": edit_us, "rebuild_ms": rebuild_ms,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Stand-in server of the shared editor.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    serve = sub.add_parser("serve", help="run an edit server")
+    serve.add_argument("--port", type=int, default=EDIT_PORT)
+    test = sub.add_parser("bench", help="random edits from several peers through a local server")
+    test.add_argument("--peers", type=int, default=8)
+    test.add_argument("--ops", type=int, default=20000)
+    test.add_argument("--port", type=int, default=EDIT_PORT)
+    args = parser.parse_args()
+    if args.cmd == "serve":
+        async def run() -> None:
+            server = await EditServer().start(port=args.port)
+            print(f"edit server on port {args.port}")
+            await server.serve_forever()
+        asyncio.run(run())
+        return
+    r = bench(args.peers, args.ops, args.port)
+    print(f"{r['peers']} peers, {r['ops']} edits in {r['frames']} frames, {r['seconds']:.2f} s"
+          f" ({r['ops'] / r['seconds']:.0f} edits/s)")
+    print(f"server: {r['accepted']} applied, {r['rejected']} dropped (already removed), {r['platforms']} platforms")
+    print(f"converged peers: {r['converged']}/{r['peers']}")
+    print(f"traffic: {r['bytes_up'] / 1024:.0f} KB up, {r['bytes_down'] / 1024:.0f} KB down")
+    print(f"one edit applied incrementally: {r['edit_us']:.1f} us, rebuilding the grid instead: {r['rebuild_ms']:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
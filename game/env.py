@@ -0,0 +1,314 @@
+"""
+Gym-style environment for bots, built on the same PlayerBody physics as the game.
+
+    env = TowerEnv(seed=7)
+    obs = env.reset()
+    obs, reward, done, info = env.step(INPUT_RIGHT | INPUT_JUMP)
+
+With pixels=True the observation is instead a small image of the camera view
+(see pixels.py), as an array that is reused for every step.
+
+VectorEnv runs many environments in worker processes. Actions, observations, rewards
+and done flags live in multiprocessing.shared_memory NumPy arrays, so a step only sends
+a one-word command through each worker's pipe (nothing is pickled per step).
+
+Needs NumPy (pip install numpy). Steps per second:
+    python -m game.env --envs 64 --workers 4
+"""
+import argparse
+import multiprocessing as mp
+import time
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pygame
+
+from .generator import TowerGenerator, SIM_DT
+from .platform import Platform
+from .player import PlayerBody, INPUT_LEFT, INPUT_RIGHT, INPUT_JUMP
+from .pixels import PixelRenderer
+from .settings import SCREEN_W, SCREEN_H, GOAL_W, GOAL_H, ENV_MAX_STEPS, ENV_NEAREST, PIXEL_OBS_SIZE
+
+#Actions are input bitmasks, these are the ones that make sense (no left + right)
+ACTIONS = (0, INPUT_LEFT, INPUT_RIGHT, INPUT_JUMP,
+           INPUT_LEFT | INPUT_JUMP, INPUT_RIGHT | INPUT_JUMP)
+#Player (x, y, vx, vy, on_ground), goal (dx, dy), then (dx, dy, w) of the nearest platforms
+OBS_SIZE = 7 + 3 * ENV_NEAREST
+#Rewards: per pixel of new height, for reaching the goal, for falling out, and per step
+REWARD_HEIGHT = 0.01
+REWARD_GOAL = 10.0
+REWARD_FALL = -1.0
+REWARD_STEP = -0.001
+
+#A level is the platform rects and the goal rect, as plain tuples so it can be sent to workers
+Level = Tuple[List[Tuple[int, int, int, int]], Tuple[int, int, int, int]]
+
+
+def tower_level(seed: int, world_w: int = SCREEN_W, world_h: int = SCREEN_H) -> Level:
+    #A procedural tower as a level
+    gen = TowerGenerator(seed, world_w, world_h)
+    gen.generate()
+    return [tuple(p.rect) for p in gen.platforms], tuple(gen.goal_rect)
+
+
+def app_level(app) -> Level:
+    #The level currently built in a GameApp (editor platforms or tower)
+    return [tuple(p.rect) for p in app.platforms], tuple(app.goal_rect)
+
+
+class TowerEnv:
+    """
+    One climb: the agent controls a PlayerBody with input bitmasks at a fixed time step.
+    Without a level, every reset uses a new procedural tower (seed, seed + 1, ...).
+    """
+    def __init__(self, level: Optional[Level] = None, seed: int = 0,
+                 world_w: int = SCREEN_W, world_h: int = SCREEN_H,
+                 max_steps: int = ENV_MAX_STEPS, dt: float = SIM_DT,
+                 pixels: bool = False, pixel_size: Tuple[int, int] = PIXEL_OBS_SIZE,
+                 grayscale: bool = False) -> None:
+        self.fixed_level = level
+        self.seed = seed
+        self.world_w = world_w
+        self.world_h = world_h
+        self.max_steps = max_steps
+        self.dt = dt
+        #Same spawn point as GameApp
+        self.spawn = (80, world_h - 140)
+        self.body = PlayerBody(*self.spawn)
+        self.platforms: List[Platform] = []
+        self.goal_rect = pygame.Rect(0, 0, GOAL_W, GOAL_H)
+        self.steps = 0
+        self.best_y = 0
+        self._obs = np.zeros(OBS_SIZE, dtype=np.float32)
+        self.renderer = PixelRenderer(world_w, world_h, SCREEN_W, SCREEN_H, pixel_size, grayscale) if pixels else None
+
+    def _load(self, level: Level) -> None:
+        rects, goal = level
+        self.platforms = [Platform(*r) for r in rects]
+        self.goal_rect = pygame.Rect(goal)
+
+    def reset(self, seed: Optional[int] = None, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Starts a new episode and returns the first observation
+        (written into `out` when given, e.g. a row of a shared buffer).
+        """
+        if self.fixed_level is not None:
+            if not self.platforms:
+                self._load(self.fixed_level)
+        else:
+            if seed is not None:
+                self.seed = seed
+            self._load(tower_level(self.seed, self.world_w, self.world_h))
+            self.seed += 1
+        self.body.reset(*self.spawn)
+        self.steps = 0
+        self.best_y = self.body.rect.bottom
+        return self.observe(out)
+
+    def step(self, action: int, out: Optional[np.ndarray] = None) -> Tuple[np.ndarray, float, bool, Dict]:
+        self.body.step(int(action), self.dt, self.platforms, self.world_w)
+        self.steps += 1
+        reward = REWARD_STEP
+        #Reward only new heights, so jumping up and down on the spot earns nothing
+        if self.body.rect.bottom < self.best_y:
+            reward += (self.best_y - self.body.rect.bottom) * REWARD_HEIGHT
+            self.best_y = self.body.rect.bottom
+        info = {}
+        done = False
+        if self.body.rect.colliderect(self.goal_rect):
+            reward += REWARD_GOAL
+            done = True
+            info["goal"] = True
+        elif self.body.rect.top > self.world_h + 400:
+            #Same out of the world rule as the game
+            reward += REWARD_FALL
+            done = True
+        elif self.steps >= self.max_steps:
+            done = True
+            info["timeout"] = True
+        return self.observe(out), reward, done, info
+
+    def observe(self, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Fills the observation vector (positions relative to the player, divided by the world size).
+        In pixel mode, renders the view and returns the renderer's array instead (out is ignored).
+        """
+        if self.renderer is not None:
+            return self.renderer.render(self.body.rect, self.platforms, self.goal_rect)
+        obs = self._obs if out is None else out
+        r = self.body.rect
+        cx, cy = r.centerx, r.centery
+        sx, sy = 1.0 / self.world_w, 1.0 / self.world_h
+        obs[0] = cx * sx
+        obs[1] = cy * sy
+        obs[2] = self.body.vx / self.body.speed
+        obs[3] = self.body.vy / self.body.jump_strength
+        obs[4] = 1.0 if self.body.on_ground else 0.0
+        obs[5] = (self.goal_rect.centerx - cx) * sx
+        obs[6] = (self.goal_rect.centery - cy) * sy
+        #Nearest platforms by distance to the player (missing ones stay at zero)
+        near = sorted(self.platforms, key=lambda p: abs(p.rect.centerx - cx) + abs(p.rect.top - r.bottom))
+        obs[7:] = 0.0
+        for i, p in enumerate(near[:ENV_NEAREST]):
+            k = 7 + 3 * i
+            obs[k] = (p.rect.centerx - cx) * sx
+            obs[k + 1] = (p.rect.top - r.bottom) * sy
+            obs[k + 2] = p.rect.w * sx
+        return obs
+
+
+class _Shared:
+    #The shared arrays of a VectorEnv, opened by name in every process
+    FIELDS = (("obs", np.float32, OBS_SIZE), ("rewards", np.float32, 0),
+              ("dones", np.uint8, 0), ("actions", np.int32, 0))
+
+    def __init__(self, n: int, names: Optional[Dict[str, str]] = None) -> None:
+        self.blocks: Dict[str, shared_memory.SharedMemory] = {}
+        self.arrays: Dict[str, np.ndarray] = {}
+        for field, dtype, width in self.FIELDS:
+            shape = (n, width) if width else (n,)
+            size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+            if names is None:
+                block = shared_memory.SharedMemory(create=True, size=size)
+            else:
+                block = shared_memory.SharedMemory(name=names[field])
+            self.blocks[field] = block
+            self.arrays[field] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+    def names(self) -> Dict[str, str]:
+        return {field: block.name for field, block in self.blocks.items()}
+
+    def close(self, unlink: bool = False) -> None:
+        self.arrays.clear()
+        for block in self.blocks.values():
+            block.close()
+            if unlink:
+                block.unlink()
+
+
+def _worker(conn, names: Dict[str, str], n: int, lo: int, hi: int,
+            levels: Sequence[Optional[Level]], seeds: Sequence[int]) -> None:
+    #Runs environments lo..hi-1, reading actions and writing results in the shared arrays
+    shared = _Shared(n, names)
+    obs, rewards, dones, actions = (shared.arrays[f] for f in ("obs", "rewards", "dones", "actions"))
+    envs = [TowerEnv(levels[i], seeds[i]) for i in range(lo, hi)]
+    try:
+        while True:
+            cmd = conn.recv()
+            if cmd == "step":
+                for i, env in enumerate(envs, start=lo):
+                    _, reward, done, _ = env.step(actions[i], obs[i])
+                    rewards[i] = reward
+                    dones[i] = done
+                    #Auto reset, the returned observation is the first one of the next episode
+                    if done:
+                        env.reset(out=obs[i])
+            elif cmd == "reset":
+                for i, env in enumerate(envs, start=lo):
+                    env.reset(out=obs[i])
+                dones[lo:hi] = 0
+            elif cmd == "close":
+                break
+            conn.send(True)
+    finally:
+        del obs, rewards, dones, actions
+        shared.close()
+        conn.close()
+
+
+class VectorEnv:
+    """
+    N environments stepped together by a pool of worker processes.
+    The obs / rewards / dones arrays returned by reset() and step() are views on shared
+    memory: they are overwritten by the next step, copy them to keep them.
+    """
+    def __init__(self, n: int, workers: Optional[int] = None,
+                 levels: Optional[Sequence[Optional[Level]]] = None, seed: int = 0) -> None:
+        self.n = n
+        workers = max(1, min(n, workers or mp.cpu_count()))
+        levels = list(levels) if levels is not None else [None] * n
+        #Every environment gets its own range of tower seeds
+        seeds = [seed + i * 100_000 for i in range(n)]
+        self._shared = _Shared(n)
+        arrays = self._shared.arrays
+        self.obs, self.rewards, self.dones, self.actions = (arrays[f] for f in ("obs", "rewards", "dones", "actions"))
+        self._conns = []
+        self._procs = []
+        bounds = [n * w // workers for w in range(workers + 1)]
+        for lo, hi in zip(bounds, bounds[1:]):
+            parent, child = mp.Pipe()
+            proc = mp.Process(target=_worker, args=(child, self._shared.names(), n, lo, hi, levels, seeds), daemon=True)
+            proc.start()
+            child.close()
+            self._conns.append(parent)
+            self._procs.append(proc)
+
+    def _broadcast(self, cmd: str) -> None:
+        for conn in self._conns:
+            conn.send(cmd)
+        for conn in self._conns:
+            conn.recv()
+
+    def reset(self) -> np.ndarray:
+        self._broadcast("reset")
+        return self.obs
+
+    def step(self, actions: Sequence[int]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        self.actions[:] = actions
+        self._broadcast("step")
+        return self.obs, self.rewards, self.dones
+
+    def close(self) -> None:
+        for conn in self._conns:
+            conn.send("close")
+        for proc in self._procs:
+            proc.join()
+        del self.obs, self.rewards, self.dones, self.actions
+        self._shared.close(unlink=True)
+
+    def __enter__(self) -> "VectorEnv":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def steps_per_second(envs: int, workers: Optional[int], steps: int) -> Dict[str, float]:
+    """
+    Random-policy throughput of one TowerEnv in this process and of a VectorEnv.
+    """
+    rng = np.random.default_rng(0)
+    actions = np.array(ACTIONS, dtype=np.int32)
+
+    env = TowerEnv(seed=0)
+    env.reset()
+    start = time.perf_counter()
+    for a in rng.choice(actions, size=steps):
+        if env.step(a)[2]:
+            env.reset()
+    single = steps / (time.perf_counter() - start)
+
+    with VectorEnv(envs, workers) as venv:
+        venv.reset()
+        batches = max(1, steps // envs)
+        start = time.perf_counter()
+        for _ in range(batches):
+            venv.step(rng.choice(actions, size=envs))
+        vector = batches * envs / (time.perf_counter() - start)
+    return {"single_steps_per_s": single, "vector_steps_per_s": vector}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Environment throughput (random policy).")
+    parser.add_argument("--envs", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--steps", type=int, default=50_000, help="total steps per measurement")
+    args = parser.parse_args()
+    res = steps_per_second(args.envs, args.workers, args.steps)
+    print(f"single env:          {res['single_steps_per_s']:>10.0f} steps/s")
+    print(f"vector env ({args.envs:>3} envs): {res['vector_steps_per_s']:>10.0f} steps/s")
+
+
+if __name__ == "__main__":
+    main()
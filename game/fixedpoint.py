@@ -0,0 +1,207 @@
+"""
+Fixed-point physics (TOWER_PHYSICS=fixed).
+
+The float physics of PlayerBody moves by int(v * dt) every frame: the fraction of a pixel is
+thrown away (towards zero), so the result depends on the dt of each frame. In fixed-point
+mode positions and velocities are integers in subpixels (1/256 pixel) and the simulation
+runs in whole steps of 1/FPS s, so the same inputs always give the same positions, on any
+machine and any Python version (only integer arithmetic is used in a step).
+The game runs as many fixed steps per frame as the elapsed time asks for.
+
+Speed, jump strength and gravity are the float constants converted once to subpixels per
+step. Nothing is lost to truncation, so a fixed-point player reaches a little further and
+higher than the float one: every tower validated with the float physics can be climbed.
+
+Golden traces (fixed scenarios hashed tick by tick) check that a change or a platform
+didn't alter the results (tests/test_fixedpoint.py runs them too):
+    python -m game.fixedpoint            #check against the traces below
+    python -m game.fixedpoint --update   #print new traces after an intended change
+"""
+import argparse
+import hashlib
+import struct
+import sys
+from typing import Dict, List, Sequence, Tuple
+
+from .platform import Platform
+from .player import PlayerBody, INPUT_LEFT, INPUT_RIGHT, INPUT_JUMP
+from .settings import (
+    FPS, PLAYER_SPEED, PLAYER_JUMP_STRENGTH, PLAYER_GRAVITY,
+    FIXED_SUBPIXEL_BITS, FIXED_MAX_STEPS,
+)
+
+SHIFT = FIXED_SUBPIXEL_BITS
+ONE = 1 << SHIFT
+#Duration of one step in seconds (used by the timer and the replays)
+STEP_DT = 1.0 / FPS
+#Subpixels per step, and per step per step for the gravity
+SPEED = round(PLAYER_SPEED * ONE / FPS)
+JUMP = round(PLAYER_JUMP_STRENGTH * ONE / FPS)
+GRAVITY = round(PLAYER_GRAVITY * ONE / FPS ** 2)
+
+
+class FixedPointBody:
+    """
+    Drives a PlayerBody (its rect, on_ground, facing_right) with integer physics.
+    The float vx / vy of the body are kept as a mirror (sprites, saves and rewind read them).
+    When something else moved the body (reset, rewind, resumed save), the integer state is
+    taken back from it at the next step.
+    """
+    def __init__(self, body: PlayerBody) -> None:
+        self.body = body
+        self.x = self.y = 0
+        self.vx = self.vy = 0
+        self._sync()
+
+    def _sync(self) -> None:
+        b = self.body
+        if (self.x >> SHIFT, self.y >> SHIFT) != (b.rect.x, b.rect.y):
+            self.x, self.y = b.rect.x << SHIFT, b.rect.y << SHIFT
+            if b.on_ground:
+                #Standing: back on the resting subpixel, or the next step would lose the ground
+                self.y += ONE - 1
+        if b.vy != self._mirror(self.vy):
+            self.vy = round(b.vy * ONE / FPS)
+
+    @staticmethod
+    def _mirror(v: int) -> float:
+        #Subpixels per step -> pixels per second
+        return v * FPS / ONE
+
+    def step(self, mask: int, platforms: Sequence[Platform], world_w: int) -> None:
+        """
+        One step of 1/FPS s, same order as PlayerBody.step: steer, jump, gravity, move x, move y, clamp.
+        """
+        self._sync()
+        b = self.body
+        rect = b.rect
+        self.vx = 0
+        if mask & INPUT_LEFT:
+            self.vx = -SPEED
+            b.facing_right = False
+        if mask & INPUT_RIGHT:
+            self.vx = SPEED
+            b.facing_right = True
+        if mask & INPUT_JUMP and b.on_ground:
+            self.vy = -JUMP
+        self.vy += GRAVITY
+        b.on_ground = False
+        #Horizontal movement (floor division: a subpixel position belongs to the pixel on its left)
+        self.x += self.vx
+        rect.x = self.x >> SHIFT
+        for p in platforms:
+            if rect.colliderect(p.rect):
+                if self.vx > 0:
+                    rect.right = p.rect.left
+                elif self.vx < 0:
+                    rect.left = p.rect.right
+                self.x = rect.x << SHIFT
+        #Vertical movement
+        self.y += self.vy
+        rect.y = self.y >> SHIFT
+        for p in platforms:
+            if rect.colliderect(p.rect):
+                if self.vy > 0:
+                    rect.bottom = p.rect.top
+                    #Resting on the last subpixel of the row, so the next step's gravity touches
+                    #the platform again and on_ground stays True while standing
+                    self.y = (rect.y << SHIFT) + ONE - 1
+                    self.vy = 0
+                    b.on_ground = True
+                elif self.vy < 0:
+                    rect.top = p.rect.bottom
+                    self.y = rect.y << SHIFT
+                    self.vy = 0
+        if rect.left < 0 or rect.right > world_w:
+            b.clamp_to_world_x(world_w)
+            self.x = rect.x << SHIFT
+        b.vx, b.vy = self._mirror(self.vx), self._mirror(self.vy)
+
+    def state(self) -> Tuple[int, int, int, int, bool]:
+        return self.x, self.y, self.vx, self.vy, self.body.on_ground
+
+    def restore(self, x: int, y: int, vx: int, vy: int) -> None:
+        #Integer state of a saved run (set after the body, whose pixel position it must match)
+        self.x, self.y, self.vx, self.vy = x, y, vx, vy
+
+
+class FixedStepper:
+    """
+    Turns frame times into a whole number of fixed steps (the remainder waits for the next frame).
+    At most max_steps per frame, so a long hitch slows the game down instead of freezing it.
+    """
+    def __init__(self, max_steps: int = FIXED_MAX_STEPS) -> None:
+        self.max_steps = max_steps
+        self.pending_s = 0.0
+
+    def steps(self, dt: float) -> int:
+        self.pending_s = min(self.pending_s + dt, self.max_steps * STEP_DT)
+        n = int(self.pending_s / STEP_DT)
+        self.pending_s -= n * STEP_DT
+        return n
+
+
+#Golden scenarios: a level and a seed for the inputs
+def _lcg_inputs(seed: int, ticks: int) -> List[int]:
+    #Inputs from a small LCG (random.Random is avoided so the traces only depend on this file)
+    actions = (0, INPUT_LEFT, INPUT_RIGHT, INPUT_JUMP, INPUT_LEFT | INPUT_JUMP, INPUT_RIGHT | INPUT_JUMP)
+    out, x, mask = [], seed, 0
+    for i in range(ticks):
+        x = (x * 1103515245 + 12345) & 0x7FFFFFFF
+        if i % 12 == 0:
+            mask = actions[(x >> 16) % len(actions)]
+        out.append(mask)
+    return out
+
+
+def _scenarios() -> Dict[str, Tuple[List[Platform], Tuple[int, int], List[int]]]:
+    floor = Platform(0, 1040, 1920, 40)
+    stairs = [floor] + [Platform(200 + 140 * i, 960 - 70 * i, 120, 16) for i in range(10)]
+    #Low ceilings and walls: head bumps and side hits
+    boxes = [floor, Platform(0, 900, 600, 16), Platform(700, 940, 20, 100), Platform(900, 980, 300, 16),
+             Platform(1250, 860, 40, 180)]
+    return {
+        "floor": ([floor], (80, 992), _lcg_inputs(1, 1200)),
+        "stairs": (stairs, (80, 992), _lcg_inputs(2, 1800)),
+        "boxes": (boxes, (80, 992), _lcg_inputs(3, 1800)),
+    }
+
+
+def trace_digest(platforms: Sequence[Platform], spawn: Tuple[int, int], inputs: Sequence[int],
+                 world_w: int = 1920) -> str:
+    #SHA-256 of the integer state after every step
+    body = FixedPointBody(PlayerBody(*spawn))
+    h = hashlib.sha256()
+    pack = struct.Struct("<qqqqB").pack
+    for mask in inputs:
+        body.step(mask, platforms, world_w)
+        h.update(pack(*body.state()))
+    return h.hexdigest()
+
+
+GOLDEN = {
+    "floor": "edd864de454d0679a98faa62694646213fc1911a6d9cd5c32382b179584fbc44",
+    "stairs": "bd1a8021fc4837e4dbad360a8d2df932eb7b40b72226a450fb1569da484ec3dd",
+    "boxes": "acada21050eb4575177b95cdf3d1e4a2b29d758551fa5e992d5e700964bed6e8",
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Check the fixed-point physics against the golden traces.")
+    parser.add_argument("--update", action="store_true", help="print the current traces instead of checking")
+    args = parser.parse_args()
+    failed = 0
+    for name, (platforms, spawn, inputs) in _scenarios().items():
+        digest = trace_digest(platforms, spawn, inputs)
+        if args.update:
+            print(f'    "{name}": "{digest}",')
+        elif digest == GOLDEN[name]:
+            print(f"ok    {name} ({len(inputs)} steps)")
+        else:
+            failed += 1
+            print(f"FAIL  {name}: {digest} != {GOLDEN[name]}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
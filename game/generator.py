@@ -0,0 +1,297 @@
+"""
+Procedural tower generator.
+
+Towers are generated from a seed, so the same seed always gives the same tower.
+Every jump is checked against the real player physics: we simulate a PlayerBody
+jumping from one platform to the next (same code the game uses), so a tower that
+passes validation can always be climbed at the target frame rate.
+The jumps are only simulated with steps of SIM_DT (1/FPS s). The float physics drops the
+fraction of a pixel every frame, so its jumps change a little with the frame time: at a
+much lower or uneven frame rate a tight jump can fall short. The fixed-point physics
+(TOWER_PHYSICS=fixed) always runs steps of 1/FPS s and reaches at least as far, so every
+validated tower can be climbed with it whatever the frame rate.
+
+Batch validation of many seeds (process pool):
+    python -m game.generator --seeds 5000 --workers 8
+"""
+import argparse
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pygame
+
+from .platform import Platform
+from .tracing import traced
+from .player import PlayerBody, INPUT_LEFT, INPUT_RIGHT, INPUT_JUMP
+from .settings import (
+    SCREEN_W, SCREEN_H, FPS,
+    PLAYER_W,
+    GOAL_W, GOAL_H,
+    GEN_PLATFORM_WIDTHS, GEN_PLATFORM_H,
+    GEN_MIN_RISE, GEN_RISE_SAFETY, GEN_REACH_SAFETY,
+    GEN_TOP_Y, GEN_CHUNK_SIZE,
+)
+
+#Fixed physics step used for every simulated jump (one frame at the target FPS, the only dt validated)
+SIM_DT = 1.0 / FPS
+#A jump that hasn't landed after this many frames is a failed jump
+SIM_MAX_FRAMES = FPS * 3
+#How many random placements we try for each new platform
+MAX_ATTEMPTS = 24
+#Platforms further apart than this in the route are too far apart in height to block a jump
+LINK_WINDOW = 6
+
+
+class JumpProfile:
+    """
+    Samples one full jump of a PlayerBody (holding a direction the whole time).
+    The arc is a list of (dx, rise) per frame, measured from the take-off point,
+    which is used to know how high and how far the player can go.
+    """
+    def __init__(self) -> None:
+        body = PlayerBody(0, 0)
+        body.on_ground = True
+        start_x, start_bottom = body.rect.x, body.rect.bottom
+        self.arc: List[Tuple[int, int]] = []
+        for _ in range(SIM_MAX_FRAMES):
+            body.step(INPUT_RIGHT | INPUT_JUMP, SIM_DT, [], 10 ** 9)
+            rise = start_bottom - body.rect.bottom
+            self.arc.append((body.rect.x - start_x, rise))
+            if rise < 0:
+                break
+        #Highest point of the jump (in pixels above the take-off platform)
+        self.max_rise = max(r for _, r in self.arc)
+
+    def reach(self, rise: int) -> int:
+        """
+        Horizontal distance covered when coming back down through the given rise,
+        which is the farthest the player can land on a platform that much higher.
+        """
+        best = 0
+        for dx, r in self.arc:
+            if r >= rise:
+                best = dx
+        return best
+
+
+def _simulate_jump(src: Platform, target: pygame.Rect, obstacles: List[Platform],
+                   start_x: int, world_w: int, landing: bool) -> bool:
+    """
+    Jumps from src towards target the way a careful player would:
+    steer towards the target center, but never move right under it while still below it.
+    If landing is True we need to stand on target, otherwise touching it is enough (goal).
+    """
+    body = PlayerBody(start_x, 0)
+    body.rect.bottom = src.rect.top
+    body.on_ground = True
+    step_px = int(body.speed * SIM_DT)
+    for frame in range(SIM_MAX_FRAMES):
+        mask = INPUT_JUMP if frame == 0 else 0
+        dx = target.centerx - body.rect.centerx
+        move = INPUT_RIGHT if dx > 2 else INPUT_LEFT if dx < -2 else 0
+        if move:
+            shift = step_px if move == INPUT_RIGHT else -step_px
+            #Fully below the target and the next step would put us under it: wait
+            below = body.rect.top >= target.bottom
+            under = body.rect.right + shift > target.left and body.rect.left + shift < target.right
+            if not (below and under):
+                mask |= move
+        body.step(mask, SIM_DT, obstacles, world_w)
+        if not landing and body.rect.colliderect(target):
+            return True
+        if body.on_ground:
+            return (
+                landing
+                and body.rect.bottom == target.top
+                and body.rect.right > target.left
+                and body.rect.left < target.right
+            )
+    return False
+
+
+def can_reach(src: Platform, target: pygame.Rect, obstacles: List[Platform],
+              world_w: int, landing: bool = True) -> bool:
+    """
+    True if the player standing on src can get onto target (or touch it if landing is False).
+    We try a few take-off spots on src: right beside the target on both sides and the center.
+    """
+    lo, hi = src.rect.left - PLAYER_W + 1, src.rect.right - 1
+    for x in (target.left - PLAYER_W, target.right, src.rect.centerx - PLAYER_W // 2):
+        start_x = max(lo, min(x, hi))
+        if _simulate_jump(src, target, obstacles, start_x, world_w, landing):
+            return True
+    return False
+
+
+class TowerGenerator:
+    """
+    Builds a tower from the floor up, one platform at a time, from a seed.
+    Platforms are produced in chunks so the game can generate them while climbing.
+    When the tower reaches the top area, a goal is placed above the last platform.
+    """
+    def __init__(self, seed: int, world_w: int = SCREEN_W, world_h: int = SCREEN_H,
+                 top_y: int = GEN_TOP_Y, profile: Optional[JumpProfile] = None) -> None:
+        self.seed = seed
+        self.world_w = world_w
+        self.world_h = world_h
+        self.top_y = top_y
+        self.rng = random.Random(seed)
+        self.profile = profile or JumpProfile()
+        #The floor is always the first platform, same as a normal run
+        self.platforms: List[Platform] = [Platform(0, world_h - 40, world_w, 40)]
+        self.goal_rect: Optional[pygame.Rect] = None
+        #Current horizontal direction of the climb (+1 right, -1 left)
+        self.direction = 1 if self.rng.random() < 0.5 else -1
+
+    @property
+    def finished(self) -> bool:
+        return self.goal_rect is not None
+
+    @property
+    def top(self) -> int:
+        #World y of the highest generated platform
+        return self.platforms[-1].rect.top
+
+    def _candidate(self, src: Platform) -> Platform:
+        #Random step size and platform width
+        max_rise = int(self.profile.max_rise * GEN_RISE_SAFETY)
+        rise = self.rng.randint(GEN_MIN_RISE, max(GEN_MIN_RISE, max_rise))
+        w = self.rng.choice(GEN_PLATFORM_WIDTHS)
+        reach = int(self.profile.reach(rise) * GEN_REACH_SAFETY)
+        gap = self.rng.randint(0, max(0, reach - PLAYER_W))
+        y = src.rect.top - rise
+        #Continue in the current direction, bounce back when we would leave the world
+        for direction in (self.direction, -self.direction):
+            if direction > 0 and src.rect.right + gap + w <= self.world_w:
+                self.direction = direction
+                return Platform(src.rect.right + gap, y, w, GEN_PLATFORM_H)
+            if direction < 0 and src.rect.left - gap - w >= 0:
+                self.direction = direction
+                return Platform(src.rect.left - gap - w, y, w, GEN_PLATFORM_H)
+        #The floor is as wide as the world, start somewhere on it
+        x = self.rng.randint(0, self.world_w - w)
+        return Platform(x, y, w, GEN_PLATFORM_H)
+
+    def _place_goal(self) -> None:
+        #Straight above the last platform, half a jump higher
+        last = self.platforms[-1].rect
+        rise = int(self.profile.max_rise * 0.5)
+        self.goal_rect = pygame.Rect(last.centerx - GOAL_W // 2, last.top - rise - GOAL_H, GOAL_W, GOAL_H)
+
+    def next_platform(self) -> Optional[Platform]:
+        """
+        Adds one platform (checked with simulated jumps) and returns it.
+        Returns None once the tower is finished and the goal is placed.
+        """
+        if self.finished:
+            return None
+        src = self.platforms[-1]
+        if src.rect.top - self.profile.max_rise * GEN_RISE_SAFETY < self.top_y + GOAL_H:
+            self._place_goal()
+            return None
+        for _ in range(MAX_ATTEMPTS):
+            cand = self._candidate(src)
+            self.platforms.append(cand)
+            #The new platform must be reachable and must not block any earlier jump
+            if links_ok(self.platforms, len(self.platforms) - 1, self.world_w):
+                return cand
+            self.platforms.pop()
+        #Nothing fits here, so the tower ends early (the goal above the top is always reachable)
+        self._place_goal()
+        return None
+
+    @traced("TowerGenerator.chunk", cat="gen")
+    def chunk(self, size: int = GEN_CHUNK_SIZE) -> List[Platform]:
+        #Generates the next chunk of platforms (may be shorter at the top of the tower)
+        out: List[Platform] = []
+        for _ in range(size):
+            p = self.next_platform()
+            if p is None:
+                break
+            out.append(p)
+        return out
+
+    def extend_to(self, y: float) -> List[Platform]:
+        #Generates chunks until the tower reaches world height y (used while climbing)
+        out: List[Platform] = []
+        while not self.finished and self.top > y:
+            out.extend(self.chunk())
+        return out
+
+    def generate(self) -> List[Platform]:
+        #Generates the whole tower at once
+        self.extend_to(float("-inf"))
+        return self.platforms
+
+
+def _link_ok(platforms: List[Platform], i: int, world_w: int) -> bool:
+    #Jump from platform i-1 to platform i, with the platforms around it in the way
+    obstacles = platforms[max(0, i - LINK_WINDOW):i + LINK_WINDOW]
+    return can_reach(platforms[i - 1], platforms[i].rect, obstacles, world_w)
+
+
+def links_ok(platforms: List[Platform], last: int, world_w: int) -> bool:
+    #Checks every jump that platform `last` could get in the way of
+    return all(_link_ok(platforms, i, world_w) for i in range(last, max(0, last - LINK_WINDOW), -1))
+
+
+def validate_tower(platforms: List[Platform], goal_rect: pygame.Rect, world_w: int) -> bool:
+    """
+    Checks a generated route: every platform must be reachable from the previous one
+    with the other platforms around, and the goal must be reachable from the last one.
+    """
+    if not all(_link_ok(platforms, i, world_w) for i in range(1, len(platforms))):
+        return False
+    return can_reach(platforms[-1], goal_rect, platforms[-LINK_WINDOW:], world_w, landing=False)
+
+
+def _validate_seed(seed: int) -> Tuple[int, bool, int, float]:
+    #Worker function: generates one seed and validates it (must be top level to be picklable)
+    start = time.perf_counter()
+    gen = TowerGenerator(seed)
+    gen.generate()
+    gen_ms = (time.perf_counter() - start) * 1000.0
+    ok = gen.goal_rect is not None and validate_tower(gen.platforms, gen.goal_rect, gen.world_w)
+    return seed, ok, len(gen.platforms), gen_ms
+
+
+def validate_seeds(seeds: Iterable[int], workers: Optional[int] = None) -> Dict:
+    """
+    Generates and validates many seeds in a process pool.
+    Returns a summary with the failed seeds and generation speed.
+    """
+    seeds = list(seeds)
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(_validate_seed, seeds, chunksize=max(1, len(seeds) // 64)))
+    elapsed = time.perf_counter() - start
+    failed = [seed for seed, ok, _, _ in results if not ok]
+    gen_ms = [ms for _, _, _, ms in results]
+    return {
+        "seeds": len(seeds),
+        "failed": failed,
+        "avg_platforms": sum(n for _, _, n, _ in results) / max(1, len(results)),
+        "avg_generate_ms": sum(gen_ms) / max(1, len(gen_ms)),
+        "max_generate_ms": max(gen_ms, default=0.0),
+        "seeds_per_s": len(seeds) / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate and validate procedural towers.")
+    parser.add_argument("--seeds", type=int, default=1000, help="number of seeds to check")
+    parser.add_argument("--first", type=int, default=0, help="first seed")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes")
+    args = parser.parse_args()
+    summary = validate_seeds(range(args.first, args.first + args.seeds), args.workers)
+    print(f"seeds checked:     {summary['seeds']}")
+    print(f"failed seeds:      {len(summary['failed'])} {summary['failed'][:20]}")
+    print(f"avg platforms:     {summary['avg_platforms']:.1f}")
+    print(f"avg generate (ms): {summary['avg_generate_ms']:.2f} (max {summary['max_generate_ms']:.2f})")
+    print(f"seeds per second:  {summary['seeds_per_s']:.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Ghost racing: the best runs of the scoreboard replayed as semi-transparent players.
+
+Ghosts are read from the replay files of the top scores recorded on the current level
+(see replay.py). A ghost never loads its replay whole: the records are decoded in small
+chunks, a few seconds ahead of the current run time, and the ones already shown are
+dropped. Ghosts follow the run time (not the tick count), so a ghost recorded at another
+frame rate stays in sync. They are drawn with the Player's sprites through one shared
+translucent copy of each sprite, all ghosts in a single blits call.
+The replays found for a level are kept until the score file changes, so restarting a run
+(R, falling) doesn't read the replay headers again.
+"""
+import os
+from collections import deque
+from typing import Deque, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import pygame
+
+from .camera import Camera
+from .player import Player
+from .replay import iter_records, read_header
+from .scores import load_scores
+from .settings import FEET_OFFSET_Y, GHOST_ALPHA, GHOST_LOOKAHEAD_S, GHOSTS_MAX, SCORES_FILE
+
+
+class GhostStream:
+    """
+    Position of one replay at a given run time, decoded lazily from the file.
+    """
+    def __init__(self, path: str, name: str, spawn: Tuple[int, int], lookahead_s: float = GHOST_LOOKAHEAD_S) -> None:
+        self.path = path
+        self.name = name
+        self.lookahead_s = lookahead_s
+        #Run time at the end of each buffered tick, with the position and inputs of that tick
+        self._ahead: Deque[Tuple[float, int, int, int]] = deque()
+        self._records: Optional[Iterator[List[Tuple[float, int, int, int]]]] = iter_records(path, chunk_ticks=64)
+        self._decoded_s = 0.0
+        self.x, self.y = spawn
+        self.mask = 0
+        self.finished = False
+
+    def _decode(self, until_s: float) -> None:
+        #Reads chunks until the buffer reaches until_s (or the end of the replay)
+        while self._records is not None and self._decoded_s < until_s:
+            chunk = next(self._records, None)
+            if chunk is None:
+                self._records = None
+                return
+            for dt, mask, x, y in chunk:
+                self._decoded_s += dt
+                self._ahead.append((self._decoded_s, x, y, mask))
+
+    def advance(self, run_s: float) -> None:
+        """
+        Moves the ghost to the last tick it had finished at run time run_s.
+        """
+        self._decode(run_s + self.lookahead_s)
+        ahead = self._ahead
+        while ahead and ahead[0][0] <= run_s:
+            _, self.x, self.y, self.mask = ahead.popleft()
+        if not ahead and self._records is None:
+            self.finished = True
+
+    def buffered(self) -> int:
+        return len(self._ahead)
+
+    def close(self) -> None:
+        #Closes the replay file (the generator holds it open)
+        if self._records is not None:
+            self._records.close()
+            self._records = None
+
+
+def top_replays(level: str, limit: int = GHOSTS_MAX) -> List[Tuple[str, str, Tuple[int, int]]]:
+    #(path, name, spawn) of the best scores that have a replay on this level, fastest first
+    found = []
+    for score in load_scores():
+        path = score.get("replay")
+        if not path:
+            continue
+        try:
+            header, _ = read_header(path)
+        except (OSError, ValueError):
+            continue
+        if header.get("level") == level:
+            found.append((path, score["name"], tuple(header["spawn"])))
+        if len(found) == limit:
+            break
+    return found
+
+
+class GhostRace:
+    """
+    The ghosts of the current run. start(level) when a run starts,
+    update(run_s) every frame, draw(screen, camera, player) before the player.
+    """
+    def __init__(self) -> None:
+        self.ghosts: List[GhostStream] = []
+        #Translucent copies of the player's sprites, shared by every ghost, keyed by id of the sprite
+        self._sprites: Dict[int, pygame.Surface] = {}
+        #top_replays per level key, with the score file version it was read from
+        self._replays: Dict[str, Tuple[Tuple[int, int, int], List[Tuple[str, str, Tuple[int, int]]]]] = {}
+
+    def _top_replays(self, level: str) -> List[Tuple[str, str, Tuple[int, int]]]:
+        try:
+            st = os.stat(SCORES_FILE)
+            version = (st.st_mtime_ns, st.st_size, st.st_ino)
+        except OSError:
+            version = (0, 0, 0)
+        cached = self._replays.get(level)
+        if cached is None or cached[0] != version:
+            #A new score replaces the file (scores.save_scores), which changes its version
+            cached = self._replays[level] = (version, top_replays(level))
+        return cached[1]
+
+    def start(self, level: str, replays: Optional[Sequence[Tuple[str, str, Tuple[int, int]]]] = None) -> None:
+        self.stop()
+        for path, name, spawn in (self._top_replays(level) if replays is None else replays):
+            self.ghosts.append(GhostStream(path, name, spawn))
+
+    def stop(self) -> None:
+        for ghost in self.ghosts:
+            ghost.close()
+        self.ghosts = []
+
+    def update(self, run_s: float) -> None:
+        for ghost in self.ghosts:
+            ghost.advance(run_s)
+
+    def _ghost_sprite(self, sprite: pygame.Surface) -> pygame.Surface:
+        #The sprite with its alpha multiplied once, so a ghost costs one normal blit
+        ghost = self._sprites.get(id(sprite))
+        if ghost is None:
+            ghost = sprite.copy()
+            ghost.fill((255, 255, 255, GHOST_ALPHA), special_flags=pygame.BLEND_RGBA_MULT)
+            self._sprites[id(sprite)] = ghost
+        return ghost
+
+    def draw(self, screen: pygame.Surface, camera: Camera, player: Player) -> None:
+        if not self.ghosts:
+            return
+        w, h = player.rect.size
+        screen_rect = screen.get_rect()
+        blits = []
+        for ghost in self.ghosts:
+            sprite = self._ghost_sprite(player.sprite_for(ghost.mask, camera.zoom))
+            #Same feet alignment as Player.draw
+            sx, sy = camera.apply(ghost.x, ghost.y)
+            rect = sprite.get_rect(midbottom=(sx + camera.scale(w) // 2, sy + camera.scale(h + FEET_OFFSET_Y)))
+            if screen_rect.colliderect(rect):
+                blits.append((sprite, rect))
+        screen.blits(blits, doreturn=False)
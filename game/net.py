@@ -0,0 +1,555 @@
+"""
+LAN races: an authoritative UDP server (asyncio) and its client.
+
+The server owns the tower (generated from a seed) and every player's state. Players are
+simulated with the fixed-point physics (see fixedpoint.py), so the result doesn't depend
+on anyone's frame rate. Clients only send their input bitmask; the server answers with
+snapshots of the players near the client's camera view (interest management with a
+grid of cells, so a snapshot doesn't look at every player).
+
+Snapshots are delta-compressed: each input packet acknowledges the last snapshot the client
+received, and the next snapshot only contains what changed since that one (new players in
+full, moved players as 16-bit offsets, players that left the view as a list of ids).
+If the acknowledged snapshot is too old or lost, a full snapshot is sent.
+
+    python -m game.net serve --seed 7                          #a race server on NET_PORT
+    python -m game.net loadtest --clients 300 --seconds 10     #server + simulated clients on localhost
+"""
+import argparse
+import asyncio
+import multiprocessing as mp
+import random
+import socket
+import struct
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .fixedpoint import FixedPointBody, STEP_DT
+from .generator import TowerGenerator
+from .player import PlayerBody, INPUT_LEFT, INPUT_RIGHT, INPUT_JUMP
+from .settings import (
+    SCREEN_W, SCREEN_H, PLAYER_W, PLAYER_H,
+    NET_PORT, NET_SNAPSHOT_EVERY, NET_HISTORY, NET_TIMEOUT_S, NET_INTEREST_MARGIN, NET_CELL,
+)
+
+#Message types (first byte of every datagram)
+HELLO = 1
+INPUT = 2
+BYE = 3
+WELCOME = 10
+SNAPSHOT = 11
+#type, view width, view height (then the name in UTF-8)
+_HELLO = struct.Struct("<BHH")
+#type, input sequence number, input bitmask, last snapshot tick received
+_INPUT = struct.Struct("<BIBI")
+#type, player id, tower seed, world width, world height, server tick
+_WELCOME = struct.Struct("<BHIIII")
+#type, tick, baseline tick (0 = full snapshot), last input sequence applied, entries, removed ids
+_SNAPSHOT = struct.Struct("<BIIIHH")
+#Entry: player id and the bits saying which fields follow
+_ENTRY = struct.Struct("<HB")
+_FULL = struct.Struct("<iiB")
+_I16 = struct.Struct("<h")
+_U8 = struct.Struct("<B")
+_U16 = struct.Struct("<H")
+#Entry bits
+NEW = 1
+DX = 2
+DY = 4
+FLAGS = 8
+#Player flags
+FACING_RIGHT = 1
+ON_GROUND = 2
+MOVING = 4
+FINISHED = 8
+
+#A player in a snapshot: x, y, flags
+State = Tuple[int, int, int]
+
+
+def encode_snapshot(tick: int, base_tick: int, input_seq: int, base: Dict[int, State], current: Dict[int, State]) -> bytes:
+    """
+    current as a delta against base (base_tick 0 and an empty base = full snapshot).
+    """
+    parts = []
+    count = 0
+    for pid, (x, y, flags) in current.items():
+        old = base.get(pid)
+        if old is not None and abs(x - old[0]) < 32768 and abs(y - old[1]) < 32768:
+            bits = (DX if x != old[0] else 0) | (DY if y != old[1] else 0) | (FLAGS if flags != old[2] else 0)
+            if not bits:
+                continue
+            parts.append(_ENTRY.pack(pid, bits))
+            if bits & DX:
+                parts.append(_I16.pack(x - old[0]))
+            if bits & DY:
+                parts.append(_I16.pack(y - old[1]))
+            if bits & FLAGS:
+                parts.append(_U8.pack(flags))
+        else:
+            parts.append(_ENTRY.pack(pid, NEW))
+            parts.append(_FULL.pack(x, y, flags))
+        count += 1
+    removed = [pid for pid in base if pid not in current]
+    parts.extend(_U16.pack(pid) for pid in removed)
+    return _SNAPSHOT.pack(SNAPSHOT, tick, base_tick, input_seq, count, len(removed)) + b"".join(parts)
+
+
+def decode_snapshot(data: bytes, baselines: Dict[int, Dict[int, State]]) -> Optional[Tuple[int, int, Dict[int, State]]]:
+    """
+    Returns (tick, input sequence, players), or None if the baseline is not known (any more).
+    """
+    _, tick, base_tick, input_seq, count, removed = _SNAPSHOT.unpack_from(data)
+    if base_tick and base_tick not in baselines:
+        return None
+    players = dict(baselines[base_tick]) if base_tick else {}
+    pos = _SNAPSHOT.size
+    for _ in range(count):
+        pid, bits = _ENTRY.unpack_from(data, pos)
+        pos += _ENTRY.size
+        if bits & NEW:
+            players[pid] = _FULL.unpack_from(data, pos)
+            pos += _FULL.size
+            continue
+        x, y, flags = players[pid]
+        if bits & DX:
+            x += _I16.unpack_from(data, pos)[0]
+            pos += _I16.size
+        if bits & DY:
+            y += _I16.unpack_from(data, pos)[0]
+            pos += _I16.size
+        if bits & FLAGS:
+            flags = data[pos]
+            pos += 1
+        players[pid] = (x, y, flags)
+    for _ in range(removed):
+        players.pop(_U16.unpack_from(data, pos)[0], None)
+        pos += _U16.size
+    return tick, input_seq, players
+
+
+class _Peer:
+    #A connected player on the server
+    def __init__(self, pid: int, addr, name: str, view: Tuple[int, int], spawn: Tuple[int, int]) -> None:
+        self.id = pid
+        self.addr = addr
+        self.name = name
+        self.view = view
+        self.fixed = FixedPointBody(PlayerBody(*spawn))
+        self.mask = 0
+        self.input_seq = 0
+        self.acked = 0
+        self.last_seen = time.monotonic()
+        self.finish_tick: Optional[int] = None
+        #Snapshots sent and not too old to be a baseline: tick -> players
+        self.sent: Dict[int, Dict[int, State]] = {}
+
+
+class RaceServer(asyncio.DatagramProtocol):
+    """
+    Authoritative race server. Physics runs at FPS, a snapshot goes out every
+    NET_SNAPSHOT_EVERY steps. spread=True spawns players on random platforms (load tests).
+    """
+    def __init__(self, seed: int, world_w: int = SCREEN_W, world_h: int = SCREEN_H, spread: bool = False,
+                 snapshot_every: int = NET_SNAPSHOT_EVERY) -> None:
+        self.seed = seed
+        self.world_w, self.world_h = world_w, world_h
+        gen = TowerGenerator(seed, world_w, world_h)
+        self.platforms = gen.generate()
+        self.goal = gen.goal_rect
+        #Platforms by band of NET_CELL pixels of height, each band also holding the platforms of
+        #the bands around it: a player only collides with the band it is in (list order is kept)
+        self._bands: Dict[int, List] = {}
+        for p in self.platforms:
+            for band in range(p.rect.top // NET_CELL - 1, (p.rect.bottom - 1) // NET_CELL + 2):
+                self._bands.setdefault(band, []).append(p)
+        self.spread = spread
+        self.snapshot_every = snapshot_every
+        self._rng = random.Random(seed)
+        self.transport: Optional[asyncio.DatagramTransport] = None
+        self.peers: Dict[Tuple, _Peer] = {}
+        self._next_id = 1
+        self.tick = 0
+        #Statistics
+        self.tick_ms: List[float] = []
+        self.late_ticks = 0
+        self.bytes_in = self.bytes_out = 0
+        self.packets_in = self.packets_out = 0
+        self.full_snapshots = self.delta_snapshots = 0
+        self.visible_total = 0
+
+    def connection_made(self, transport) -> None:
+        self.transport = transport
+
+    def _spawn(self) -> Tuple[int, int]:
+        if self.spread:
+            p = self._rng.choice(self.platforms).rect
+            return self._rng.randint(p.left, max(p.left, p.right - PLAYER_W)), p.top - PLAYER_H
+        #Same spawn as a normal run
+        return 80, self.world_h - 140
+
+    def _new_id(self) -> Optional[int]:
+        #Next player id (1..65535, wrapping) not used by a connected player, None if all are
+        used = {peer.id for peer in self.peers.values()}
+        for _ in range(65535):
+            pid = self._next_id
+            self._next_id = self._next_id % 65535 + 1
+            if pid not in used:
+                return pid
+        return None
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        self.bytes_in += len(data)
+        self.packets_in += 1
+        if not data:
+            return
+        kind = data[0]
+        peer = self.peers.get(addr)
+        if kind == INPUT and peer is not None and len(data) >= _INPUT.size:
+            _, seq, mask, acked = _INPUT.unpack_from(data)
+            #Datagrams can arrive out of order, older inputs are ignored
+            if seq > peer.input_seq:
+                peer.input_seq, peer.mask = seq, mask
+                peer.acked = max(peer.acked, acked)
+            peer.last_seen = time.monotonic()
+        elif kind == HELLO and len(data) >= _HELLO.size:
+            if peer is None:
+                pid = self._new_id()
+                if pid is None:
+                    #Every id is taken by a connected player: no welcome, the client gives up
+                    return
+                _, view_w, view_h = _HELLO.unpack_from(data)
+                name = data[_HELLO.size:].decode("utf-8", "replace")[:16]
+                peer = _Peer(pid, addr, name, (view_w, view_h), self._spawn())
+                self.peers[addr] = peer
+            #Sent again for a repeated hello (the first welcome may have been lost)
+            self._send(_WELCOME.pack(WELCOME, peer.id, self.seed, self.world_w, self.world_h, self.tick), addr)
+        elif kind == BYE and peer is not None:
+            del self.peers[addr]
+
+    def _send(self, data: bytes, addr) -> None:
+        self.transport.sendto(data, addr)
+        self.bytes_out += len(data)
+        self.packets_out += 1
+
+    def step(self) -> None:
+        #One physics step of every player
+        self.tick += 1
+        for peer in self.peers.values():
+            if peer.finish_tick is not None:
+                continue
+            nearby = self._bands.get(peer.fixed.body.rect.y // NET_CELL, ())
+            peer.fixed.step(peer.mask, nearby, self.world_w)
+            if peer.fixed.body.rect.colliderect(self.goal):
+                peer.finish_tick = self.tick
+
+    def _state(self, peer: _Peer) -> State:
+        b = peer.fixed.body
+        flags = ((FACING_RIGHT if b.facing_right else 0) | (ON_GROUND if b.on_ground else 0)
+                 | (MOVING if peer.fixed.vx else 0) | (FINISHED if peer.finish_tick is not None else 0))
+        return b.rect.x, b.rect.y, flags
+
+    def broadcast(self) -> None:
+        """
+        Sends every peer the players inside its view (+ margin), as a delta against its last ack.
+        """
+        states: Dict[int, State] = {}
+        grid: Dict[Tuple[int, int], List[int]] = {}
+        for peer in self.peers.values():
+            state = states[peer.id] = self._state(peer)
+            grid.setdefault((state[0] // NET_CELL, state[1] // NET_CELL), []).append(peer.id)
+        oldest = self.tick - NET_HISTORY * self.snapshot_every
+        for peer in self.peers.values():
+            x, y, _ = states[peer.id]
+            half_w = peer.view[0] // 2 + NET_INTEREST_MARGIN
+            half_h = peer.view[1] // 2 + NET_INTEREST_MARGIN
+            left, right, top, bottom = x - half_w, x + half_w, y - half_h, y + half_h
+            visible: Dict[int, State] = {}
+            for cx in range(left // NET_CELL, right // NET_CELL + 1):
+                for cy in range(top // NET_CELL, bottom // NET_CELL + 1):
+                    for pid in grid.get((cx, cy), ()):
+                        sx, sy, _ = states[pid]
+                        if left <= sx <= right and top <= sy <= bottom:
+                            visible[pid] = states[pid]
+            base_tick = peer.acked if peer.acked in peer.sent else 0
+            base = peer.sent.get(base_tick, {})
+            if base_tick:
+                self.delta_snapshots += 1
+            else:
+                self.full_snapshots += 1
+            self.visible_total += len(visible)
+            self._send(encode_snapshot(self.tick, base_tick, peer.input_seq, base, visible), peer.addr)
+            peer.sent[self.tick] = visible
+            for t in [t for t in peer.sent if t <= oldest or t < peer.acked]:
+                del peer.sent[t]
+
+    def _drop_silent(self) -> None:
+        now = time.monotonic()
+        for addr in [a for a, p in self.peers.items() if now - p.last_seen > NET_TIMEOUT_S]:
+            del self.peers[addr]
+
+    async def serve(self, duration: Optional[float] = None) -> None:
+        """
+        Runs the fixed-step loop (forever, or for duration seconds).
+        """
+        loop = asyncio.get_running_loop()
+        start = next_t = loop.time()
+        while duration is None or loop.time() - start < duration:
+            next_t += STEP_DT
+            work_start = time.perf_counter()
+            self.step()
+            if self.tick % self.snapshot_every == 0:
+                self.broadcast()
+            if self.tick % 60 == 0:
+                self._drop_silent()
+            self.tick_ms.append((time.perf_counter() - work_start) * 1000.0)
+            delay = next_t - loop.time()
+            if delay < 0:
+                #Behind schedule: count it and don't try to catch up with a burst of ticks
+                self.late_ticks += 1
+                next_t = loop.time()
+            await asyncio.sleep(max(0.0, delay))
+
+    def stats(self) -> Dict:
+        ticks = sorted(self.tick_ms) or [0.0]
+        snapshots = self.full_snapshots + self.delta_snapshots
+        return {
+            "ticks": self.tick,
+            "tick_ms_p50": ticks[len(ticks) // 2],
+            "tick_ms_p99": ticks[min(len(ticks) - 1, int(len(ticks) * 0.99))],
+            "tick_ms_max": ticks[-1],
+            "late_ticks": self.late_ticks,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "packets_out": self.packets_out,
+            "snapshots": snapshots,
+            "delta_share": self.delta_snapshots / snapshots if snapshots else 0.0,
+            "avg_visible": self.visible_total / snapshots if snapshots else 0.0,
+        }
+
+
+async def start_server(server: RaceServer, host: str = "0.0.0.0", port: int = NET_PORT) -> asyncio.DatagramTransport:
+    loop = asyncio.get_running_loop()
+    transport, _ = await loop.create_datagram_endpoint(lambda: server, local_addr=(host, port))
+    return transport
+
+
+class SnapshotReceiver:
+    """
+    Client side of the protocol: handles WELCOME and SNAPSHOT datagrams and keeps the
+    last snapshots as baselines for the next deltas. players holds the newest state.
+    """
+    def __init__(self) -> None:
+        self.player_id: Optional[int] = None
+        self.world: Optional[Tuple[int, int, int]] = None
+        self.tick = 0
+        self.input_seq = 0
+        self.players: Dict[int, State] = {}
+        self._baselines: Dict[int, Dict[int, State]] = {}
+        self.snapshots = 0
+        self.missing_baselines = 0
+
+    def receive(self, data: bytes) -> bool:
+        #True when the datagram was a new snapshot
+        if data[0] == WELCOME:
+            _, self.player_id, seed, w, h, _ = _WELCOME.unpack_from(data)
+            self.world = (seed, w, h)
+            return False
+        if data[0] != SNAPSHOT:
+            return False
+        decoded = decode_snapshot(data, self._baselines)
+        if decoded is None:
+            self.missing_baselines += 1
+            return False
+        tick, input_seq, players = decoded
+        self._baselines[tick] = players
+        if len(self._baselines) > NET_HISTORY:
+            del self._baselines[min(self._baselines)]
+        self.snapshots += 1
+        if tick > self.tick:
+            self.tick, self.input_seq, self.players = tick, input_seq, players
+        return True
+
+
+class RaceClient(SnapshotReceiver):
+    """
+    Non-blocking client for a game loop: send_input(mask) and poll() once per frame.
+    """
+    def __init__(self, host: str, port: int = NET_PORT, name: str = "player",
+                 view: Tuple[int, int] = (SCREEN_W, SCREEN_H)) -> None:
+        super().__init__()
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setblocking(False)
+        self.sock.connect((host, port))
+        self._hello = _HELLO.pack(HELLO, *view) + name.encode("utf-8")[:16]
+        self._seq = 0
+        self.sock.send(self._hello)
+
+    def send_input(self, mask: int) -> None:
+        if self.player_id is None:
+            #Still waiting for the welcome
+            self.sock.send(self._hello)
+            return
+        self._seq += 1
+        self.sock.send(_INPUT.pack(INPUT, self._seq, mask, self.tick))
+
+    def poll(self) -> bool:
+        #Reads every waiting datagram, True if a new snapshot arrived
+        new = False
+        while True:
+            try:
+                data = self.sock.recv(65536)
+            except (BlockingIOError, ConnectionRefusedError):
+                return new
+            new = self.receive(data) or new
+
+    def close(self) -> None:
+        try:
+            self.sock.send(_U8.pack(BYE))
+        except OSError:
+            pass
+        self.sock.close()
+
+
+class _Bot(asyncio.DatagramProtocol, SnapshotReceiver):
+    #A simulated client of the load test: random inputs at the snapshot rate, measures what it receives
+    def __init__(self, rng: random.Random) -> None:
+        SnapshotReceiver.__init__(self)
+        self.rng = rng
+        self.transport = None
+        self.seq = 0
+        self.mask = 0
+        self.bytes_in = 0
+        self.sent_at: Dict[int, float] = {}
+        self.latencies: List[float] = []
+        self._seen_seq = 0
+
+    def connection_made(self, transport) -> None:
+        self.transport = transport
+        transport.sendto(_HELLO.pack(HELLO, SCREEN_W, SCREEN_H) + b"bot")
+
+    def _new_id(self) -> Optional[int]:
+        #Next player id (1..65535, wrapping) not used by a connected player, None if all are
+        used = {peer.id for peer in self.peers.values()}
+        for _ in range(65535):
+            pid = self._next_id
+            self._next_id = self._next_id % 65535 + 1
+            if pid not in used:
+                return pid
+        return None
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        self.bytes_in += len(data)
+        if self.receive(data) and self.input_seq > self._seen_seq:
+            #First snapshot that includes this input: input -> simulated -> back on the client
+            sent = self.sent_at.pop(self.input_seq, None)
+            if sent is not None:
+                self.latencies.append((time.perf_counter() - sent) * 1000.0)
+            self._seen_seq = self.input_seq
+
+    def send_input(self) -> None:
+        if self.player_id is None:
+            self.transport.sendto(_HELLO.pack(HELLO, SCREEN_W, SCREEN_H) + b"bot")
+            return
+        if self.rng.random() < 0.1:
+            self.mask = self.rng.choice((0, INPUT_LEFT, INPUT_RIGHT, INPUT_LEFT | INPUT_JUMP, INPUT_RIGHT | INPUT_JUMP))
+        self.seq += 1
+        self.sent_at[self.seq] = time.perf_counter()
+        if len(self.sent_at) > 256:
+            del self.sent_at[min(self.sent_at)]
+        self.transport.sendto(_INPUT.pack(INPUT, self.seq, self.mask, self.tick))
+
+
+async def _run_bots(host: str, port: int, n: int, seconds: float) -> Dict:
+    loop = asyncio.get_running_loop()
+    bots: List[_Bot] = []
+    for i in range(n):
+        bot = _Bot(random.Random(i))
+        await loop.create_datagram_endpoint(lambda bot=bot: bot, remote_addr=(host, port))
+        bots.append(bot)
+    interval = STEP_DT * NET_SNAPSHOT_EVERY
+    start = loop.time()
+    while loop.time() - start < seconds:
+        for bot in bots:
+            bot.send_input()
+        await asyncio.sleep(interval)
+    for bot in bots:
+        bot.transport.sendto(_U8.pack(BYE))
+        bot.transport.close()
+    latencies = sorted(ms for bot in bots for ms in bot.latencies) or [0.0]
+    return {
+        "connected": sum(bot.player_id is not None for bot in bots),
+        "bytes_in": sum(bot.bytes_in for bot in bots),
+        "snapshots": sum(bot.snapshots for bot in bots),
+        "missing_baselines": sum(bot.missing_baselines for bot in bots),
+        "latency_ms_p50": latencies[len(latencies) // 2],
+        "latency_ms_p99": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+    }
+
+
+def _serve_process(seed: int, port: int, height: int, seconds: float, conn) -> None:
+    #Server side of the load test, in its own process; sends its statistics back at the end
+    async def main() -> Dict:
+        server = RaceServer(seed, SCREEN_W, height, spread=True)
+        transport = await start_server(server, "127.0.0.1", port)
+        conn.send("ready")
+        await server.serve(seconds)
+        transport.close()
+        return server.stats()
+    conn.send(asyncio.run(main()))
+
+
+def load_test(clients: int, seconds: float, port: int = NET_PORT, seed: int = 1, height: int = SCREEN_H * 20) -> Dict:
+    """
+    Runs a server process and `clients` simulated clients on localhost for `seconds`.
+    The tower is `height` pixels high so players are spread out and interest management matters.
+    """
+    parent, child = mp.Pipe()
+    proc = mp.Process(target=_serve_process, args=(seed, port, height, seconds + 1.0, child), daemon=True)
+    proc.start()
+    parent.recv()
+    bots = asyncio.run(_run_bots("127.0.0.1", port, clients, seconds))
+    server = parent.recv()
+    proc.join()
+    return {"clients": clients, "seconds": seconds, "server": server, "clients_side": bots}
+
+
+def _print_load_test(r: Dict) -> None:
+    s, c, secs = r["server"], r["clients_side"], r["seconds"]
+    print(f"{r['clients']} clients ({c['connected']} connected), {secs:.0f} s, {s['ticks']} ticks")
+    print(f"server tick  p50 {s['tick_ms_p50']:.2f} ms  p99 {s['tick_ms_p99']:.2f} ms  max {s['tick_ms_max']:.2f} ms"
+          f"  late {s['late_ticks']}")
+    print(f"bandwidth    out {s['bytes_out'] / secs / 1024:.1f} KB/s ({s['bytes_out'] / secs / max(1, r['clients']):.0f} B/s per client)"
+          f"  in {s['bytes_in'] / secs / 1024:.1f} KB/s")
+    print(f"snapshots    {s['snapshots']} sent, {s['bytes_out'] / max(1, s['packets_out']):.0f} B avg,"
+          f" {s['delta_share'] * 100:.0f}% deltas, {s['avg_visible']:.1f} players visible on average")
+    print(f"input -> snapshot  p50 {c['latency_ms_p50']:.1f} ms  p99 {c['latency_ms_p99']:.1f} ms"
+          f"  (baseline misses {c['missing_baselines']})")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="LAN race server and load test.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    serve = sub.add_parser("serve", help="run a race server")
+    serve.add_argument("--seed", type=int, default=1)
+    serve.add_argument("--port", type=int, default=NET_PORT)
+    serve.add_argument("--height", type=int, default=SCREEN_H, help="world height of the tower")
+    test = sub.add_parser("loadtest", help="server + simulated clients on localhost")
+    test.add_argument("--clients", type=int, default=200)
+    test.add_argument("--seconds", type=float, default=10.0)
+    test.add_argument("--port", type=int, default=NET_PORT)
+    test.add_argument("--height", type=int, default=SCREEN_H * 20)
+    args = parser.parse_args()
+    if args.cmd == "serve":
+        async def run() -> None:
+            server = RaceServer(args.seed, SCREEN_W, args.height)
+            await start_server(server, port=args.port)
+            print(f"race server on port {args.port}, tower seed {args.seed}")
+            await server.serve()
+        asyncio.run(run())
+    else:
+        _print_load_test(load_test(args.clients, args.seconds, args.port, height=args.height))
+
+
+if __name__ == "__main__":
+    main()
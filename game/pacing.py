@@ -0,0 +1,211 @@
+"""
+Frame pacing for the game loop.
+
+Strategies (TOWER_PACING environment variable, F7 switches between sleep and hybrid in game):
+- "sleep":  clock.tick, the OS sleep has about 1 ms granularity so frame intervals wobble
+- "hybrid": clock.tick_busy_loop, sleeps most of the wait then spins to the exact deadline
+- "vsync":  the window is opened with vsync and flip() waits for the display refresh,
+            falls back to hybrid when the driver can't do vsync (or silently ignores it:
+            a few flips are timed after opening the window)
+
+Input is latched as late as possible, right before the physics step (latch_input),
+and the pacer records frame-interval jitter and an estimate of the input-to-display latency
+so the strategies can be compared on real hardware:
+    python -m game.pacing
+"""
+import argparse
+import math
+import os
+import statistics
+import time
+from array import array
+from typing import Dict, List, Sequence, Tuple
+
+import pygame
+
+from .settings import FPS, PACING_RING, VSYNC_PROBE_FLIPS, VSYNC_MIN_FLIP_MS
+
+STRATEGIES = ("sleep", "hybrid", "vsync")
+
+
+class FramePacer:
+    """
+    Usage per frame: dt = wait(), ..., keys = latch_input(), physics, draw, flip, presented().
+    """
+    def __init__(self, clock: pygame.time.Clock, strategy: str = "sleep", fps: int = FPS,
+                 size: int = PACING_RING) -> None:
+        if strategy not in STRATEGIES:
+            raise ValueError(f"unknown pacing strategy: {strategy}")
+        self.clock = clock
+        self.strategy = strategy
+        self.fps = fps
+        self.size = size
+        #Ring buffers in nanoseconds: time between two wait() returns, and latch -> flip done
+        self.intervals = array("q", [0]) * size
+        self.latencies = array("q", [0]) * size
+        self.count = 0
+        self.latency_count = 0
+        self._last_wake_ns = 0
+        self._latch_ns = 0
+
+    def open_window(self, size: Tuple[int, int]) -> pygame.Surface:
+        """
+        Opens the game window, with vsync if that strategy is selected and available.
+        """
+        if self.strategy == "vsync":
+            try:
+                window = pygame.display.set_mode(size, vsync=1)
+            except pygame.error:
+                window = None
+            if window is not None and self._flips_wait():
+                return window
+            self.strategy = "hybrid"
+        return pygame.display.set_mode(size)
+
+    @staticmethod
+    def _flips_wait() -> bool:
+        #SDL may give a window without vsync and no error: then flip() returns at once
+        #and the loop would run uncapped
+        pygame.display.flip()
+        start = time.perf_counter()
+        for _ in range(VSYNC_PROBE_FLIPS):
+            pygame.display.flip()
+        mean_ms = (time.perf_counter() - start) * 1000.0 / VSYNC_PROBE_FLIPS
+        return mean_ms >= VSYNC_MIN_FLIP_MS
+
+    def cycle(self) -> None:
+        #vsync is chosen when the window is opened, so only sleep and hybrid switch at runtime
+        if self.strategy != "vsync":
+            self.strategy = "hybrid" if self.strategy == "sleep" else "sleep"
+            self.reset_stats()
+
+    def reset_stats(self) -> None:
+        self.count = self.latency_count = 0
+        self.resume()
+
+    def resume(self) -> None:
+        #After a menu screen: the time spent there is not a frame interval (nor a dt)
+        self._last_wake_ns = self._latch_ns = 0
+        self.clock.tick()
+
+    def wait(self) -> float:
+        """
+        Waits for the start of the next frame and returns dt in seconds.
+        """
+        if self.strategy == "sleep":
+            ms = self.clock.tick(self.fps)
+        elif self.strategy == "hybrid":
+            ms = self.clock.tick_busy_loop(self.fps)
+        else:
+            #flip() already waited for the refresh
+            ms = self.clock.tick()
+        now = time.perf_counter_ns()
+        #dt is measured in nanoseconds, the clock only gives whole milliseconds
+        dt = ms / 1000.0
+        if self._last_wake_ns:
+            interval = now - self._last_wake_ns
+            self.intervals[self.count % self.size] = interval
+            self.count += 1
+            dt = interval / 1e9
+        self._last_wake_ns = now
+        return dt
+
+    def time_left(self) -> float:
+        #Seconds until the next frame should start (0 right after resume)
+        if not self._last_wake_ns:
+            return 0.0
+        return max(0.0, 1.0 / self.fps - (time.perf_counter_ns() - self._last_wake_ns) / 1e9)
+
+    def latch_input(self) -> Sequence[bool]:
+        """
+        Reads the keyboard right before the simulation uses it.
+        """
+        pygame.event.pump()
+        self._latch_ns = time.perf_counter_ns()
+        return pygame.key.get_pressed()
+
+    def presented(self) -> None:
+        #Call after display.flip(): the latched input is now on screen
+        if self._latch_ns:
+            self.latencies[self.latency_count % self.size] = time.perf_counter_ns() - self._latch_ns
+            self.latency_count += 1
+            self._latch_ns = 0
+
+    @staticmethod
+    def _recent(column: array, count: int, size: int) -> List[int]:
+        return list(column[:min(count, size)])
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Frame interval mean / standard deviation / p99 deviation from the target, and
+        input latency (latch -> flip, plus half an interval: on average a key press
+        waits that long before it is latched). All in milliseconds.
+        """
+        intervals = [v / 1e6 for v in self._recent(self.intervals, self.count, self.size)]
+        latencies = [v / 1e6 for v in self._recent(self.latencies, self.latency_count, self.size)]
+        if not intervals:
+            return {"frames": 0}
+        mean = statistics.fmean(intervals)
+        target = mean if self.strategy == "vsync" else 1000.0 / self.fps
+        deviations = sorted(abs(v - target) for v in intervals)
+        p99 = deviations[max(0, math.ceil(0.99 * len(deviations)) - 1)]
+        latch_to_flip = statistics.fmean(latencies) if latencies else 0.0
+        return {
+            "frames": len(intervals),
+            "interval_mean_ms": mean,
+            "interval_stdev_ms": statistics.pstdev(intervals),
+            "jitter_p99_ms": p99,
+            "interval_max_ms": max(intervals),
+            "input_latency_ms": latch_to_flip + mean / 2.0,
+        }
+
+    def overlay_lines(self) -> List[str]:
+        s = self.stats()
+        if not s["frames"]:
+            return [f"PACING {self.strategy.upper()}"]
+        return [
+            f"PACING {self.strategy.upper()} {s['interval_mean_ms']:.2f}+-{s['interval_stdev_ms']:.2f}ms",
+            f"JITTER P99 {s['jitter_p99_ms']:.2f}ms  INPUT {s['input_latency_ms']:.1f}ms",
+        ]
+
+
+def compare_strategies(frames: int, work_ms: float) -> Dict[str, Dict[str, float]]:
+    """
+    Runs a loop with a fake frame workload (busy work_ms) under every strategy.
+    """
+    results = {}
+    for strategy in STRATEGIES:
+        pygame.display.quit()
+        pygame.display.init()
+        pacer = FramePacer(pygame.time.Clock(), strategy)
+        pacer.open_window((320, 180))
+        for _ in range(frames):
+            pacer.wait()
+            pacer.latch_input()
+            end = time.perf_counter() + work_ms / 1000.0
+            while time.perf_counter() < end:
+                pass
+            pygame.display.flip()
+            pacer.presented()
+        results[f"{strategy}->{pacer.strategy}" if pacer.strategy != strategy else strategy] = pacer.stats()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare frame pacing strategies on this machine.")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--work-ms", type=float, default=4.0, help="simulated work per frame")
+    parser.add_argument("--headless", action="store_true", help="use the SDL dummy video driver")
+    args = parser.parse_args()
+    if args.headless:
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+    pygame.init()
+    print(f"{'strategy':<14}{'mean':>8}{'stdev':>8}{'p99 jit':>9}{'max':>8}{'input':>8}   (ms)")
+    for name, s in compare_strategies(args.frames, args.work_ms).items():
+        print(f"{name:<14}{s['interval_mean_ms']:>8.2f}{s['interval_stdev_ms']:>8.2f}"
+              f"{s['jitter_p99_ms']:>9.2f}{s['interval_max_ms']:>8.2f}{s['input_latency_ms']:>8.2f}")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Offscreen pixel observations for vision-based bots.
+
+PixelRenderer draws the camera view at a small resolution (160x90 by default) into a
+surface created with pygame.image.frombuffer on top of a NumPy array. The surface and the
+array share the same memory, so after render() the array already holds the frame:
+no copy, no surfarray lock to release, and nothing is allocated per frame.
+With grayscale=True, pygame.transform.grayscale writes into a second shared buffer
+and the returned array is a (h, w) view on one of its channels.
+"""
+import os
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+import pygame
+
+from .camera import Camera
+from .platform import Platform
+from .settings import (
+    ASSETS_DIR, BACKGROUND_FILE, PLATFORM_FILL,
+    PIXEL_OBS_SIZE,
+)
+
+PLAYER_COLOR = (220, 40, 40)
+GOAL_COLOR = (0, 255, 90)
+
+
+class PixelRenderer:
+    """
+    Renders the view of a Camera (world sized view_w x view_h) into a w x h array.
+    The array returned by render() is the same object every time, overwritten by each call.
+    """
+    def __init__(self, world_w: int, world_h: int, view_w: int, view_h: int,
+                 size: Tuple[int, int] = PIXEL_OBS_SIZE, grayscale: bool = False,
+                 background: Optional[str] = os.path.join(ASSETS_DIR, BACKGROUND_FILE)) -> None:
+        self.w, self.h = size
+        self.grayscale = grayscale
+        self.camera = Camera(view_w, view_h, world_w, world_h)
+        self.camera.zoom = self.w / view_w
+        #Frame buffer: rows first, so the array reads like an image (h, w, 3)
+        self._rgb = np.zeros((self.h, self.w, 3), dtype=np.uint8)
+        self.surface = pygame.image.frombuffer(self._rgb, size, "RGB")
+        if grayscale:
+            self._gray = np.zeros((self.h, self.w, 3), dtype=np.uint8)
+            self._gray_surface = pygame.image.frombuffer(self._gray, size, "RGB")
+            self.array = self._gray[:, :, 0]
+        else:
+            self.array = self._rgb
+        #The whole background scaled once to the observation scale
+        self.background: Optional[pygame.Surface] = None
+        if background and os.path.exists(background):
+            img = pygame.image.load(background)
+            scaled = (max(1, round(img.get_width() * self.camera.zoom)), max(1, round(img.get_height() * self.camera.zoom)))
+            self.background = pygame.transform.smoothscale(img, scaled)
+        self._rect = pygame.Rect(0, 0, 0, 0)
+
+    def _fill_world_rect(self, rect: pygame.Rect, color: Tuple[int, int, int]) -> None:
+        #Fills a world rectangle (at least one pixel so small things don't vanish)
+        cam = self.camera
+        self._rect.topleft = cam.apply(rect.x, rect.y)
+        self._rect.size = (max(1, cam.scale(rect.w)), max(1, cam.scale(rect.h)))
+        self.surface.fill(color, self._rect)
+
+    def render(self, player_rect: pygame.Rect, platforms: Iterable[Platform], goal_rect: pygame.Rect) -> np.ndarray:
+        """
+        Draws the view centered on the player (same camera rule as the game) and returns the array.
+        """
+        cam = self.camera
+        cam.follow(player_rect.centerx, player_rect.centery)
+        if self.background is not None:
+            self.surface.blit(self.background, (-int(cam.offset_x * cam.zoom), -int(cam.offset_y * cam.zoom)))
+        else:
+            self.surface.fill((10, 10, 25))
+        view = pygame.Rect(int(cam.offset_x), int(cam.offset_y), cam.screen_w + 1, cam.screen_h + 1)
+        for p in platforms:
+            if view.colliderect(p.rect):
+                self._fill_world_rect(p.rect, PLATFORM_FILL)
+        self._fill_world_rect(goal_rect, GOAL_COLOR)
+        self._fill_world_rect(player_rect, PLAYER_COLOR)
+        if self.grayscale:
+            pygame.transform.grayscale(self.surface, self._gray_surface)
+        return self.array
@@ -1,8 +1,12 @@
 import pygame
+from typing import Dict, Iterable, List, Tuple
 #Used to convert world coordinates to screen coordinates
 from .camera import Camera
 #Colors defined globally in settings
-from .settings import PLATFORM_FILL, PLATFORM_OUTLINE
+from .settings import PLATFORM_FILL, PLATFORM_OUTLINE, PLATFORM_SPRITE_CACHE_MAX
+
+#Transparent color of the platform sprites (the rounded corners), never used by the platforms themselves
+SPRITE_COLORKEY = (255, 0, 255)
 
 #this class will represent a static surface that the player can stand on
 class Platform:
@@ -24,20 +28,76 @@ class Platform:
         """
         #Convert world position -> screen position
         x, y = camera.apply(self.rect.x, self.rect.y)
+        #Size on screen (smaller when the game renders at a lower internal resolution)
+        w, h = camera.scale(self.rect.w), camera.scale(self.rect.h)
         #Border radius makes the platform slightly rounded instead of sharp corners
-        radius = max(2, self.rect.h // 2)
+        radius = max(2, h // 2)
         #This will draw the inside filled rectangle (mainly body of the platform)
         pygame.draw.rect(
             screen,
             PLATFORM_FILL,
-            pygame.Rect(x, y, self.rect.w, self.rect.h),
+            pygame.Rect(x, y, w, h),
             border_radius=radius,
         )
         #This will draw the outline of the platform
         pygame.draw.rect(
             screen,
             PLATFORM_OUTLINE,
-            pygame.Rect(x, y, self.rect.w, self.rect.h),
-            2,
+            pygame.Rect(x, y, w, h),
+            max(1, camera.scale(2)),
             border_radius=radius,
-        )
\ No newline at end of file
+        )
+
+
+#Pre-rendered platform images, keyed by their size on screen and outline width (w, h, outline)
+_sprite_cache: Dict[Tuple[int, int, int], pygame.Surface] = {}
+
+
+def _render_sprite(w: int, h: int, outline: int) -> pygame.Surface:
+    #Same drawing as Platform.draw, but done once on a small surface with transparent corners
+    surf = pygame.Surface((w, h))
+    if pygame.display.get_surface() is not None:
+        surf = surf.convert()
+    surf.fill(SPRITE_COLORKEY)
+    radius = max(2, h // 2)
+    pygame.draw.rect(surf, PLATFORM_FILL, pygame.Rect(0, 0, w, h), border_radius=radius)
+    pygame.draw.rect(surf, PLATFORM_OUTLINE, pygame.Rect(0, 0, w, h), outline, border_radius=radius)
+    surf.set_colorkey(SPRITE_COLORKEY, pygame.RLEACCEL)
+    return surf
+
+
+def platform_sprite(w: int, h: int, outline: int = 2) -> pygame.Surface:
+    """
+    Returns the cached sprite for a platform of this size on screen.
+    Most platforms share a few sizes (the editor steps width by 20 and height by 4),
+    so the cache stays small. It is emptied if it ever grows past the limit.
+    The outline width is part of the key, it changes with the zoom.
+    """
+    key = (w, h, outline)
+    surf = _sprite_cache.get(key)
+    if surf is None:
+        if len(_sprite_cache) >= PLATFORM_SPRITE_CACHE_MAX:
+            _sprite_cache.clear()
+        surf = _render_sprite(w, h, outline)
+        _sprite_cache[key] = surf
+    return surf
+
+
+def visible_platforms(platforms: Iterable[Platform], camera: Camera) -> List[Platform]:
+    #Platforms intersecting the camera view (in world coordinates)
+    view = pygame.Rect(int(camera.offset_x), int(camera.offset_y), camera.screen_w + 1, camera.screen_h + 1)
+    return [p for p in platforms if view.colliderect(p.rect)]
+
+
+def draw_platforms(screen: pygame.Surface, camera: Camera, platforms: Iterable[Platform]) -> int:
+    """
+    Draws all visible platforms with a single Surface.blits call using the cached sprites.
+    Returns how many platforms were drawn.
+    """
+    outline = max(1, camera.scale(2))
+    batch = []
+    for p in visible_platforms(platforms, camera):
+        sprite = platform_sprite(camera.scale(p.rect.w), camera.scale(p.rect.h), outline)
+        batch.append((sprite, camera.apply(p.rect.x, p.rect.y)))
+    screen.blits(batch, doreturn=False)
+    return len(batch)
@@ -1,6 +1,6 @@
 import os
 import pygame
-from typing import List
+from typing import Dict, List, Tuple
 #Used for the collision detection
 from .platform import Platform
 #USed for the world gameplay (screen transformation)
@@ -9,6 +9,7 @@ from .utils import safe_load_image, scale_to_target_height
 from .settings import (
     ASSETS_DIR,
     PLAYER_W, PLAYER_H,
+    PLAYER_SPEED, PLAYER_JUMP_STRENGTH, PLAYER_GRAVITY,
     SPRITE_TARGET_H,
     FEET_OFFSET_Y,
     CHAR_STILL_FILE,
@@ -16,15 +17,33 @@ from .settings import (
     CHAR_RUN_LEFT_FILE,
 )
 
-#This class is the player that we will control
-class Player:
+#Input bits used when the player is driven without a keyboard (generator, bots, replays)
+INPUT_LEFT = 1
+INPUT_RIGHT = 2
+INPUT_JUMP = 4
+
+#Converts the pygame key state into an input bitmask
+def input_mask(keys) -> int:
+    mask = 0
+    #Left key or A
+    if keys[pygame.K_a] or keys[pygame.K_LEFT]:
+        mask |= INPUT_LEFT
+    #Right key or D
+    if keys[pygame.K_d] or keys[pygame.K_RIGHT]:
+        mask |= INPUT_RIGHT
+    #SPACE, W or up
+    if keys[pygame.K_SPACE] or keys[pygame.K_w] or keys[pygame.K_UP]:
+        mask |= INPUT_JUMP
+    return mask
+
+#Physics part of the player, it has no sprites so it can run without a window
+class PlayerBody:
     """
-    The Player class handles:
+    The PlayerBody class handles:
     - Movement (left/right)
     - Jumping physics
     - Gravity
     - Collision detection with platforms
-    - Sprite selection and rendering
     """
     def __init__(self, x: int, y: int):
         #player collision rectangle used for physics and collisions
@@ -32,30 +51,13 @@ class Player:
         #Physics variables
         self.vx = 0.0 #horizontal
         self.vy = 0.0 #vertical
-        self.speed = 260.0
-        self.jump_strength = 650.0
-        self.gravity = 1400.0
+        self.speed = PLAYER_SPEED
+        self.jump_strength = PLAYER_JUMP_STRENGTH
+        self.gravity = PLAYER_GRAVITY
         self.on_ground = False #Prevent double jumping
         #Direction tracking
         self.facing_right = True
-        #Build the file paths for our character we created 
-        still_path = os.path.join(ASSETS_DIR, CHAR_STILL_FILE)
-        run_r_path = os.path.join(ASSETS_DIR, CHAR_RUN_RIGHT_FILE)
-        run_l_path = os.path.join(ASSETS_DIR, CHAR_RUN_LEFT_FILE)
-        #Load the images
-        still = safe_load_image(still_path, convert_alpha=True)
-        run_r = safe_load_image(run_r_path, convert_alpha=True)
-        run_l = safe_load_image(run_l_path, convert_alpha=True)
-        #if any character sprites are missing then we stop the execution of the pygame
-        if still is None or run_r is None or run_l is None:
-            raise FileNotFoundError(
-                "Missing character sprites in assets."
-                "Check CHAR_STILL_FILE, CHAR_RUN_RIGHT_FILE, CHAR_RUN_LEFT_FILE.")
-        #Scale the sprites proportionally
-        self.sprite_idle = scale_to_target_height(still, SPRITE_TARGET_H)
-        self.sprite_run_r = scale_to_target_height(run_r, SPRITE_TARGET_H)
-        self.sprite_run_l = scale_to_target_height(run_l, SPRITE_TARGET_H)
-        
+
     #Resets the player position and physics values, we use this when we want to restart the run/climb
     def reset(self, x: int, y: int) -> None:
         self.rect.topleft = (x, y)
@@ -63,55 +65,47 @@ class Player:
         self.vy = 0.0
         self.on_ground = False
         self.facing_right = True
-        
+
     #Handles horizonatl mouvement inputs 
     #WAD mouvement, up left right keys or SPACE
     def handle_input(self, keys) -> None:
+        self.steer(input_mask(keys))
+
+    #Same as handle_input but reads an input bitmask
+    def steer(self, mask: int) -> None:
         self.vx = 0.0 
-        #Left key or A
-        if keys[pygame.K_a] or keys[pygame.K_LEFT]:
+        if mask & INPUT_LEFT:
             self.vx = -self.speed
             self.facing_right = False
-        #Right key or D
-        if keys[pygame.K_d] or keys[pygame.K_RIGHT]:
+        if mask & INPUT_RIGHT:
             self.vx = self.speed
             self.facing_right = True
-            
+
     #Allowing jumping with SPACE, W and up
     #+ prevent double jumping
     def try_jump(self, keys) -> None:
-        if (keys[pygame.K_SPACE] or keys[pygame.K_w] or keys[pygame.K_UP]) and self.on_ground:
+        self.jump(input_mask(keys))
+
+    #Same as try_jump but reads an input bitmask
+    def jump(self, mask: int) -> None:
+        if mask & INPUT_JUMP and self.on_ground:
             self.vy = -self.jump_strength
             self.on_ground = False
-            
+
     #prevent the player from mouving outside from the horizontal world bounds and fall 
     def clamp_to_world_x(self, world_w: int) -> None:
         if self.rect.left < 0:
             self.rect.left = 0
         if self.rect.right > world_w:
             self.rect.right = world_w
-            
-    #Chooses which sprite to display depending on movement direction
-    def _pick_sprite(self) -> pygame.Surface:
-        moving = abs(self.vx) > 1e-3
-        if not moving:
-            return self.sprite_idle
-        if self.vx < -1e-3:
-            return self.sprite_run_l
-        if self.vx > 1e-3:
-            return self.sprite_run_r
-        return self.sprite_run_r if self.facing_right else self.sprite_run_l
-        
-    #Draws the player sprite using the camera transformation
-    def draw(self, screen: pygame.Surface, camera: Camera) -> None:
-        sprite = self._pick_sprite()
-        #Convert world position into a screen position
-        sx, sy = camera.apply(self.rect.x, self.rect.y)
-        #Akign sprite so its feet will match with the collision rectangle
-        sprite_rect = sprite.get_rect()
-        sprite_rect.midbottom = (sx + self.rect.w // 2, sy + self.rect.h + FEET_OFFSET_Y)
-        screen.blit(sprite, sprite_rect)
-        
+
+    #One full physics update in the same order as the game loop uses
+    def step(self, mask: int, dt: float, platforms: List[Platform], world_w: int) -> None:
+        self.steer(mask)
+        self.jump(mask)
+        self.move_and_collide(dt, platforms)
+        self.clamp_to_world_x(world_w)
+
     #Applies gravity, updates position, and handles collision detection separately for X and Y axes.
     def move_and_collide(self, dt: float, platforms: List[Platform]) -> None:
         #apply gravity to the vertical velocity
@@ -141,4 +135,75 @@ class Player:
                 elif self.vy < 0:
                     #jumping and you hit the bottom of the platform 
                     self.rect.top = p.rect.bottom
-                    self.vy = 0.0
\ No newline at end of file
+                    self.vy = 0.0
+
+#This class is the player that we will control
+class Player(PlayerBody):
+    """
+    The Player class adds the sprites on top of PlayerBody:
+    - Sprite loading and scaling
+    - Sprite selection and rendering
+    """
+    def __init__(self, x: int, y: int):
+        super().__init__(x, y)
+        #Build the file paths for our character we created 
+        still_path = os.path.join(ASSETS_DIR, CHAR_STILL_FILE)
+        run_r_path = os.path.join(ASSETS_DIR, CHAR_RUN_RIGHT_FILE)
+        run_l_path = os.path.join(ASSETS_DIR, CHAR_RUN_LEFT_FILE)
+        #Load the images
+        still = safe_load_image(still_path, convert_alpha=True)
+        run_r = safe_load_image(run_r_path, convert_alpha=True)
+        run_l = safe_load_image(run_l_path, convert_alpha=True)
+        #if any character sprites are missing then we stop the execution of the pygame
+        if still is None or run_r is None or run_l is None:
+            raise FileNotFoundError(
+                "Missing character sprites in assets."
+                "Check CHAR_STILL_FILE, CHAR_RUN_RIGHT_FILE, CHAR_RUN_LEFT_FILE.")
+        #Scale the sprites proportionally
+        self.sprite_idle = scale_to_target_height(still, SPRITE_TARGET_H)
+        self.sprite_run_r = scale_to_target_height(run_r, SPRITE_TARGET_H)
+        self.sprite_run_l = scale_to_target_height(run_l, SPRITE_TARGET_H)
+        #Copies of the sprites for lower render scales, keyed by (sprite, zoom)
+        self._zoomed: Dict[Tuple[int, float], pygame.Surface] = {}
+        
+    #Chooses which sprite to display depending on movement direction
+    def _pick_sprite(self) -> pygame.Surface:
+        moving = abs(self.vx) > 1e-3
+        if not moving:
+            return self.sprite_idle
+        if self.vx < -1e-3:
+            return self.sprite_run_l
+        if self.vx > 1e-3:
+            return self.sprite_run_r
+        return self.sprite_run_r if self.facing_right else self.sprite_run_l
+        
+    #Draws the player sprite using the camera transformation
+    def draw(self, screen: pygame.Surface, camera: Camera) -> None:
+        sprite = self._pick_sprite()
+        if camera.zoom != 1.0:
+            sprite = self._zoom_sprite(sprite, camera.zoom)
+        #Convert world position into a screen position
+        sx, sy = camera.apply(self.rect.x, self.rect.y)
+        #Akign sprite so its feet will match with the collision rectangle
+        sprite_rect = sprite.get_rect()
+        sprite_rect.midbottom = (sx + camera.scale(self.rect.w) // 2, sy + camera.scale(self.rect.h + FEET_OFFSET_Y))
+        screen.blit(sprite, sprite_rect)
+
+    #Sprite for an input bitmask at a render scale (used to draw ghosts, see ghosts.py)
+    def sprite_for(self, mask: int, zoom: float) -> pygame.Surface:
+        if mask & INPUT_LEFT:
+            sprite = self.sprite_run_l
+        elif mask & INPUT_RIGHT:
+            sprite = self.sprite_run_r
+        else:
+            sprite = self.sprite_idle
+        return self._zoom_sprite(sprite, zoom) if zoom != 1.0 else sprite
+
+    #Scaled copy of a sprite for a render scale (made once, then reused)
+    def _zoom_sprite(self, sprite: pygame.Surface, zoom: float) -> pygame.Surface:
+        key = (id(sprite), zoom)
+        zoomed = self._zoomed.get(key)
+        if zoomed is None:
+            zoomed = scale_to_target_height(sprite, max(1, int(sprite.get_height() * zoom)))
+            self._zoomed[key] = zoomed
+        return zoomed
@@ -0,0 +1,161 @@
+"""
+In-game frame-time profiler (F3 toggles the overlay, F4 dumps the samples to CSV).
+
+Each frame is split into phases (sleep in the frame pacer, events, physics, camera, draw, flip,
+deferred jobs) timed with time.perf_counter_ns. Samples go into a fixed-size ring buffer, the overlay
+shows rolling p50/p95/p99 per phase and a graph of the last frame times.
+When the profiler is off, every call returns right away.
+"""
+import csv
+import math
+import time
+from array import array
+from typing import Dict, List, Optional, Sequence
+
+import pygame
+
+from .settings import PROFILER_RING, PROFILER_REFRESH, FRAME_BUDGET_MS
+from .utils import get_font, units
+
+#Phases in the order they happen in GameApp._run_game_frame
+PHASES = ("sleep", "events", "physics", "camera", "draw", "flip", "jobs")
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    #Nearest-rank percentile of an already sorted list
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(q / 100.0 * len(sorted_values))
+    return sorted_values[max(0, min(rank, len(sorted_values)) - 1)]
+
+
+class FrameProfiler:
+    """
+    Records per-phase frame times into a ring buffer.
+    Usage per frame: begin_frame(), mark(phase) after each phase, end_frame().
+    """
+    def __init__(self, phases: Sequence[str] = PHASES, size: int = PROFILER_RING) -> None:
+        self.enabled = False
+        self.phases = tuple(phases)
+        self.size = size
+        #One column of nanoseconds per phase (preallocated, nothing is allocated while recording)
+        self.samples: Dict[str, array] = {p: array("q", [0]) * size for p in self.phases}
+        self.totals = array("q", [0]) * size
+        #Frames recorded so far (the ring index is count % size)
+        self.count = 0
+        self._current = array("q", [0]) * len(self.phases)
+        self._index = {p: i for i, p in enumerate(self.phases)}
+        self._last_ns = 0
+        self._frame_start_ns = 0
+        #Overlay text is rebuilt every PROFILER_REFRESH frames, not every frame
+        self._overlay_lines: List[str] = []
+        self._overlay_age = 0
+
+    def toggle(self) -> None:
+        self.enabled = not self.enabled
+        self._overlay_age = PROFILER_REFRESH
+        #The frame in progress started before the toggle, so it is not recorded
+        self._frame_start_ns = 0
+
+    def begin_frame(self) -> None:
+        if not self.enabled:
+            return
+        self._frame_start_ns = self._last_ns = time.perf_counter_ns()
+        for i in range(len(self._current)):
+            self._current[i] = 0
+
+    def mark(self, phase: str) -> None:
+        #Time since the previous mark is charged to this phase
+        if not self.enabled or self._frame_start_ns == 0:
+            return
+        now = time.perf_counter_ns()
+        self._current[self._index[phase]] += now - self._last_ns
+        self._last_ns = now
+
+    def end_frame(self) -> None:
+        if not self.enabled or self._frame_start_ns == 0:
+            return
+        slot = self.count % self.size
+        for p, i in self._index.items():
+            self.samples[p][slot] = self._current[i]
+        self.totals[slot] = self._last_ns - self._frame_start_ns
+        self.count += 1
+
+    def _recent(self, column: array) -> List[int]:
+        #Recorded values of a column, oldest first
+        n = min(self.count, self.size)
+        if self.count <= self.size:
+            return list(column[:n])
+        start = self.count % self.size
+        return list(column[start:]) + list(column[:start])
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Rolling p50/p95/p99 in milliseconds for every phase and for the whole frame.
+        """
+        out = {}
+        columns = dict(self.samples)
+        columns["frame"] = self.totals
+        for name, column in columns.items():
+            values = sorted(self._recent(column))
+            out[name] = {q: percentile(values, float(q[1:])) / 1e6 for q in ("p50", "p95", "p99")}
+        return out
+
+    def dump_csv(self, path: str) -> int:
+        """
+        Writes the ring buffer to a CSV file (one row per frame, times in microseconds).
+        Returns the number of rows written.
+        """
+        columns = [self._recent(self.samples[p]) for p in self.phases]
+        totals = self._recent(self.totals)
+        first = self.count - len(totals)
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["frame"] + [f"{p}_us" for p in self.phases] + ["total_us"])
+            for row in range(len(totals)):
+                writer.writerow(
+                    [first + row] + [round(c[row] / 1000.0, 1) for c in columns] + [round(totals[row] / 1000.0, 1)]
+                )
+        return len(totals)
+
+    def draw_overlay(self, surface: pygame.Surface, extra: Optional[List[str]] = None) -> None:
+        """
+        Draws the percentile table and the frame-time graph in the top right corner.
+        """
+        if not self.enabled:
+            return
+        self._overlay_age += 1
+        if self._overlay_age >= PROFILER_REFRESH:
+            self._overlay_age = 0
+            stats = self.stats()
+            self._overlay_lines = [f"{'PHASE':<8}{'P50':>7}{'P95':>7}{'P99':>7}"]
+            for name in self.phases + ("frame",):
+                s = stats[name]
+                self._overlay_lines.append(f"{name.upper():<8}{s['p50']:>7.2f}{s['p95']:>7.2f}{s['p99']:>7.2f}")
+            self._overlay_lines.extend(extra or [])
+
+        def u(v: float) -> int:
+            return units(surface, v)
+        font = get_font(u(26))
+        line_h = font.get_linesize()
+        graph_w, graph_h = u(480), u(120)
+        panel = pygame.Rect(0, 0, graph_w + u(20), len(self._overlay_lines) * line_h + graph_h + u(30))
+        panel.topright = (surface.get_width() - u(10), u(10))
+        pygame.draw.rect(surface, (0, 0, 0), panel)
+        y = panel.y + u(8)
+        for line in self._overlay_lines:
+            surface.blit(font.render(line, False, (255, 255, 255)), (panel.x + u(10), y))
+            y += line_h
+
+        #Frame-time graph (one bar per frame, the yellow line is the FPS budget)
+        graph = pygame.Rect(panel.x + u(10), y + u(8), graph_w, graph_h)
+        pygame.draw.rect(surface, (40, 40, 40), graph)
+        scale_ms = FRAME_BUDGET_MS * 2
+        totals = self._recent(self.totals)[-graph_w:]
+        for i, ns in enumerate(totals):
+            h = min(graph_h, int(ns / 1e6 / scale_ms * graph_h))
+            color = (0, 220, 0) if ns / 1e6 <= FRAME_BUDGET_MS else (230, 50, 50)
+            x = graph.right - len(totals) + i
+            pygame.draw.line(surface, color, (x, graph.bottom - 1), (x, graph.bottom - 1 - h))
+        budget_y = graph.bottom - 1 - graph_h // 2
+        pygame.draw.line(surface, (255, 220, 0), (graph.left, budget_y), (graph.right - 1, budget_y))
@@ -0,0 +1,131 @@
+"""
+Run replays: the level and the per-tick inputs of a finished run.
+
+A replay file (.rpl) is a header line (JSON: player, claimed time, level layout) followed
+by one fixed-size record per physics tick: dt (float64), input bitmask (uint8) and the
+player position after the tick (two int32). dt and inputs are enough to re-simulate the
+run with PlayerBody (see verify.py), the positions are checked against the simulation
+and let ghosts be drawn without any physics (see ghosts.py).
+Records can be read in chunks, so a replay never has to be loaded whole.
+"""
+import json
+import os
+import struct
+import time
+import zlib
+from array import array
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import pygame
+
+from .platform import Platform
+
+MAGIC = b"TRPL1 "
+RECORD = struct.Struct("<dBii")
+
+
+class RunRecorder:
+    """
+    Collects the ticks of the run in progress in typed arrays (no Python object kept per tick).
+    The run is marked as edited when the editor was used during it, such runs can't be verified.
+    """
+    def __init__(self, physics: str = "float") -> None:
+        #"float" or "fixed" (see fixedpoint.py), the verifier re-simulates with the same one
+        self.physics = physics
+        self.start((0, 0))
+
+    def start(self, spawn: Tuple[int, int], level: str = "") -> None:
+        self.spawn = spawn
+        #Level key (see level_key), ghosts only race on the level they were recorded on
+        self.level = level
+        self.dts = array("d")
+        self.masks = array("B")
+        self.xs = array("i")
+        self.ys = array("i")
+        self.edited = False
+
+    def record(self, dt: float, mask: int, pos: Tuple[int, int]) -> None:
+        self.dts.append(dt)
+        self.masks.append(mask)
+        self.xs.append(pos[0])
+        self.ys.append(pos[1])
+
+    @property
+    def ticks(self) -> int:
+        return len(self.dts)
+
+    def encode(self, name: str, time_s: float, finish_fraction: float,
+               platforms: Sequence[Platform], goal_rect: pygame.Rect, world_w: int, world_h: int) -> bytes:
+        """
+        The finished run as the content of a replay file (the finish is on the last recorded tick).
+        """
+        header = {
+            "name": name,
+            "time": time_s,
+            "finish_tick": self.ticks,
+            "finish_fraction": finish_fraction,
+            "edited": self.edited,
+            "level": self.level,
+            "physics": self.physics,
+            "world_w": world_w,
+            "world_h": world_h,
+            "spawn": list(self.spawn),
+            "platforms": [list(p.rect) for p in platforms],
+            "goal": list(goal_rect),
+        }
+        head = MAGIC + json.dumps(header).encode("utf-8") + b"\n"
+        return head + b"".join(RECORD.pack(*r) for r in zip(self.dts, self.masks, self.xs, self.ys))
+
+    def save(self, path: str, name: str, time_s: float, finish_fraction: float,
+             platforms: Sequence[Platform], goal_rect: pygame.Rect, world_w: int, world_h: int) -> None:
+        #Writes the finished run to a replay file
+        write_replay(path, self.encode(name, time_s, finish_fraction, platforms, goal_rect, world_w, world_h))
+
+
+def write_replay(path: str, data: bytes) -> None:
+    #Writes encoded replay bytes (the folder is created if needed)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def read_header(path: str) -> Tuple[Dict, int]:
+    #Returns the header and the file offset of the first record
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"not a replay file: {path}")
+        header = json.loads(f.readline())
+        return header, f.tell()
+
+
+def iter_records(path: str, chunk_ticks: int = 256) -> Iterator[List[Tuple[float, int, int, int]]]:
+    """
+    Yields the records (dt, mask, x, y) in chunks of chunk_ticks, reading the file as it goes.
+    """
+    _, offset = read_header(path)
+    with open(path, "rb") as f:
+        f.seek(offset)
+        while True:
+            data = f.read(RECORD.size * chunk_ticks)
+            if len(data) < RECORD.size:
+                return
+            usable = len(data) - len(data) % RECORD.size
+            yield list(RECORD.iter_unpack(data[:usable]))
+
+
+def level_key(platforms: Sequence[Platform], seed: Optional[int] = None) -> str:
+    #Identifies a level: the seed of a procedural tower (it grows while climbing), else the platform layout
+    if seed is not None:
+        return f"tower:{seed}"
+    return f"layout:{zlib.crc32(json.dumps([list(p.rect) for p in platforms]).encode('ascii')):08x}"
+
+
+def load_level(header: Dict) -> Tuple[List[Platform], pygame.Rect]:
+    #Platforms and goal of the replay's level
+    return [Platform(*r) for r in header["platforms"]], pygame.Rect(header["goal"])
+
+
+def replay_path(directory: str, name: str) -> str:
+    #A new file name for a run of this player (only letters and digits of the name are kept)
+    safe = "".join(c for c in name if c.isalnum())[:16] or "player"
+    return os.path.join(directory, time.strftime("%Y%m%d_%H%M%S_") + safe + ".rpl")
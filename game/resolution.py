@@ -0,0 +1,86 @@
+"""
+Dynamic resolution controller.
+
+The game world is drawn on an internal surface, then scaled to the window.
+This controller measures the frame time against a budget and moves the internal
+resolution down one step when frames are too slow, and back up when there is room.
+"""
+from typing import Dict, List, Sequence, Tuple
+
+from .settings import (
+    RENDER_SCALES,
+    DYNAMIC_RESOLUTION,
+    FRAME_BUDGET_MS,
+    RES_DOWN_AT, RES_UP_AT,
+    RES_WINDOW,
+)
+
+
+class DynamicResolution:
+    """
+    Keeps the current render scale for a window of base_w x base_h pixels.
+    record() is called once per frame with the measured frame time and returns True
+    when the scale changed (the caller then rebuilds its internal surface).
+    """
+    def __init__(self, base_w: int, base_h: int,
+                 scales: Sequence[float] = RENDER_SCALES,
+                 budget_ms: float = FRAME_BUDGET_MS,
+                 window: int = RES_WINDOW,
+                 enabled: bool = DYNAMIC_RESOLUTION) -> None:
+        self.base_w = base_w
+        self.base_h = base_h
+        self.scales = tuple(scales)
+        self.budget_ms = budget_ms
+        self.window = window
+        self.enabled = enabled
+        #Index in self.scales (0 = full resolution)
+        self.level = 0
+        self._samples: List[float] = []
+        #Statistics
+        self.changes = 0
+        self.last_avg_ms = 0.0
+
+    @property
+    def scale(self) -> float:
+        return self.scales[self.level]
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        #Internal surface size for the current scale
+        return round(self.base_w * self.scale), round(self.base_h * self.scale)
+
+    def set_level(self, level: int) -> bool:
+        level = max(0, min(level, len(self.scales) - 1))
+        if level == self.level:
+            return False
+        self.level = level
+        self.changes += 1
+        self._samples.clear()
+        return True
+
+    def record(self, frame_ms: float) -> bool:
+        """
+        Adds one frame time. Every `window` frames the average is compared with the budget.
+        """
+        if not self.enabled:
+            return False
+        self._samples.append(frame_ms)
+        if len(self._samples) < self.window:
+            return False
+        avg = sum(self._samples) / len(self._samples)
+        self._samples.clear()
+        self.last_avg_ms = avg
+        if avg > self.budget_ms * RES_DOWN_AT:
+            return self.set_level(self.level + 1)
+        if avg < self.budget_ms * RES_UP_AT:
+            return self.set_level(self.level - 1)
+        return False
+
+    def stats(self) -> Dict:
+        return {
+            "scale": self.scale,
+            "size": self.size,
+            "changes": self.changes,
+            "avg_frame_ms": self.last_avg_ms,
+            "budget_ms": self.budget_ms,
+        }
@@ -0,0 +1,99 @@
+"""
+Rewind (hold BACKSPACE in game or in the editor).
+
+Every frame the player state is packed into a fixed-size record of a preallocated ring
+buffer (x, y, vx, vy, on_ground, facing_right: 25 bytes, so 60 s at 60 FPS is about 90 KB
+and nothing is allocated per frame). Going back to any frame is one unpack: O(1).
+Platform edits are not snapshotted: each add / remove is logged with the frame it happened
+on, and rewinding undoes the edits made after the target frame, newest first, so the cost
+is proportional to the number of edits undone. Platforms added by the tower generator are
+not logged, they stay (they are only ever appended, so the logged indexes remain valid).
+"""
+import struct
+from collections import deque
+from typing import Deque, List, Tuple
+
+from .platform import Platform
+from .player import PlayerBody
+from .settings import FPS, REWIND_SECONDS
+
+_STATE = struct.Struct("<iiddB")
+_ON_GROUND = 1
+_FACING_RIGHT = 2
+#Kinds of platform edits
+ADD = 0
+REMOVE = 1
+
+
+class RewindBuffer:
+    """
+    Usage: push(player) once per frame, add(...) / remove(...) when the editor changes the
+    platforms, rewind(frames, player, platforms) to go back, clear() when the run restarts.
+    """
+    def __init__(self, seconds: float = REWIND_SECONDS, fps: int = FPS) -> None:
+        self.capacity = max(1, int(seconds * fps))
+        self._states = bytearray(self.capacity * _STATE.size)
+        #(frame, ADD or REMOVE, index in the platform list, platform), oldest first
+        self._edits: Deque[Tuple[int, int, int, Platform]] = deque()
+        self.clear()
+
+    def clear(self) -> None:
+        #frame is the number of the next snapshot, oldest the first one still in the ring
+        self.frame = 0
+        self.oldest = 0
+        self._edits.clear()
+
+    def push(self, body: PlayerBody) -> None:
+        flags = (_ON_GROUND if body.on_ground else 0) | (_FACING_RIGHT if body.facing_right else 0)
+        _STATE.pack_into(self._states, (self.frame % self.capacity) * _STATE.size,
+                         body.rect.x, body.rect.y, body.vx, body.vy, flags)
+        self.frame += 1
+        if self.frame - self.oldest > self.capacity:
+            self.oldest = self.frame - self.capacity
+            #Edits older than the ring can't be undone any more
+            while self._edits and self._edits[0][0] <= self.oldest:
+                self._edits.popleft()
+
+    def add(self, index: int, platform: Platform) -> None:
+        #A platform was inserted at this index of the list
+        self._edits.append((self.frame, ADD, index, platform))
+
+    def remove(self, index: int, platform: Platform) -> None:
+        #A platform was removed from this index of the list
+        self._edits.append((self.frame, REMOVE, index, platform))
+
+    def available(self) -> int:
+        #Frames we can still go back
+        return max(0, self.frame - 1 - self.oldest)
+
+    def rewind(self, frames: int, body: PlayerBody, platforms: List[Platform]) -> int:
+        """
+        Restores the player and the platforms as they were `frames` frames ago (or as far as
+        the buffer goes). The frames after it are forgotten. Returns the frames actually rewound.
+        """
+        frames = min(frames, self.available())
+        if frames <= 0:
+            return 0
+        target = self.frame - 1 - frames
+        #An edit logged with frame f happened after snapshot f - 1 and before snapshot f
+        edits = self._edits
+        while edits and edits[-1][0] > target:
+            _, kind, index, platform = edits.pop()
+            if kind == ADD:
+                if index < len(platforms) and platforms[index] is platform:
+                    del platforms[index]
+                else:
+                    platforms.remove(platform)
+            else:
+                platforms.insert(index, platform)
+        x, y, vx, vy, flags = _STATE.unpack_from(self._states, (target % self.capacity) * _STATE.size)
+        body.rect.topleft = (x, y)
+        body.vx, body.vy = vx, vy
+        body.on_ground = bool(flags & _ON_GROUND)
+        body.facing_right = bool(flags & _FACING_RIGHT)
+        self.frame = target + 1
+        return frames
+
+    def nbytes(self) -> int:
+        #Memory used by the state ring (the edit log only holds references)
+        return len(self._states)
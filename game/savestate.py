@@ -0,0 +1,98 @@
+"""
+Save / resume of a run in progress (ESC or closing the window saves, C in the menu resumes).
+
+A snapshot is a small JSON header (player, timer, editor settings, tower seed...) followed
+by binary sections: the platforms as one int32 array of (x, y, w, h), and the arrays of
+the run's replay recorder. Packing and unpacking are a few array conversions, so a level
+with tens of thousands of platforms still saves and loads in milliseconds.
+The main thread only builds the bytes, a background thread writes them (to a temporary
+file that replaces the old save, so a crash never leaves half a snapshot).
+"""
+import json
+import os
+import struct
+import threading
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .platform import Platform
+
+MAGIC = b"TSAV1 "
+_LENGTH = struct.Struct("<I")
+
+
+def encode(header: Dict, platforms: Sequence[Platform], arrays: Dict[str, array]) -> bytes:
+    """
+    Builds a snapshot: the header plus the platforms and the given typed arrays as raw bytes.
+    """
+    rects = array("i", [v for p in platforms for v in p.rect])
+    sections = [("platforms", rects)] + sorted(arrays.items())
+    header = dict(header, sections=[[name, a.typecode, len(a)] for name, a in sections])
+    head = json.dumps(header).encode("utf-8")
+    return b"".join([MAGIC, _LENGTH.pack(len(head)), head] + [a.tobytes() for _, a in sections])
+
+
+def decode(data: bytes) -> Tuple[Dict, List[Platform], Dict[str, array]]:
+    #Reverse of encode (raises ValueError if the data is not a snapshot)
+    if not data.startswith(MAGIC):
+        raise ValueError("not a save file")
+    pos = len(MAGIC)
+    (length,) = _LENGTH.unpack_from(data, pos)
+    pos += _LENGTH.size
+    header = json.loads(data[pos:pos + length])
+    pos += length
+    arrays: Dict[str, array] = {}
+    view = memoryview(data)
+    for name, typecode, count in header["sections"]:
+        a = array(typecode)
+        size = a.itemsize * count
+        a.frombytes(view[pos:pos + size])
+        pos += size
+        arrays[name] = a
+    rects = arrays.pop("platforms")
+    platforms = [Platform(x, y, w, h) for x, y, w, h in zip(rects[0::4], rects[1::4], rects[2::4], rects[3::4])]
+    return header, platforms, arrays
+
+
+def load(path: str) -> Optional[Tuple[Dict, List[Platform], Dict[str, array]]]:
+    #None if there is no valid save
+    try:
+        with open(path, "rb") as f:
+            return decode(f.read())
+    except (OSError, ValueError, KeyError, struct.error):
+        return None
+
+
+class SaveWriter:
+    """
+    Writes snapshots from a background thread. wait() before exiting the program.
+    """
+    def __init__(self) -> None:
+        self._thread: Optional[threading.Thread] = None
+        self.last_bytes = 0
+
+    def save(self, path: str, data: bytes) -> None:
+        #A new save replaces the previous one, so it waits for it first (they are rare)
+        self.wait()
+        self.last_bytes = len(data)
+        self._thread = threading.Thread(target=self._write, args=(path, data), name="save-writer")
+        self._thread.start()
+
+    @staticmethod
+    def _write(path: str, data: bytes) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def wait(self) -> None:
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def delete(self, path: str) -> None:
+        #Removes the save (the run it held is finished)
+        self.wait()
+        if os.path.exists(path):
+            os.remove(path)
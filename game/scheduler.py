@@ -0,0 +1,301 @@
+"""
+Frame-budget scheduler for deferred work.
+
+Subsystems submit jobs that don't have to run right now (tower chunks, tile warmups,
+score files...). run(frame_start) is called at the end of every frame and runs the most
+urgent jobs in the time left of the frame budget (FRAME_BUDGET_MS minus a small reserve
+for the pacer). A job only starts if its usual duration (measured per job name) fits
+in what is left; the others wait for the next frame.
+
+- priority: lower runs first (HIGH, NORMAL, LOW), then in submit order
+- a job that is a generator runs one step per slice and continues in a later frame,
+  so long work can be cut into small pieces
+- thread=True runs the job on a worker thread instead (file I/O); its on_done callback
+  still runs on the main thread, in run()
+- job.cancel() drops a job that hasn't run yet (or the rest of a generator job)
+- a job kept waiting SCHED_MAX_WAIT_FRAMES frames gets a slice even without budget,
+  so busy frames can delay work but never starve it
+
+stats() counts the deferred work and the budget overruns, shown in the F3 overlay.
+    python -m game.scheduler      #frames with simulated work, jobs inline vs scheduled
+"""
+import argparse
+import heapq
+import itertools
+import random
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from .settings import FRAME_BUDGET_MS, SCHED_RESERVE_MS, SCHED_MAX_WAIT_FRAMES, SCHED_WORKERS
+
+HIGH = 0
+NORMAL = 1
+LOW = 2
+#Weight of the newest slice in the per-name duration estimate
+_EMA = 0.3
+
+
+class Job:
+    """
+    A submitted job. done / cancelled tell where it is, result / error what it gave.
+    """
+    __slots__ = ("name", "priority", "fn", "args", "thread", "on_done", "submitted_frame",
+                 "submitted_at", "cancelled", "done", "result", "error", "_steps", "_future")
+
+    def __init__(self, name: str, priority: int, fn: Callable, args: tuple, thread: bool,
+                 on_done: Optional[Callable[["Job"], None]], frame: int) -> None:
+        self.name = name
+        self.priority = priority
+        self.fn = fn
+        self.args = args
+        self.thread = thread
+        self.on_done = on_done
+        self.submitted_frame = frame
+        self.submitted_at = time.perf_counter()
+        self.cancelled = False
+        self.done = False
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self._steps = None
+        self._future: Optional[Future] = None
+
+    def cancel(self) -> None:
+        if self.done:
+            return
+        self.cancelled = True
+        if self._future is not None:
+            self._future.cancel()
+
+
+class FrameScheduler:
+    """
+    Usage: submit(...) from anywhere on the main thread, run(frame_start) once per frame
+    (frame_start = time.perf_counter() when the frame's work began).
+    """
+    def __init__(self, budget_ms: float = FRAME_BUDGET_MS, reserve_ms: float = SCHED_RESERVE_MS,
+                 max_wait_frames: int = SCHED_MAX_WAIT_FRAMES, workers: int = SCHED_WORKERS) -> None:
+        self.budget_s = (budget_ms - reserve_ms) / 1000.0
+        self.max_wait_frames = max_wait_frames
+        self.workers = workers
+        self._pool: Optional[ThreadPoolExecutor] = None
+        #(priority, submit order, job)
+        self._queue: List[tuple] = []
+        self._order = itertools.count()
+        self._threaded: List[Job] = []
+        #Usual duration of one slice in seconds, per job name
+        self._estimates: Dict[str, float] = {}
+        self.frame = 0
+        #Statistics
+        self.submitted = self.completed = self.cancelled = self.failed = 0
+        self.slices = 0
+        self.forced = 0
+        self.deferred_frames = 0
+        self.overruns = 0
+        self.overrun_ms_max = 0.0
+        self.run_ms = 0.0
+        self.wait_ms_total = 0.0
+
+    def submit(self, fn: Callable, *args: Any, priority: int = NORMAL, name: Optional[str] = None,
+               thread: bool = False, on_done: Optional[Callable[[Job], None]] = None) -> Job:
+        job = Job(name or getattr(fn, "__name__", "job"), priority, fn, args, thread, on_done, self.frame)
+        self.submitted += 1
+        if thread:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="sched")
+            job._future = self._pool.submit(fn, *args)
+            self._threaded.append(job)
+        else:
+            heapq.heappush(self._queue, (priority, next(self._order), job))
+        return job
+
+    def _finish(self, job: Job, result: Any = None, error: Optional[BaseException] = None) -> None:
+        job.done = True
+        job.result, job.error = result, error
+        self.wait_ms_total += (time.perf_counter() - job.submitted_at) * 1000.0
+        if error is not None:
+            #Kept in job.error and counted (shown in the F3 overlay), the game goes on
+            self.failed += 1
+        else:
+            self.completed += 1
+        if job.on_done is not None:
+            job.on_done(job)
+
+    def _collect_threads(self) -> None:
+        #Worker jobs that ended since the last frame (callbacks run here, on the main thread)
+        still = []
+        for job in self._threaded:
+            fut = job._future
+            if fut.cancelled():
+                self.cancelled += 1
+            elif fut.done():
+                error = fut.exception()
+                self._finish(job, None if error else fut.result(), error)
+            else:
+                still.append(job)
+        self._threaded = still
+
+    def _slice(self, job: Job) -> bool:
+        #Runs one slice of the job, True when the job has more to do
+        if job._steps is None:
+            try:
+                out = job.fn(*job.args)
+            except Exception as e:
+                self._finish(job, error=e)
+                return False
+            if not hasattr(out, "__next__"):
+                self._finish(job, out)
+                return False
+            job._steps = out
+        try:
+            next(job._steps)
+            return True
+        except StopIteration as done:
+            self._finish(job, done.value)
+        except Exception as e:
+            self._finish(job, error=e)
+        return False
+
+    def run(self, frame_start: float) -> None:
+        """
+        Runs queued jobs in what is left of this frame's budget.
+        """
+        self.frame += 1
+        if self._threaded:
+            self._collect_threads()
+        queue = self._queue
+        deadline = frame_start + self.budget_s
+        ran_any = False
+        while queue:
+            _, _, job = queue[0]
+            if job.cancelled:
+                heapq.heappop(queue)
+                self.cancelled += 1
+                continue
+            now = time.perf_counter()
+            estimate = self._estimates.get(job.name, 0.0)
+            starving = self.frame - job.submitted_frame >= self.max_wait_frames and not ran_any
+            if now + estimate > deadline and not starving:
+                self.deferred_frames += 1
+                break
+            heapq.heappop(queue)
+            more = self._slice(job)
+            end = time.perf_counter()
+            took = end - now
+            self._estimates[job.name] = took if estimate == 0.0 else estimate + _EMA * (took - estimate)
+            self.slices += 1
+            self.run_ms += took * 1000.0
+            if starving and now + estimate > deadline:
+                self.forced += 1
+            if end > deadline:
+                self.overruns += 1
+                self.overrun_ms_max = max(self.overrun_ms_max, (end - deadline) * 1000.0)
+            ran_any = True
+            if more and not job.cancelled:
+                #Next slice in a later frame if time runs out, keeping its place among its priority
+                job.submitted_frame = self.frame
+                heapq.heappush(queue, (job.priority, next(self._order), job))
+            elif more:
+                self.cancelled += 1
+
+    def wait_threads(self) -> None:
+        #Blocks until the worker jobs are done (before a screen shows what they wrote, or on exit)
+        for job in self._threaded:
+            try:
+                job._future.result()
+            except BaseException:
+                pass
+        self._collect_threads()
+
+    def shutdown(self) -> None:
+        self.wait_threads()
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    @property
+    def pending(self) -> int:
+        return len(self._queue) + len(self._threaded)
+
+    def stats(self) -> Dict[str, float]:
+        finished = self.completed + self.failed
+        return {
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "cancelled": self.cancelled,
+            "failed": self.failed,
+            "pending": self.pending,
+            "slices": self.slices,
+            "forced": self.forced,
+            "deferred_frames": self.deferred_frames,
+            "overruns": self.overruns,
+            "overrun_ms_max": self.overrun_ms_max,
+            "run_ms": self.run_ms,
+            "wait_ms_avg": self.wait_ms_total / finished if finished else 0.0,
+        }
+
+    def overlay_lines(self) -> List[str]:
+        s = self.stats()
+        return [
+            f"JOBS {s['pending']} PENDING {s['completed']} DONE {s['failed']} FAILED {s['deferred_frames']} DEFERRED",
+            f"JOB OVERRUNS {s['overruns']} MAX {s['overrun_ms_max']:.1f}MS WAIT {s['wait_ms_avg']:.0f}MS",
+        ]
+
+
+def _busy(ms: float) -> None:
+    end = time.perf_counter() + ms / 1000.0
+    while time.perf_counter() < end:
+        pass
+
+
+def simulate(frames: int, jobs: int, work_ms: float, seed: int = 1) -> Dict[str, Dict[str, float]]:
+    """
+    Frames of work_ms (plus noise), with jobs of 0.5 to 3 ms submitted in bursts.
+    "inline" runs each burst in the frame it arrives, "scheduled" hands it to a FrameScheduler.
+    Reports the frames over budget for both.
+    """
+    out = {}
+    for mode in ("inline", "scheduled"):
+        rng = random.Random(seed)
+        sched = FrameScheduler()
+        over = 0
+        worst = 0.0
+        left = jobs
+        for f in range(frames):
+            start = time.perf_counter()
+            _busy(work_ms * rng.uniform(0.8, 1.2))
+            burst = []
+            if left and rng.random() < 0.1:
+                n = min(left, rng.randint(3, 12))
+                left -= n
+                burst = [rng.uniform(0.5, 3.0) for _ in range(n)]
+            if mode == "inline":
+                for ms in burst:
+                    _busy(ms)
+            else:
+                for ms in burst:
+                    sched.submit(_busy, ms, priority=rng.choice((HIGH, NORMAL, LOW)), name="job")
+                sched.run(start)
+            frame_ms = (time.perf_counter() - start) * 1000.0
+            over += frame_ms > FRAME_BUDGET_MS
+            worst = max(worst, frame_ms)
+        stats = sched.stats()
+        out[mode] = {"over_budget": over, "worst_ms": worst, "pending": stats["pending"],
+                     "wait_ms_avg": stats["wait_ms_avg"], "overruns": stats["overruns"]}
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Jobs run inline vs in the leftover frame time.")
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--jobs", type=int, default=300)
+    parser.add_argument("--work-ms", type=float, default=10.0, help="simulated work of each frame")
+    args = parser.parse_args()
+    r = simulate(args.frames, args.jobs, args.work_ms)
+    for mode, s in r.items():
+        print(f"{mode:10s} frames over {FRAME_BUDGET_MS:.1f} ms: {s['over_budget']:4d}/{args.frames}"
+              f"  worst {s['worst_ms']:.1f} ms  job wait {s['wait_ms_avg']:.0f} ms  left {s['pending']}")
+
+
+if __name__ == "__main__":
+    main()
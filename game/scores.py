@@ -2,23 +2,31 @@
 import json
 #we check if the files/folders exist
 import os
+#score files are written from worker threads (see app._write_score)
+import threading
 #Type hints for better readability and structure
-from typing import List, Dict
+from typing import List, Dict, Optional, Sequence
 
 #import shared file path settings
 from .settings import SCORES_FILE, ASSETS_DIR
+from .tracing import traced
 
-def load_scores() -> List[Dict]:
+#One read-modify-write of the score file at a time, or two runs finishing together lose an entry
+_write_lock = threading.Lock()
+
+@traced(cat="io")
+def load_scores(path: str = SCORES_FILE) -> List[Dict]:
     """
     Here we will load the scoreboard data into the JSON file.
     if the file doesn't exist or is invalid, we will retun an empty list.
+    (path is only changed by tools such as the benchmarks)
     """
     #If the scores file doesn't exist, return an empty list
-    if not os.path.exists(SCORES_FILE):
+    if not os.path.exists(path):
         return []
     try:
         #If it exist we will open the file and load it 
-        with open(SCORES_FILE, "r", encoding="utf-8") as f:
+        with open(path, "r", encoding="utf-8") as f:
             data = json.load(f)
         #Make sure the data is actually a list before returning
         return data if isinstance(data, list) else []
@@ -27,28 +35,50 @@ def load_scores() -> List[Dict]:
         #we will return an empty list instead of having a crash in the game
         return []
 
-def save_scores(scores: List[Dict]) -> None:
+@traced(cat="io")
+def save_scores(scores: List[Dict], path: str = SCORES_FILE) -> None:
     """
     Saving the current scoreboard list into the jSON file
     """
     #make sure the folder assets exists
-    os.makedirs(ASSETS_DIR, exist_ok=True)
-    #Writing the list of scores with indentation for readability 
-    with open(SCORES_FILE, "w", encoding="utf-8") as f:
+    os.makedirs(os.path.dirname(path) or ASSETS_DIR, exist_ok=True)
+    #Writing the list of scores with indentation for readability, in a temporary file first
+    #so a reader (the ghosts, the scoreboard) never sees a half-written file
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
         json.dump(scores, f, indent=2)
+    os.replace(tmp, path)
 
-def add_score(player_name: str, time_seconds: float) -> None:
+@traced(cat="io")
+def add_score(player_name: str, time_seconds: float, path: str = SCORES_FILE,
+              splits: Optional[Sequence[float]] = None, replay: Optional[str] = None) -> None:
     """
     Adding the score entries + sorting it by fastest time.
     Only show the top 10 best results
+    (splits are the checkpoint times of the run, replay the path of its replay file,
+    both stored with the score when given)
     """
-    #load the existing scores
-    scores = load_scores()
     #add new score as a dictionnary
-    scores.append({"name": player_name, "time": float(time_seconds)})
-    #Sorting the scores in asceding having the fastest scores first shown
-    scores.sort(key=lambda x: x["time"])
-    #keep the top 10 best
-    scores = scores[:10]
-    #saving the scores back in the JSON file
-    save_scores(scores)
\ No newline at end of file
+    entry = {"name": player_name, "time": float(time_seconds)}
+    if splits:
+        entry["splits"] = [round(float(t), 4) for t in splits]
+    if replay:
+        entry["replay"] = replay
+    #load the existing scores, add the new one and write them back (one writer at a time)
+    with _write_lock:
+        scores = load_scores(path)
+        scores.append(entry)
+        #Sorting the scores in asceding having the fastest scores first shown
+        scores.sort(key=lambda x: x["time"])
+        #keep the top 10 best
+        dropped, scores = scores[10:], scores[:10]
+        #saving the scores back in the JSON file
+        save_scores(scores, path)
+        #then the replays of the runs that dropped out are deleted, when possible (a ghost may
+        #still have one open, and Windows won't delete an open file: it is only left behind)
+        for score in dropped:
+            if score.get("replay"):
+                try:
+                    os.remove(score["replay"])
+                except OSError:
+                    pass
@@ -1,168 +1,293 @@
 import os
 import pygame
-from typing import Optional
+from typing import Any, Generator, List, Optional, Tuple
 
 #Import the things we need for the screens of our game
 from .settings import (
     ASSETS_DIR,
     MENU_BG_FILE,
     SCOREBOARD_BG_FILE,
-    FPS,
-    SCREEN_W,
+    SCREEN_WAIT_MS,
     STATE_MENU,
     STATE_NAME,
     STATE_SCOREBOARD,
 )
-from .utils import safe_load_image, get_font, draw_center_text, format_time
+from .utils import safe_load_image, get_font, draw_center_text, format_time, units
 from .scores import load_scores
+from .tracing import traced
 
-#Run the main menu screen
-def run_menu(screen: pygame.Surface, clock: pygame.time.Clock) -> str:
+#Events that mean the window content must be drawn again
+_REDRAW_EVENTS = (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED, pygame.WINDOWRESTORED, pygame.WINDOWSIZECHANGED)
+
+
+def _wait_events(timeout_ms: int = SCREEN_WAIT_MS) -> List[pygame.event.Event]:
     """
-    This function stays in a while loop until the player chooses an option:
-    - ENTER -> go to name input
-    - S -> go to scoreboard
-    - ESC or window close -> quit the game
+    Sleeps until an event arrives (or the timeout ends) instead of polling 60 times a second,
+    then returns every pending event. An empty list means nothing happened.
     """
-    #Laod menu background image (if missing, the menu still works
-    menu_bg = safe_load_image(os.path.join(ASSETS_DIR, MENU_BG_FILE), convert_alpha=False)
-    #Font used for title and instructions
-    font_title = get_font(96)
-    font_body = get_font(40)
-    #Y positions for the layout to align the text easier
-    TITLE_Y = 120
-    LINE1_Y = 260
-    LINE2_Y = 310
-    OPT1_Y = 470
-    OPT2_Y = 530
-    OPT3_Y = 590
-
-    while True:
-        #Tick controls FPS for this menu loop (dt not really needed here, but keeps consistency)
-        _ = clock.tick(FPS) / 1000.0
-        #Input menu handling
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                return "quit"
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_RETURN:
-                    return STATE_NAME
-                    #S to go to scoreboard
-                if event.key == pygame.K_s:
-                    return STATE_SCOREBOARD
-                    #Esc to quit
-                if event.key == pygame.K_ESCAPE:
-                    return "quit"
-        #Drawing the blit, title + descriptions
-        if menu_bg:
-            screen.blit(menu_bg, (0, 0))
-        else:
-            #Fallback measure if image is missing (just a dark bg will appear)
-            screen.fill((10, 10, 25))
+    event = pygame.event.wait(timeout_ms)
+    if event.type == pygame.NOEVENT:
+        return []
+    return [event] + pygame.event.get()
+
+
+def _needs_redraw(events: List[pygame.event.Event]) -> bool:
+    return any(e.type in _REDRAW_EVENTS for e in events)
+
+
+#A screen as steps: each yield waits for the next events (sent in), the return value is the result
+ScreenSteps = Generator[None, List[pygame.event.Event], Any]
+
+
+def drive(steps: ScreenSteps) -> Any:
+    #Runs the steps of a screen, sleeping in pygame.event.wait between two of them
+    try:
+        next(steps)
+        while True:
+            steps.send(_wait_events())
+    except StopIteration as done:
+        return done.value
+
+
+class Screen:
+    """
+    Base of the menu screens. They are created once by GameApp and live for the whole game:
+    the background and the fixed text are composed into one static layer the first time
+    the screen is shown, and every later visit only redraws the parts that changed.
+    """
+    def __init__(self, window: pygame.Surface) -> None:
+        self.window = window
+        self._layer: Optional[pygame.Surface] = None
+
+    def build(self, layer: pygame.Surface) -> None:
+        #Draws the static content (background + fixed text) onto the layer
+        raise NotImplementedError
+
+    def static_layer(self) -> pygame.Surface:
+        #Built on first use, and again only if the window size changed
+        if self._layer is None or self._layer.get_size() != self.window.get_size():
+            self._layer = pygame.Surface(self.window.get_size()).convert()
+            self.build(self._layer)
+        return self._layer
+
+    def u(self, v: float) -> int:
+        return units(self.window, v)
+
+
+#Background image of a screen, or a dark fill if ever the image is missing
+def _draw_background(layer: pygame.Surface, filename: str) -> None:
+    bg = safe_load_image(os.path.join(ASSETS_DIR, filename), convert_alpha=False)
+    if bg:
+        layer.blit(bg, (0, 0))
+    else:
+        layer.fill((10, 10, 25))
+
+
+#The main menu screen
+class MenuScreen(Screen):
+    def build(self, layer: pygame.Surface) -> None:
+        #Font used for title and instructions (sizes and positions are in design units, see utils.units)
+        font_title = get_font(self.u(96))
+        font_body = get_font(self.u(40))
+        _draw_background(layer, MENU_BG_FILE)
         #Title of the game! and brief description of the game for new incomers of the game
-        draw_center_text(screen, font_title, "TOWER OF IE: THE WIZARD CLIMB", TITLE_Y)
-        draw_center_text(screen, font_body, "Welcome, sorcerer student of IE. Conjure platforms to climb the tower.", LINE1_Y,)
-        draw_center_text(screen,font_body,"Reach the flag at the top and prove your mastery with the fastest time!", LINE2_Y,)
+        draw_center_text(layer, font_title, "TOWER OF IE: THE WIZARD CLIMB", self.u(120))
+        draw_center_text(layer, font_body, "Welcome, sorcerer student of IE. Conjure platforms to climb the tower.", self.u(260))
+        draw_center_text(layer, font_body, "Reach the flag at the top and prove your mastery with the fastest time!", self.u(310))
         #Show the menu options
-        draw_center_text(screen, font_body, "PRESS ENTER TO START", OPT1_Y, (255, 255, 255))
-        draw_center_text(screen, font_body, "PRESS S FOR SCOREBOARD", OPT2_Y, (255, 255, 255))
-        draw_center_text(screen, font_body, "PRESS ESC TO QUIT", OPT3_Y, (255, 255, 255))
+        draw_center_text(layer, font_body, "PRESS ENTER TO START", self.u(470), (255, 255, 255))
+        draw_center_text(layer, font_body, "PRESS S FOR SCOREBOARD", self.u(530), (255, 255, 255))
+        draw_center_text(layer, font_body, "PRESS ESC TO QUIT", self.u(590), (255, 255, 255))
 
+    def _draw(self, can_resume: bool) -> None:
+        self.window.blit(self.static_layer(), (0, 0))
+        #Only shown when there is a saved run, so it is not part of the static layer
+        if can_resume:
+            draw_center_text(self.window, get_font(self.u(40)), "PRESS C TO CONTINUE YOUR RUN", self.u(650), (255, 255, 0))
         pygame.display.flip()
 
-#This will run the name input screen and returns:
-def run_name_input(screen: pygame.Surface, clock: pygame.time.Clock) -> Optional[str]:
-    """
-    - A valid player name string when ENTER is pressed
-    - None if the player cancels with ESC or closes the window
-    """
-    menu_bg = safe_load_image(os.path.join(ASSETS_DIR, MENU_BG_FILE), convert_alpha=False)
-    font_title = get_font(72)
-    font_body = get_font(44)
-    #Player name is built character by character from keyboard input
-    name = ""
-
-    while True:
-        _ = clock.tick(FPS) / 1000.0
-        #Building the name string 
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                return None
-            if event.type == pygame.KEYDOWN:
-                #ESC cancels name input and return to menu
-                if event.key == pygame.K_ESCAPE:
-                    return None
-                #Enter confirms the name
-                if event.key == pygame.K_RETURN:
-                    cleaned = name.strip()
-                    if cleaned:
-                        return cleaned
-                #Backspace will the delet the last character
-                if event.key == pygame.K_BACKSPACE:
-                    name = name[:-1]
-                else:
-                    #This event.unicode stores the actual typed character (not the key code)
-                    #We only accept printable characters and limit length to 16
-                    if event.unicode and len(event.unicode) == 1:
-                        if event.unicode.isprintable() and len(name) < 16:
-                            name += event.unicode
-        #Drawing here
-        if menu_bg:
-            screen.blit(menu_bg, (0, 0))
-        else:
-            screen.fill((10, 10, 25))
-        draw_center_text(screen, font_title, "ENTER YOUR NAME", 200, (0, 0, 0))
-        draw_center_text(screen, font_body, "TYPE THEN PRESS ENTER", 290, (0, 0, 0))
-        #Draw the input box
-        box_w, box_h = 700, 80
-        box_x = (SCREEN_W - box_w) // 2
-        box_y = 420
-        pygame.draw.rect(screen, (0, 0, 0), pygame.Rect(box_x, box_y, box_w, box_h))
-        pygame.draw.rect(screen, (255, 255, 255), pygame.Rect(box_x, box_y, box_w, box_h), 2)
-        #Draw the current name inside the input box
-        name_surf = font_body.render(name, True, (255, 255, 255))
-        screen.blit(name_surf, (box_x + 18, box_y + 18))
+    @traced("MenuScreen.run", cat="screen")
+    def run(self, can_resume: bool = False) -> str:
+        """
+        Stays here until the player chooses an option:
+        - ENTER -> go to name input
+        - C -> resume the saved run (only if can_resume)
+        - S -> go to scoreboard
+        - ESC or window close -> quit the game
+        """
+        return drive(self.steps(can_resume))
+
+    def steps(self, can_resume: bool = False) -> ScreenSteps:
+        #Nothing on the menu moves, so it is drawn once and then only when the window asks for it
+        self._draw(can_resume)
+        while True:
+            events = yield
+            for event in events:
+                if event.type == pygame.QUIT:
+                    return "quit"
+                if event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_RETURN:
+                        return STATE_NAME
+                    #C to continue the saved run
+                    if event.key == pygame.K_c and can_resume:
+                        return "resume"
+                    #S to go to scoreboard
+                    if event.key == pygame.K_s:
+                        return STATE_SCOREBOARD
+                    #Esc to quit
+                    if event.key == pygame.K_ESCAPE:
+                        return "quit"
+            if _needs_redraw(events):
+                self._draw(can_resume)
+
+
+#The name input screen
+class NameInputScreen(Screen):
+    def __init__(self, window: pygame.Surface) -> None:
+        super().__init__(window)
+        self.font_title = get_font(self.u(72))
+        self.font_body = get_font(self.u(44))
+
+    def box(self) -> pygame.Rect:
+        #The input box, the only part redrawn while typing
+        box_w, box_h = self.u(700), self.u(80)
+        return pygame.Rect((self.window.get_width() - box_w) // 2, self.u(420), box_w, box_h)
+
+    def build(self, layer: pygame.Surface) -> None:
+        _draw_background(layer, MENU_BG_FILE)
+        draw_center_text(layer, self.font_title, "ENTER YOUR NAME", self.u(200), (0, 0, 0))
+        draw_center_text(layer, self.font_body, "TYPE THEN PRESS ENTER", self.u(290), (0, 0, 0))
         #Instructionn to go back
-        draw_center_text(screen, font_body, "ESC TO GO BACK", 540, (255, 255, 255))
+        draw_center_text(layer, self.font_body, "ESC TO GO BACK", self.u(540), (255, 255, 255))
+
+    def _draw_box(self, name: str) -> pygame.Rect:
+        box = self.box()
+        pygame.draw.rect(self.window, (0, 0, 0), box)
+        pygame.draw.rect(self.window, (255, 255, 255), box, 2)
+        #Draw the current name inside the input box
+        name_surf = self.font_body.render(name, True, (255, 255, 255))
+        self.window.blit(name_surf, (box.x + self.u(18), box.y + self.u(18)))
+        return box
+
+    @traced("NameInputScreen.run", cat="screen")
+    def run(self) -> Optional[str]:
+        """
+        Returns:
+        - A valid player name string when ENTER is pressed
+        - None if the player cancels with ESC or closes the window
+        """
+        return drive(self.steps())
+
+    def steps(self) -> ScreenSteps:
+        #Player name is built character by character from keyboard input
+        name = ""
+        self.window.blit(self.static_layer(), (0, 0))
+        self._draw_box(name)
         pygame.display.flip()
+        while True:
+            events = yield
+            typed = False
+            #Building the name string
+            for event in events:
+                if event.type == pygame.QUIT:
+                    return None
+                if event.type == pygame.KEYDOWN:
+                    #ESC cancels name input and return to menu
+                    if event.key == pygame.K_ESCAPE:
+                        return None
+                    #Enter confirms the name
+                    if event.key == pygame.K_RETURN:
+                        cleaned = name.strip()
+                        if cleaned:
+                            return cleaned
+                    #Backspace will the delet the last character
+                    if event.key == pygame.K_BACKSPACE:
+                        name = name[:-1]
+                        typed = True
+                    else:
+                        #This event.unicode stores the actual typed character (not the key code)
+                        #We only accept printable characters and limit length to 16
+                        if event.unicode and len(event.unicode) == 1:
+                            if event.unicode.isprintable() and len(name) < 16:
+                                name += event.unicode
+                                typed = True
+            if _needs_redraw(events):
+                self.window.blit(self.static_layer(), (0, 0))
+                self._draw_box(name)
+                pygame.display.flip()
+            elif typed:
+                #Only the input box changed, so only that area is sent to the display
+                pygame.display.update(self._draw_box(name))
 
-#Runs the scoreboard screen
-def run_scoreboard(screen: pygame.Surface, clock: pygame.time.Clock) -> str:
-    """
-    Shows the top 10 best times stored in the JSON file and will return to the menu when ENTER or ESC is pressed
-    """
-    #Load scoreboard background (fallback works if ever missing)
-    sb_bg = safe_load_image(os.path.join(ASSETS_DIR, SCOREBOARD_BG_FILE), convert_alpha=False)
-    font_title = get_font(90)
-    font_body = get_font(44)
-
-    while True:
-        _ = clock.tick(FPS) / 1000.0
-        #Input handling logic with ESC and Enter
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                return "quit"
-            if event.type == pygame.KEYDOWN:
-                if event.key in (pygame.K_ESCAPE, pygame.K_RETURN):
-                    return STATE_MENU
-        #Drawing of the scoreboard and top 10 best scores
-        if sb_bg:
-            screen.blit(sb_bg, (0, 0))
-        else:
-            screen.fill((10, 10, 25))
-
-        draw_center_text(screen, font_title, "SCOREBOARD", 90)
+
+#The scoreboard screen
+class ScoreboardScreen(Screen):
+    def __init__(self, window: pygame.Surface) -> None:
+        super().__init__(window)
+        self.font_title = get_font(self.u(90))
+        self.font_body = get_font(self.u(44))
+        #Rendered score rows (text, surface), a row is rendered again only when its text changes
+        self._rows: List[Tuple[str, pygame.Surface]] = []
+        #Static layer + rows, rebuilt only when the scores changed since the last visit
+        self._frame: Optional[pygame.Surface] = None
+
+    def build(self, layer: pygame.Surface) -> None:
+        _draw_background(layer, SCOREBOARD_BG_FILE)
+        draw_center_text(layer, self.font_title, "SCOREBOARD", self.u(90))
+        draw_center_text(layer, self.font_body, "PRESS ENTER OR ESC TO RETURN", self.u(950), (255, 255, 0))
+
+    def _lines(self) -> Tuple[List[str], int]:
+        #Text rows and the y of the first one
         #load the scores from JSON file
         scores = load_scores()
         if not scores:
             #First time, if ever the scoreboard is empty
-            draw_center_text(screen, font_body, "NO SCORES YET. BE THE FIRST.", 240)
-        else:
-            #When the scores.json file is populated
-            start_y = 220
-            line_h = 52
-            for i, s in enumerate(scores[:10], start=1):
-                line = f"{i:02d}. {s['name']}  {format_time(s['time'])}"
-                draw_center_text(screen, font_body, line, start_y + (i - 1) * line_h)
-        draw_center_text(screen, font_body, "PRESS ENTER OR ESC TO RETURN", 950, (255, 255, 0))
-        pygame.display.flip()
\ No newline at end of file
+            return ["NO SCORES YET. BE THE FIRST."], self.u(240)
+        lines = [f"{i:02d}. {s['name']}  {format_time(s['time'])}" for i, s in enumerate(scores[:10], start=1)]
+        return lines, self.u(220)
+
+    def frame(self) -> pygame.Surface:
+        """
+        Returns the full scoreboard image, re-rendering only the rows that changed.
+        """
+        lines, start_y = self._lines()
+        layer = self.static_layer()
+        changed = self._frame is None or self._frame.get_size() != layer.get_size() or len(lines) != len(self._rows)
+        rows = []
+        for i, line in enumerate(lines):
+            if i < len(self._rows) and self._rows[i][0] == line:
+                rows.append(self._rows[i])
+            else:
+                rows.append((line, self.font_body.render(line, True, (0, 0, 0))))
+                changed = True
+        self._rows = rows
+        if changed:
+            self._frame = layer.copy()
+            line_h = self.u(52)
+            for i, (_, surf) in enumerate(rows):
+                self._frame.blit(surf, ((self._frame.get_width() - surf.get_width()) // 2, start_y + i * line_h))
+        return self._frame
+
+    @traced("ScoreboardScreen.run", cat="screen")
+    def run(self) -> str:
+        """
+        Shows the top 10 best times stored in the JSON file and will return to the menu when ENTER or ESC is pressed
+        """
+        return drive(self.steps())
+
+    def steps(self) -> ScreenSteps:
+        #Scores are read once per visit (they can't change while this screen is open)
+        self.window.blit(self.frame(), (0, 0))
+        pygame.display.flip()
+        while True:
+            events = yield
+            #Input handling logic with ESC and Enter
+            for event in events:
+                if event.type == pygame.QUIT:
+                    return "quit"
+                if event.type == pygame.KEYDOWN:
+                    if event.key in (pygame.K_ESCAPE, pygame.K_RETURN):
+                        return STATE_MENU
+            if _needs_redraw(events):
+                self.window.blit(self.frame(), (0, 0))
+                pygame.display.flip()
@@ -5,6 +5,127 @@ import os
 SCREEN_W, SCREEN_H = 1920, 1080
 #Frames per second target, how fast we will update and draw the game. 
 FPS = 60
+#Layout of the screens and HUD is written for this size and scaled to the real surface (see utils.units)
+DESIGN_W, DESIGN_H = 1920, 1080
+
+#Dynamic resolution: the world is drawn on an internal surface and scaled up to the window.
+#Render scales go from full resolution down, BG_TILE_SIZE * scale must stay a whole number
+RENDER_SCALES = (1.0, 0.875, 0.75, 0.625, 0.5)
+DYNAMIC_RESOLUTION = True
+#Frame time budget in milliseconds (time spent working, not sleeping in clock.tick)
+FRAME_BUDGET_MS = 1000.0 / FPS
+#Deferred jobs (see scheduler.py) run in what is left of the frame budget minus this reserve (ms),
+#a job waiting this many frames runs even in a busy frame, and worker threads for I/O jobs
+SCHED_RESERVE_MS = 2.0
+SCHED_MAX_WAIT_FRAMES = 30
+SCHED_WORKERS = 2
+#Lower the resolution when the average frame is above this part of the budget,
+#raise it again when it is under the second one
+RES_DOWN_AT = 0.9
+RES_UP_AT = 0.55
+#Number of frames averaged before each decision
+RES_WINDOW = 30
+
+#Frame profiler (F3 overlay, F4 dumps to CSV): frames kept in the ring buffer,
+#how often the overlay numbers are refreshed (in frames), and where the CSV goes
+PROFILER_RING = 600
+PROFILER_REFRESH = 15
+PROFILE_CSV_FILE = "frame_profile.csv"
+
+#Allocation tracker (F5 on/off, F6 dumps to CSV): frames kept, frames between two
+#tracemalloc snapshot comparisons, call sites shown, stack depth recorded by tracemalloc,
+#and the GC pause (ms) above which a frame is listed as a GC hitch
+ALLOC_RING = 600
+ALLOC_SNAPSHOT_EVERY = 60
+ALLOC_TOP = 6
+ALLOC_STACK_DEPTH = 1
+GC_HITCH_MS = 1.0
+ALLOC_CSV_FILE = "alloc_profile.csv"
+
+#Frame pacing strategy (see pacing.py): "sleep", "hybrid" (sleep + spin) or "vsync",
+#and the number of frames kept for the jitter / input latency statistics
+FRAME_PACING = os.environ.get("TOWER_PACING", "sleep")
+PACING_RING = 600
+#vsync check after opening the window: flips timed, and the shortest mean flip (ms) that
+#counts as waiting for a refresh (a 240 Hz display takes 4.2 ms, a flip without vsync ~0)
+VSYNC_PROBE_FLIPS = 6
+VSYNC_MIN_FLIP_MS = 2.0
+
+#Player physics: "float" (moves by int(v * dt) each frame) or "fixed" (integer subpixels,
+#whole steps of 1/FPS s, same result on every machine, see fixedpoint.py), the subpixels
+#per pixel as a power of two, and the most fixed steps run in one frame
+PHYSICS_MODE = os.environ.get("TOWER_PHYSICS", "float")
+FIXED_SUBPIXEL_BITS = 8
+FIXED_MAX_STEPS = 5
+
+#Main loop: "blocking" (GameApp.run) or "asyncio" (GameApp.run_async, see asyncloop.py: I/O
+#tasks run between frames), and the most time (ms) cooperative I/O tasks get in one frame
+MAIN_LOOP = os.environ.get("TOWER_LOOP", "blocking")
+IO_BUDGET_MS = 4.0
+
+#Run splits: checkpoint heights as fractions of the climb from the spawn to the goal
+SPLIT_FRACTIONS = (0.25, 0.5, 0.75)
+
+#Menu screens sleep in pygame.event.wait for at most this long (ms) when nothing happens
+SCREEN_WAIT_MS = 500
+
+#Bot environment (see env.py): steps before an episode times out (30 s of game time)
+#and how many nearby platforms are part of an observation
+ENV_MAX_STEPS = FPS * 30
+ENV_NEAREST = 5
+#Size (w, h) of the pixel observations (see pixels.py)
+PIXEL_OBS_SIZE = (160, 90)
+
+#Video capture (F8 in game, see capture.py): output folder, frame copies waiting for the
+#encoder thread (more = fewer drops, more memory), size of the video relative to the window,
+#and zlib level (1 = fastest)
+CAPTURE_DIR = "recordings"
+CAPTURE_SLOTS = 8
+CAPTURE_SCALE = 1.0
+CAPTURE_ZLIB_LEVEL = 1
+
+#Replays of finished runs (see replay.py and verify.py): output folder, the physics steps
+#a verified run may use (dt in seconds, longer steps could tunnel through platforms),
+#and how far the claimed time may be from the re-simulated one
+REPLAY_DIR = "replays"
+REPLAY_DT_RANGE = (0.0005, 0.1)
+REPLAY_TIME_TOLERANCE = 1e-6
+#Ghosts of the best runs (see ghosts.py): how many race with the player, their opacity (0-255)
+#and how far ahead of the run time (seconds) their replays are decoded
+GHOSTS_MAX = 10
+GHOST_ALPHA = 90
+GHOST_LOOKAHEAD_S = 3.0
+
+#Rewind (hold BACKSPACE, see rewind.py): seconds of frames kept, and frames gone back per frame
+REWIND_SECONDS = 60
+REWIND_SPEED = 2
+
+#Run in progress saved when leaving the game (ESC or closing the window), resumed with C in the menu
+SAVE_FILE = "savegame.bin"
+
+#LAN races (see net.py): UDP port, physics steps between two snapshots, snapshots kept as
+#delta baselines, seconds of silence before a client is dropped, and the interest management:
+#margin (px) added around a client's view and size of the grid cells players are sorted into
+NET_PORT = 47017
+NET_SNAPSHOT_EVERY = 2
+NET_HISTORY = 32
+NET_TIMEOUT_S = 5.0
+NET_INTEREST_MARGIN = 200
+NET_CELL = 512
+#Shared editor (see coedit.py): off unless TOWER_EDIT_SERVER is "host:port", port of the
+#stand-in server, frames between two batches of edits, and cell size of the platform grid index
+EDIT_SERVER = os.environ.get("TOWER_EDIT_SERVER")
+EDIT_PORT = 47018
+EDIT_BATCH_FRAMES = 6
+EDIT_GRID_CELL = 256
+
+#Chrome trace export (see tracing.py), off unless TOWER_TRACE names the output file.
+#TOWER_TRACE_SAMPLE keeps that fraction of frames (0.05 = 1 frame out of 20)
+TRACE_FILE = os.environ.get("TOWER_TRACE")
+TRACE_SAMPLE = float(os.environ.get("TOWER_TRACE_SAMPLE", "1.0"))
+#Events per batch handed to the writer thread, and batches allowed to wait before we drop
+TRACE_BUFFER_EVENTS = 2048
+TRACE_QUEUE_BATCHES = 64
 
 #Assets of the game (images, fonts and saved scores)
 #folder where I stored every visual elements for the game
@@ -18,6 +139,13 @@ CHAR_RUN_RIGHT_FILE = "character running right.png"
 CHAR_RUN_LEFT_FILE = "character running left.png"
 #Custom arcade font
 ARCADE_FONT_FILE = "ByteBounce.ttf"
+#The gameplay background is cut into square tiles stored in this folder (see tiles.py)
+BG_TILES_DIR = os.path.join(ASSETS_DIR, "tiles")
+BG_TILE_SIZE = 256
+#Memory budget for decoded background tiles (least recently used tiles are dropped first)
+BG_TILE_CACHE_BYTES = 32 * 1024 * 1024
+#Camera moves bigger than this (in pixels) redraw the whole background instead of scrolling it
+BG_SCROLL_MAX_STEP = 256
 #Where the scoreboard is saved into a json file
 SCORES_FILE = os.path.join(ASSETS_DIR, "scores.json")
 
@@ -28,6 +156,10 @@ PLAYER_W, PLAYER_H = 32, 48
 SPRITE_TARGET_H = 100
 #Small offset so that the character's feet can line up nicely with the collision rectangle
 FEET_OFFSET_Y = 10
+#Physics constants of the player (pixels per second and pixels per second squared)
+PLAYER_SPEED = 260.0
+PLAYER_JUMP_STRENGTH = 650.0
+PLAYER_GRAVITY = 1400.0
 
 #Default platform size when you start building platforms isn editor mode (E)
 DEFAULT_PLAT_W = 160
@@ -38,8 +170,26 @@ GOAL_W, GOAL_H = 40, 60
 #Platform colors (simple brown style)
 PLATFORM_FILL = (140, 90, 45)
 PLATFORM_OUTLINE = (0, 0, 0)
+#Maximum number of different platform sizes kept as pre-rendered sprites
+#(the editor can make 29 widths x 19 heights, so every editor size fits)
+PLATFORM_SPRITE_CACHE_MAX = 1024
 #Radius used to draw the glowing goal ring (for visual effect)
 GOAL_RING_R = 14
+#Procedural tower generation (G in game)
+#Platform widths step by 20 like the editor does, so generated towers reuse the same sizes
+GEN_PLATFORM_WIDTHS = (80, 100, 120, 140, 160, 180, 200)
+GEN_PLATFORM_H = DEFAULT_PLAT_H
+#Smallest vertical step between two generated platforms
+GEN_MIN_RISE = 40
+#Fractions of the simulated jump height / horizontal reach the generator is allowed to use
+GEN_RISE_SAFETY = 0.8
+GEN_REACH_SAFETY = 0.75
+#Top of the climbable area, the goal is placed above the last platform under this line
+GEN_TOP_Y = 120
+#How far above the camera new chunks are generated while climbing
+GEN_LOOKAHEAD = SCREEN_H
+#Platforms generated per chunk
+GEN_CHUNK_SIZE = 8
 #Window title is displayed at the top of the pygame window
 WINDOW_TITLE = "TOWER OF IE: THE WIZARD CLIMB"
 
@@ -0,0 +1,275 @@
+"""
+Tiled gameplay background.
+
+Instead of decoding the whole background image into one world-sized surface,
+the image is cut into fixed-size tiles on disk (once). During the game, tiles are
+decoded only when they become visible and kept in a small LRU cache, so memory
+depends on the screen size and not on the world size.
+On top of that, ScrollingBackground reuses the previous frame and only draws
+the strips uncovered when the camera scrolls.
+
+Cut the tiles by hand (the game also does it on first start if they are missing):
+    python -m game.tiles
+"""
+import json
+import os
+from collections import OrderedDict
+from typing import Dict, Iterator, Optional, Tuple
+
+import pygame
+
+from .settings import (
+    ASSETS_DIR, BACKGROUND_FILE,
+    BG_TILES_DIR, BG_TILE_SIZE, BG_TILE_CACHE_BYTES, BG_SCROLL_MAX_STEP,
+)
+from .tracing import traced
+
+#Small JSON file next to the tiles with the world size and tile size
+MANIFEST_FILE = "manifest.json"
+
+
+def _tile_name(tx: int, ty: int) -> str:
+    return f"tile_{tx}_{ty}.png"
+
+
+def _source_stamp(path: str) -> Dict:
+    #Used to know if the tiles on disk still match the source image
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime": int(st.st_mtime)}
+
+
+def cut_tiles(src_path: str, out_dir: str, tile: int = BG_TILE_SIZE) -> Dict:
+    """
+    Cuts the source image into tile x tile PNG files and writes the manifest.
+    Edge tiles are smaller when the image size is not a multiple of the tile size.
+    """
+    img = pygame.image.load(src_path)
+    w, h = img.get_size()
+    os.makedirs(out_dir, exist_ok=True)
+    for ty in range((h + tile - 1) // tile):
+        for tx in range((w + tile - 1) // tile):
+            area = pygame.Rect(tx * tile, ty * tile, tile, tile).clip(img.get_rect())
+            pygame.image.save(img.subsurface(area), os.path.join(out_dir, _tile_name(tx, ty)))
+    manifest = {"world_w": w, "world_h": h, "tile": tile, "source": _source_stamp(src_path)}
+    with open(os.path.join(out_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def _read_manifest(out_dir: str) -> Optional[Dict]:
+    path = os.path.join(out_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else None
+    except Exception:
+        return None
+
+
+class TiledBackground:
+    """
+    Draws the world background from tiles.
+    - tiles are decoded the first time they are needed
+    - an LRU cache (keyed by tile coordinate) keeps the recently used ones
+    - only tiles intersecting the visible area are blitted
+    """
+    def __init__(self, tiles_dir: str, world_w: int, world_h: int, tile: int,
+                 cache_bytes: int = BG_TILE_CACHE_BYTES) -> None:
+        self.tiles_dir = tiles_dir
+        self.world_w = world_w
+        self.world_h = world_h
+        self.tile = tile
+        self.cache_bytes = cache_bytes
+        #Keyed by (tx, ty, scale), scaled copies are cached next to the full size tiles
+        self._cache: "OrderedDict[Tuple[int, int, float], pygame.Surface]" = OrderedDict()
+        self.resident_bytes = 0
+        #Cache statistics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def open(cls, src_path: str, tiles_dir: str = BG_TILES_DIR, tile: int = BG_TILE_SIZE) -> "TiledBackground":
+        """
+        Opens the tiles for src_path, cutting them first if they are missing or out of date.
+        """
+        manifest = _read_manifest(tiles_dir)
+        stale = (
+            manifest is None
+            or manifest.get("tile") != tile
+            or (os.path.exists(src_path) and manifest.get("source") != _source_stamp(src_path))
+        )
+        if stale:
+            if not os.path.exists(src_path):
+                raise FileNotFoundError(f"Background not found at: {src_path}")
+            manifest = cut_tiles(src_path, tiles_dir, tile)
+        return cls(tiles_dir, manifest["world_w"], manifest["world_h"], manifest["tile"])
+
+    def get_size(self) -> Tuple[int, int]:
+        return self.world_w, self.world_h
+
+    @traced("TiledBackground._load", cat="assets")
+    def _load(self, tx: int, ty: int, scale: float) -> pygame.Surface:
+        if scale != 1.0:
+            #Scaled tiles are made from the full size tile (which goes through the cache too)
+            base = self.get_tile(tx, ty)
+            size = (round(base.get_width() * scale), round(base.get_height() * scale))
+            return pygame.transform.smoothscale(base, size)
+        path = os.path.join(self.tiles_dir, _tile_name(tx, ty))
+        img = pygame.image.load(path)
+        #convert() needs a window, without one we keep the decoded format
+        return img.convert() if pygame.display.get_surface() is not None else img
+
+    def get_tile(self, tx: int, ty: int, scale: float = 1.0) -> pygame.Surface:
+        """
+        Returns the tile surface, decoding it on a cache miss and evicting
+        the least recently used tiles while we are over the byte budget.
+        """
+        key = (tx, ty, scale)
+        surf = self._cache.get(key)
+        if surf is not None:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return surf
+        self.misses += 1
+        surf = self._load(tx, ty, scale)
+        self._cache[key] = surf
+        self.resident_bytes += surf.get_pitch() * surf.get_height()
+        #Always keep at least the tile we just loaded
+        while self.resident_bytes > self.cache_bytes and len(self._cache) > 1:
+            _, old = self._cache.popitem(last=False)
+            self.resident_bytes -= old.get_pitch() * old.get_height()
+            self.evictions += 1
+        return surf
+
+    def visible_tiles(self, world_rect: pygame.Rect, scale: float = 1.0) -> Iterator[Tuple[int, int]]:
+        #Tile coordinates intersecting a rectangle in (scaled) world space
+        tile = round(self.tile * scale)
+        world = pygame.Rect(0, 0, round(self.world_w * scale), round(self.world_h * scale))
+        r = world_rect.clip(world)
+        if r.w <= 0 or r.h <= 0:
+            return
+        for ty in range(r.top // tile, (r.bottom - 1) // tile + 1):
+            for tx in range(r.left // tile, (r.right - 1) // tile + 1):
+                yield tx, ty
+
+    def blit_region(self, dest: pygame.Surface, world_rect: pygame.Rect, dest_pos: Tuple[int, int] = (0, 0),
+                    scale: float = 1.0) -> None:
+        """
+        Draws the part of the world background inside world_rect onto dest at dest_pos.
+        With a scale, world_rect is in scaled world pixels (world size * scale).
+        """
+        dx, dy = dest_pos
+        tile = round(self.tile * scale)
+        old_clip = dest.get_clip()
+        dest.set_clip(pygame.Rect(dx, dy, world_rect.w, world_rect.h).clip(old_clip))
+        for tx, ty in self.visible_tiles(world_rect, scale):
+            pos = (tx * tile - world_rect.x + dx, ty * tile - world_rect.y + dy)
+            dest.blit(self.get_tile(tx, ty, scale), pos)
+        dest.set_clip(old_clip)
+
+    def draw(self, screen: pygame.Surface, offset_x: float, offset_y: float, scale: float = 1.0) -> None:
+        #Same as blitting the full background at (-offset_x, -offset_y)
+        view = pygame.Rect(int(offset_x * scale), int(offset_y * scale), screen.get_width(), screen.get_height())
+        self.blit_region(screen, view, scale=scale)
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "tiles": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "resident_bytes": self.resident_bytes,
+        }
+
+
+class ScrollingBackground:
+    """
+    Keeps the background of the previous frame in its own layer.
+    When the camera moves by a few pixels, the layer is shifted with Surface.scroll
+    and only the newly exposed strips are drawn from the tiles.
+    Large jumps (respawn, first frame) fall back to a full redraw.
+    The caller blits the layer first and draws the dynamic objects on top of it.
+    """
+    def __init__(self, tiles: TiledBackground, view_w: int, view_h: int,
+                 max_step: int = BG_SCROLL_MAX_STEP) -> None:
+        self.tiles = tiles
+        self.max_step = max_step
+        self.layer = self._new_layer(view_w, view_h)
+        #Integer camera offset and scale the layer was drawn for (None = must redraw everything)
+        self._pos: Optional[Tuple[int, int]] = None
+        self._scale = 1.0
+        #Statistics
+        self.full_redraws = 0
+        self.scrolls = 0
+        self.strip_pixels = 0
+
+    @staticmethod
+    def _new_layer(w: int, h: int) -> pygame.Surface:
+        layer = pygame.Surface((w, h))
+        return layer.convert() if pygame.display.get_surface() is not None else layer
+
+    def invalidate(self) -> None:
+        #Forces a full redraw on the next frame
+        self._pos = None
+
+    def resize(self, view_w: int, view_h: int) -> None:
+        #New internal resolution, the old layer can't be reused
+        if self.layer.get_size() != (view_w, view_h):
+            self.layer = self._new_layer(view_w, view_h)
+        self.invalidate()
+
+    def update(self, offset_x: float, offset_y: float, scale: float = 1.0) -> pygame.Surface:
+        """
+        Brings the layer up to date for the camera offset (and render scale) and returns it.
+        """
+        x, y = int(offset_x * scale), int(offset_y * scale)
+        w, h = self.layer.get_size()
+        if (
+            self._pos is None
+            or scale != self._scale
+            or abs(x - self._pos[0]) > self.max_step
+            or abs(y - self._pos[1]) > self.max_step
+        ):
+            self.tiles.blit_region(self.layer, pygame.Rect(x, y, w, h), scale=scale)
+            self.full_redraws += 1
+        elif (x, y) != self._pos:
+            dx, dy = x - self._pos[0], y - self._pos[1]
+            self.layer.scroll(-dx, -dy)
+            self.scrolls += 1
+            #Newly exposed column (left or right side)
+            if dx:
+                sx = w - dx if dx > 0 else 0
+                self.tiles.blit_region(self.layer, pygame.Rect(x + sx, y, abs(dx), h), (sx, 0), scale)
+                self.strip_pixels += abs(dx) * h
+            #Newly exposed row (top or bottom side)
+            if dy:
+                sy = h - dy if dy > 0 else 0
+                self.tiles.blit_region(self.layer, pygame.Rect(x, y + sy, w, abs(dy)), (0, sy), scale)
+                self.strip_pixels += abs(dy) * w
+        self._pos = (x, y)
+        self._scale = scale
+        return self.layer
+
+    def draw(self, screen: pygame.Surface, offset_x: float, offset_y: float, scale: float = 1.0) -> None:
+        screen.blit(self.update(offset_x, offset_y, scale), (0, 0))
+
+    def stats(self) -> Dict:
+        return {
+            "full_redraws": self.full_redraws,
+            "scrolls": self.scrolls,
+            "strip_pixels": self.strip_pixels,
+        }
+
+
+def main() -> None:
+    manifest = cut_tiles(os.path.join(ASSETS_DIR, BACKGROUND_FILE), BG_TILES_DIR)
+    print(f"cut {manifest['world_w']}x{manifest['world_h']} background into {manifest['tile']}px tiles in {BG_TILES_DIR}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Run timer.
+
+The run time is the sum of the physics time steps (the pacer measures them with
+time.perf_counter_ns), not a millisecond wall clock read on the rendered frame.
+The finish is the physics tick where the player rect first overlaps the goal, plus the
+fraction of that tick at which the overlap starts (the move is swept through the tick),
+so the result no longer depends on the frame rate.
+Splits are recorded the same way when the player's feet first pass a checkpoint height.
+"""
+import time
+from typing import List, Optional, Sequence
+
+import pygame
+
+
+def _axis_entry(a_min: int, a_max: int, delta: int, b_min: int, b_max: int) -> Optional[float]:
+    #Fraction of the move at which [a_min, a_max) starts overlapping [b_min, b_max) on one axis
+    if a_max > b_min and a_min < b_max:
+        return 0.0
+    if delta > 0 and a_max <= b_min:
+        return (b_min - a_max) / delta
+    if delta < 0 and a_min >= b_max:
+        return (b_max - a_min) / delta
+    return None
+
+
+def entry_fraction(before: pygame.Rect, after: pygame.Rect, target: pygame.Rect) -> float:
+    """
+    Fraction (0..1) of the move from `before` to `after` at which the rect first touches target.
+    Returns 1.0 if the straight-line move doesn't explain the overlap (a collision changed the path).
+    """
+    fx = _axis_entry(before.left, before.right, after.x - before.x, target.left, target.right)
+    fy = _axis_entry(before.top, before.bottom, after.y - before.y, target.top, target.bottom)
+    if fx is None or fy is None:
+        return 1.0
+    return min(1.0, max(fx, fy))
+
+
+class RunTimer:
+    """
+    Usage: start(checkpoints) on a new run, tick(dt) once per game frame,
+    check_splits(before, after) after the physics step and finish(fraction) on the winning tick.
+    Times are in seconds.
+    """
+    def __init__(self) -> None:
+        self.running = False
+        self.ticks = 0
+        self.elapsed_s = 0.0
+        self.final_s: Optional[float] = None
+        #Tick on which the run finished and the fraction of that tick
+        self.finish_tick: Optional[int] = None
+        self.finish_fraction = 0.0
+        #Checkpoint heights (world y, highest last) and the split times reached so far
+        self.checkpoints: List[int] = []
+        self.splits: List[float] = []
+        self._tick_start_s = 0.0
+        self._tick_dt = 0.0
+        self._start_ns = 0
+
+    def start(self, checkpoints: Sequence[int] = ()) -> None:
+        self.running = True
+        self.ticks = 0
+        self.elapsed_s = 0.0
+        self.final_s = None
+        self.finish_tick = None
+        self.finish_fraction = 0.0
+        self.checkpoints = sorted(checkpoints, reverse=True)
+        self.splits = []
+        self._tick_start_s = self._tick_dt = 0.0
+        self._start_ns = time.perf_counter_ns()
+
+    def resume(self, ticks: int, elapsed_s: float, checkpoints: Sequence[int], splits: Sequence[float]) -> None:
+        #Continues a saved run (see savestate.py)
+        self.start(checkpoints)
+        self.ticks = ticks
+        self.elapsed_s = elapsed_s
+        self.splits = list(splits)
+
+    def tick(self, dt: float) -> None:
+        #One game frame of dt seconds (the timer keeps running in editor mode like before)
+        if not self.running:
+            return
+        self._tick_start_s = self.elapsed_s
+        self._tick_dt = dt
+        self.elapsed_s += dt
+        self.ticks += 1
+
+    def _at(self, fraction: float) -> float:
+        return self._tick_start_s + fraction * self._tick_dt
+
+    def check_splits(self, before: pygame.Rect, after: pygame.Rect) -> None:
+        """
+        Records a split for each checkpoint height the player's feet went above during this tick.
+        """
+        while self.running and len(self.splits) < len(self.checkpoints):
+            y = self.checkpoints[len(self.splits)]
+            if after.bottom > y:
+                return
+            rise = before.bottom - after.bottom
+            fraction = (before.bottom - y) / rise if rise > 0 and before.bottom > y else 0.0
+            self.splits.append(self._at(fraction))
+
+    def finish(self, fraction: float) -> float:
+        #Stops the timer on the current tick and returns the run time
+        self.running = False
+        self.finish_tick = self.ticks
+        self.finish_fraction = fraction
+        self.final_s = self._at(fraction)
+        return self.final_s
+
+    def wall_s(self) -> float:
+        #Wall clock time since start, for comparison with the simulated time
+        return (time.perf_counter_ns() - self._start_ns) / 1e9 if self._start_ns else 0.0
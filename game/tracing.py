@@ -0,0 +1,216 @@
+"""
+Lightweight tracing that writes Chrome trace-event JSON.
+
+Open the file in chrome://tracing or https://ui.perfetto.dev.
+
+Turn it on with environment variables before starting the game:
+    TOWER_TRACE=trace.json TOWER_TRACE_SAMPLE=0.05 uv run python main.py
+
+Code is instrumented with the span() context manager or the @traced decorator.
+When tracing is off both cost one global lookup. Spans marked sample=True (one per frame)
+are kept with probability TRACE_SAMPLE, together with everything nested inside them,
+so tracing can stay on in production. Events are written by a background thread.
+"""
+import atexit
+import functools
+import json
+import os
+import queue
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from .settings import TRACE_BUFFER_EVENTS, TRACE_QUEUE_BATCHES
+
+
+class _NullSpan:
+    #Shared do-nothing context manager returned when tracing is off
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "cat", "args", "sample", "start_ns", "recorded")
+
+    def __init__(self, tracer: "Tracer", name: str, cat: str, args: Optional[Dict], sample: bool) -> None:
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self.sample = sample
+        self.start_ns = 0
+        self.recorded = False
+
+    def __enter__(self) -> "_Span":
+        stack = self.tracer._stack()
+        parent = stack[-1] if stack else True
+        #A sampled span draws a new decision, other spans follow their parent
+        if parent and self.sample:
+            self.recorded = self.tracer.rng.random() < self.tracer.sample_rate
+        else:
+            self.recorded = parent
+        stack.append(self.recorded)
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        end_ns = time.perf_counter_ns()
+        self.tracer._stack().pop()
+        if self.recorded:
+            self.tracer._complete(self.name, self.cat, self.start_ns, end_ns, self.args)
+
+
+class Tracer:
+    """
+    Collects complete ("X") events in a buffer and hands full buffers to a writer thread.
+    """
+    def __init__(self, path: str, sample_rate: float = 1.0,
+                 buffer_events: int = TRACE_BUFFER_EVENTS,
+                 queue_batches: int = TRACE_QUEUE_BATCHES) -> None:
+        self.path = path
+        self.sample_rate = sample_rate
+        self.buffer_events = buffer_events
+        self.rng = random.Random()
+        self.pid = os.getpid()
+        self._t0 = time.perf_counter_ns()
+        self._local = threading.local()
+        self._buffer: List[Dict] = []
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[Optional[List[Dict]]]" = queue.Queue(maxsize=queue_batches)
+        #Statistics
+        self.events = 0
+        self.dropped = 0
+        self._file = open(path, "w", encoding="utf-8")
+        self._file.write("[\n")
+        self._first = True
+        self._writer = threading.Thread(target=self._write_loop, name="trace-writer", daemon=True)
+        self._writer.start()
+        self._metadata("process_name", {"name": "tower-of-ie"})
+
+    def _stack(self) -> List[bool]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+            self._metadata("thread_name", {"name": threading.current_thread().name})
+        return stack
+
+    def _metadata(self, name: str, args: Dict) -> None:
+        self._push({"name": name, "ph": "M", "pid": self.pid, "tid": threading.get_ident(), "args": args})
+
+    def _complete(self, name: str, cat: str, start_ns: int, end_ns: int, args: Optional[Dict]) -> None:
+        event = {
+            "name": name,
+            "cat": cat,
+            "ph": "X",
+            "ts": (start_ns - self._t0) / 1000.0,
+            "dur": (end_ns - start_ns) / 1000.0,
+            "pid": self.pid,
+            "tid": threading.get_ident(),
+        }
+        if args:
+            event["args"] = args
+        self._push(event)
+
+    def _push(self, event: Dict) -> None:
+        with self._lock:
+            self._buffer.append(event)
+            self.events += 1
+            if len(self._buffer) >= self.buffer_events:
+                self._hand_off()
+
+    def _hand_off(self) -> None:
+        #Called with the lock held. If the writer is too far behind we drop the batch
+        batch, self._buffer = self._buffer, []
+        try:
+            self._queue.put_nowait(batch)
+        except queue.Full:
+            self.dropped += len(batch)
+
+    def _write_loop(self) -> None:
+        while True:
+            batch = self._queue.get()
+            if batch is None:
+                break
+            chunks = []
+            for event in batch:
+                chunks.append(("" if self._first else ",\n") + json.dumps(event, separators=(",", ":")))
+                self._first = False
+            self._file.write("".join(chunks))
+
+    def span(self, name: str, cat: str = "game", args: Optional[Dict] = None, sample: bool = False) -> _Span:
+        return _Span(self, name, cat, args, sample)
+
+    def close(self) -> None:
+        """
+        Flushes the remaining events, stops the writer and closes the JSON array.
+        """
+        with self._lock:
+            batch, self._buffer = self._buffer, []
+        #Blocking put here, we want the last events even if the writer is busy
+        self._queue.put(batch)
+        self._queue.put(None)
+        self._writer.join()
+        self._file.write("\n]\n")
+        self._file.close()
+
+
+#The active tracer (None when tracing is off)
+_tracer: Optional[Tracer] = None
+
+
+def start(path: str, sample_rate: float = 1.0) -> Tracer:
+    #Starts tracing to a file (stops the previous tracer first)
+    global _tracer
+    stop()
+    _tracer = Tracer(path, sample_rate)
+    #Closing the window raises SystemExit, this makes sure the file is still completed
+    atexit.register(stop)
+    return _tracer
+
+
+def stop() -> None:
+    global _tracer
+    if _tracer is not None:
+        tracer, _tracer = _tracer, None
+        tracer.close()
+
+
+def active() -> Optional[Tracer]:
+    return _tracer
+
+
+def span(name: str, cat: str = "game", args: Optional[Dict] = None, sample: bool = False):
+    """
+    Context manager timing a block:
+        with span("load_scores", "io"):
+            ...
+    """
+    if _tracer is None:
+        return _NULL_SPAN
+    return _tracer.span(name, cat, args, sample)
+
+
+def traced(name: Optional[str] = None, cat: str = "game", sample: bool = False) -> Callable:
+    """
+    Decorator version of span(), the span name defaults to the function's qualified name.
+    """
+    def decorator(fn: Callable) -> Callable:
+        span_name = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if _tracer is None:
+                return fn(*args, **kwargs)
+            with _tracer.span(span_name, cat, None, sample):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
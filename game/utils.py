@@ -1,11 +1,14 @@
 import os
 import pygame
+from functools import lru_cache
 #Type hint for functions that may retrun None
 from typing import Optional 
 #Import the assets
-from .settings import ASSETS_DIR, ARCADE_FONT_FILE
+from .settings import ASSETS_DIR, ARCADE_FONT_FILE, DESIGN_H
+from .tracing import traced
 
 #load images from disk and if it doesn't exist, the function will return none instead of crashing
+@traced(cat="assets")
 def safe_load_image(path: str, convert_alpha: bool = True) -> Optional[pygame.Surface]:
     #file path doesn't exist, retunr None and prevent the game to crash
     if not os.path.exists(path):
@@ -42,6 +45,8 @@ def format_time(t: float) -> str:
     #f string formatiting with leading zeros and 2 decimal precision 
     return f"{minutes:02d}:{seconds:05.2f}"
 
+#Fonts are cached by size, so asking again for the same size doesn't reload the file
+@lru_cache(maxsize=None)
 def get_font(size: int) -> pygame.font.Font:
     """
     Loads an arcade TTF from assets, otherwise goes back to normal font.
@@ -54,6 +59,11 @@ def get_font(size: int) -> pygame.font.Font:
     #otherwise , default system font (prevent for the game to crash)
     return pygame.font.Font(None, size)
 
+#Converts a length in design units (layout made for a 1920x1080 screen) into pixels for this surface
+#We scale on the height so the layout keeps its proportions on any resolution
+def units(surface: pygame.Surface, v: float) -> int:
+    return int(v * surface.get_height() / DESIGN_H)
+
 #Draws text centered horizontally on the screen at a given y position.
 def draw_center_text(screen: pygame.Surface, font: pygame.font.Font, text: str, y: int, color=(0, 0, 0)) -> None:
     #renter text into a surface on top of the image/background
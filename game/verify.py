@@ -0,0 +1,177 @@
+"""
+Score verification: re-simulates submitted replays and checks the claimed times.
+
+A submission is a replay file (see replay.py): the level layout and, for every physics
+tick, the dt and the input bitmask. The run is played again headlessly with PlayerBody
+(the physics of Player, in the same step order as the game loop), or with FixedPointBody
+for runs made with the fixed-point physics. It is accepted when
+- every dt is within REPLAY_DT_RANGE (exactly one fixed step with the fixed-point physics),
+- the simulated positions match the recorded ones on every tick,
+- the goal is first touched on the claimed tick,
+- the time (steps before that tick + the entry fraction of it) matches the claim.
+Runs where the editor was used are rejected: their level changed while playing.
+
+Batches are spread over worker processes with a ProcessPoolExecutor:
+    python -m game.verify replays/*.rpl --workers 4
+    python -m game.verify --synthetic 200     (generated runs, some with a tampered time)
+Without files, the replays of the saved scores are verified.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .fixedpoint import FixedPointBody, STEP_DT
+from .generator import TowerGenerator, SIM_DT
+from .player import PlayerBody, INPUT_LEFT, INPUT_RIGHT, INPUT_JUMP
+from .replay import RunRecorder, iter_records, load_level, read_header
+from .scores import load_scores
+from .settings import SCREEN_W, SCREEN_H, REPLAY_DT_RANGE, REPLAY_TIME_TOLERANCE
+from .timing import RunTimer, entry_fraction
+
+
+def verify_replay(path: str, dt_range: Tuple[float, float] = REPLAY_DT_RANGE,
+                  tolerance: float = REPLAY_TIME_TOLERANCE) -> Dict:
+    """
+    Verifies one replay file. Returns the claim, the simulated result and ok / reason.
+    """
+    result: Dict = {"path": path, "ok": False}
+    try:
+        header, _ = read_header(path)
+    except (OSError, ValueError) as e:
+        result["reason"] = str(e)
+        return result
+    result.update(name=header["name"], claimed=header["time"], claimed_tick=header["finish_tick"])
+    if header["edited"]:
+        result["reason"] = "level edited during the run"
+        return result
+    platforms, goal = load_level(header)
+    body = PlayerBody(*header["spawn"])
+    world_w = header["world_w"]
+    lo, hi = dt_range
+    fixed = FixedPointBody(body) if header.get("physics") == "fixed" else None
+    if fixed is not None:
+        lo = hi = STEP_DT
+    elapsed = 0.0
+    tick = 0
+    for chunk in iter_records(path):
+        for dt, mask, x, y in chunk:
+            tick += 1
+            if not lo <= dt <= hi:
+                result["reason"] = f"dt {dt:.6f} out of range at tick {tick}"
+                return result
+            before = body.rect.copy()
+            if fixed is not None:
+                fixed.step(mask, platforms, world_w)
+            else:
+                body.step(mask, dt, platforms, world_w)
+            if body.rect.x != x or body.rect.y != y:
+                result["reason"] = f"position mismatch at tick {tick}"
+                return result
+            if body.rect.colliderect(goal):
+                time_s = elapsed + entry_fraction(before, body.rect, goal) * dt
+                result.update(tick=tick, time=time_s)
+                if tick != header["finish_tick"]:
+                    result["reason"] = f"goal reached on tick {tick}, claimed {header['finish_tick']}"
+                elif abs(time_s - header["time"]) > tolerance:
+                    result["reason"] = f"time {time_s:.6f} s, claimed {header['time']:.6f} s"
+                else:
+                    result["ok"] = True
+                return result
+            elapsed += dt
+    result["reason"] = "goal never reached"
+    return result
+
+
+def verify_batch(paths: Sequence[str], workers: Optional[int] = None) -> Tuple[List[Dict], float]:
+    """
+    Verifies the replays in worker processes. Returns the results (in order) and the runs per second.
+    """
+    start = time.perf_counter()
+    if workers == 1 or len(paths) < 2:
+        results = [verify_replay(p) for p in paths]
+    else:
+        workers = workers or os.cpu_count() or 1
+        #Several runs per task, so the pickling round trips don't dominate for short runs
+        chunksize = max(1, len(paths) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(verify_replay, paths, chunksize=chunksize))
+    elapsed = time.perf_counter() - start
+    return results, len(paths) / elapsed if elapsed > 0 else 0.0
+
+
+def synthetic_run(path: str, seed: int, ticks: int = 900, tamper: bool = False) -> None:
+    """
+    Writes a replay the way the game does: a random climb on a procedural tower, timed by
+    RunTimer, with the goal placed where the climb ends. tamper lowers the claimed time.
+    """
+    rng = random.Random(seed)
+    gen = TowerGenerator(seed, SCREEN_W, SCREEN_H)
+    gen.generate()
+    platforms = gen.platforms
+    spawn = (80, SCREEN_H - 140)
+    #Inputs: mostly climbing moves, changed every few ticks, with a jittery frame time
+    masks: List[int] = []
+    while len(masks) < ticks:
+        mask = rng.choice((INPUT_RIGHT | INPUT_JUMP, INPUT_LEFT | INPUT_JUMP, INPUT_JUMP, INPUT_RIGHT, INPUT_LEFT))
+        masks.extend([mask] * rng.randint(5, 40))
+    dts = [SIM_DT * rng.uniform(0.9, 1.1) for _ in range(ticks)]
+    body = PlayerBody(*spawn)
+    for mask, dt in zip(masks, dts):
+        body.step(mask, dt, platforms, SCREEN_W)
+    goal = body.rect.inflate(20, 20)
+    #Second pass: the "client" side, stopped on the first tick that touches the goal
+    body = PlayerBody(*spawn)
+    timer = RunTimer()
+    timer.start()
+    recorder = RunRecorder()
+    recorder.start(spawn)
+    final = 0.0
+    for mask, dt in zip(masks, dts):
+        timer.tick(dt)
+        before = body.rect.copy()
+        body.step(mask, dt, platforms, SCREEN_W)
+        recorder.record(dt, mask, body.rect.topleft)
+        if body.rect.colliderect(goal):
+            final = timer.finish(entry_fraction(before, body.rect, goal))
+            break
+    if tamper:
+        final -= 0.5
+    recorder.save(path, f"bot{seed}", final, timer.finish_fraction, platforms, goal, SCREEN_W, SCREEN_H)
+
+
+def _score_replays() -> List[str]:
+    return [s["replay"] for s in load_scores() if s.get("replay")]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Verify run replays by re-simulating them.")
+    parser.add_argument("replays", nargs="*", help="replay files (default: the replays of the saved scores)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("--synthetic", type=int, default=0, help="verify this many generated runs instead")
+    parser.add_argument("--quiet", action="store_true", help="only print the summary")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = list(args.replays)
+        if args.synthetic:
+            paths = []
+            for i in range(args.synthetic):
+                paths.append(os.path.join(tmp, f"run{i}.rpl"))
+                #One run out of ten claims a better time than it made
+                synthetic_run(paths[-1], i, tamper=i % 10 == 9)
+        elif not paths:
+            paths = _score_replays()
+        results, rate = verify_batch(paths, args.workers)
+    for r in results:
+        if not args.quiet or not r["ok"]:
+            status = "OK  " if r["ok"] else "FAIL"
+            print(f"{status} {r.get('name', '?'):16s} {r.get('claimed', 0.0):9.4f} s  {r.get('reason', '')}  {r['path']}")
+    verified = sum(r["ok"] for r in results)
+    print(f"{verified}/{len(results)} runs verified, {rate:.1f} runs/s")
+
+
+if __name__ == "__main__":
+    main()
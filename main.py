@@ -5,8 +5,11 @@ This file is intentionally minimal. Its only responsibility
 is to start the application with uv. All game logic is handled
 inside the GameApp class (defined in game/app.py).
 """
+import asyncio
+
 #import the main application controller
 from game.app import GameApp
+from game.settings import MAIN_LOOP
 
 def main() -> None:
     """
@@ -16,7 +19,12 @@ def main() -> None:
     Separating this into a function makes the
     entry point explicit and keeps the script clean.
     """
-    GameApp().run() #start the full game system and main loop
+    app = GameApp()
+    if MAIN_LOOP == "asyncio":
+        #Same game on an asyncio event loop, I/O runs between frames (see game/asyncloop.py)
+        asyncio.run(app.run_async())
+    else:
+        app.run() #start the full game system and main loop
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,5 @@
+import os
+
+#The game's tests run without a display or a sound card
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
@@ -0,0 +1,85 @@
+"""
+Shared editor: platform ids stay unique and within 32 bits when peers come and go.
+    python -m pytest tests
+"""
+import asyncio
+import socket
+import time
+
+import pytest
+
+from game.coedit import COUNTER_MAX, ID_BITS, PEER_MAX, EditClient, _server_thread
+
+
+@pytest.fixture
+def server():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server, loop = _server_thread(port)
+    yield server, port
+
+    async def stop():
+        #Connections still being handled end before the loop does
+        tasks = asyncio.all_tasks() - {asyncio.current_task()}
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    asyncio.run_coroutine_threadsafe(stop(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+
+
+def _settle(server, *clients, until=lambda: True):
+    deadline = time.perf_counter() + 5.0
+    while time.perf_counter() < deadline:
+        for client in clients:
+            client.tick()
+        if until():
+            return
+        time.sleep(0.005)
+    raise AssertionError("peers didn't converge")
+
+
+def _close(server, client):
+    client.close()
+    _settle(server, until=lambda: client.peer_id not in server.writers)
+
+
+def test_peer_id_reused_with_its_counter(server):
+    server, port = server
+    first = EditClient("127.0.0.1", port)
+    platform = first.add(100, 100, 60, 16)
+    pid = first.level.ids[platform]
+    _settle(server, first, until=lambda: pid in server.level.by_id)
+    _close(server, first)
+    #The next peer gets the same id back, and goes on from its counter
+    second = EditClient("127.0.0.1", port)
+    assert second.peer_id == first.peer_id
+    platform = second.add(300, 100, 60, 16)
+    assert second.level.ids[platform] == pid + 1
+    _settle(server, second, until=lambda: pid + 1 in server.level.by_id)
+    assert server.rejected == 0
+    _close(server, second)
+
+
+def test_ids_run_out_without_overflow(server):
+    server, port = server
+    client = EditClient("127.0.0.1", port)
+    client._counter = COUNTER_MAX - 1
+    platform = client.add(100, 100, 60, 16)
+    assert client.level.ids[platform] >> ID_BITS == client.peer_id
+    assert client.add(300, 100, 60, 16) is None
+    _settle(server, client, until=lambda: server.accepted == 1)
+    _close(server, client)
+    #That peer id is used up: the next peer gets another one
+    other = EditClient("127.0.0.1", port)
+    assert other.peer_id != client.peer_id
+    _close(server, other)
+
+
+def test_full_server_refuses_peers(server):
+    server, port = server
+    server._counters.update({peer: COUNTER_MAX for peer in range(1, PEER_MAX + 1)})
+    with pytest.raises(ConnectionError):
+        EditClient("127.0.0.1", port)
+    assert server.refused == 1
@@ -0,0 +1,58 @@
+"""
+Fixed-point physics: golden traces, and a run continued from its saved state.
+    python -m pytest tests
+"""
+import hashlib
+import struct
+
+import pytest
+
+from game.fixedpoint import GOLDEN, FixedPointBody, _scenarios, trace_digest
+from game.platform import Platform
+from game.player import PlayerBody
+
+SCENARIOS = _scenarios()
+FLOOR = [Platform(0, 1040, 1920, 40)]
+
+
+@pytest.mark.parametrize("name", sorted(GOLDEN))
+def test_golden_trace(name):
+    platforms, spawn, inputs = SCENARIOS[name]
+    assert trace_digest(platforms, spawn, inputs) == GOLDEN[name]
+
+
+def _digest(body, platforms, inputs):
+    h = hashlib.sha256()
+    pack = struct.Struct("<qqqqB").pack
+    for mask in inputs:
+        body.step(mask, platforms, 1920)
+        h.update(pack(*body.state()))
+    return h.hexdigest()
+
+
+@pytest.mark.parametrize("name", sorted(GOLDEN))
+def test_resumed_run_matches(name):
+    #A run saved halfway (body + integer state, as in save_run) continues exactly like the original
+    platforms, spawn, inputs = SCENARIOS[name]
+    half = len(inputs) // 2
+    original = FixedPointBody(PlayerBody(*spawn))
+    for mask in inputs[:half]:
+        original.step(mask, platforms, 1920)
+    b = original.body
+    body = PlayerBody(b.rect.x, b.rect.y)
+    body.vx, body.vy, body.on_ground, body.facing_right = b.vx, b.vy, b.on_ground, b.facing_right
+    resumed = FixedPointBody(body)
+    resumed.restore(*original.state()[:4])
+    assert _digest(resumed, platforms, inputs[half:]) == _digest(original, platforms, inputs[half:])
+
+
+def test_moved_standing_body_stays_on_ground():
+    #Rewind / a save without the integer state moves the body: a standing one keeps standing
+    fixed = FixedPointBody(PlayerBody(80, 900))
+    for _ in range(120):
+        fixed.step(0, FLOOR, 1920)
+    assert fixed.body.on_ground
+    fixed.body.rect.x += 40
+    fixed.step(0, FLOOR, 1920)
+    assert fixed.body.on_ground
+    assert fixed.body.rect.bottom == FLOOR[0].rect.top
@@ -0,0 +1,42 @@
+"""
+Race server: player ids stay unique while ids wrap around.
+    python -m pytest tests
+"""
+from game.net import BYE, HELLO, RaceServer, _HELLO, _WELCOME
+
+
+class _Transport:
+    def __init__(self):
+        self.sent = []
+
+    def sendto(self, data, addr):
+        self.sent.append((data, addr))
+
+
+def _hello(server, addr):
+    server.datagram_received(_HELLO.pack(HELLO, 320, 180) + b"bot", addr)
+    return server.peers[addr].id if addr in server.peers else None
+
+
+def test_wrapped_ids_skip_connected_players():
+    server = RaceServer(1)
+    server.connection_made(_Transport())
+    assert _hello(server, ("a", 1)) == 1
+    assert _hello(server, ("b", 1)) == 2
+    server.datagram_received(bytes([BYE]), ("b", 1))
+    #Ids wrapped around: 1 is still connected, 2 was freed
+    server._next_id = 65535
+    assert _hello(server, ("c", 1)) == 65535
+    assert _hello(server, ("d", 1)) == 2
+    ids = [peer.id for peer in server.peers.values()]
+    assert len(ids) == len(set(ids))
+
+
+def test_repeated_hello_keeps_id():
+    server = RaceServer(1)
+    transport = _Transport()
+    server.connection_made(transport)
+    first = _hello(server, ("a", 1))
+    assert _hello(server, ("a", 1)) == first
+    welcomes = [_WELCOME.unpack_from(data)[1] for data, _ in transport.sent]
+    assert welcomes == [first, first]
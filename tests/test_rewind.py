@@ -0,0 +1,151 @@
+"""
+Rewind: the ring of player states, the undo of platform edits, and the run it leaves behind.
+    python -m pytest tests
+"""
+import collections
+
+import pygame
+import pytest
+
+from game.platform import Platform
+from game.player import PlayerBody
+from game.replay import write_replay
+from game.rewind import RewindBuffer
+from game.settings import STATE_GAME
+from game.verify import verify_replay
+
+
+@pytest.fixture
+def app():
+    import game.app
+    app = game.app.GameApp()
+    app.state = STATE_GAME
+    app.reset_run(clear_platforms=True)
+    app.pacer.resume()
+    yield app
+    app.scheduler.shutdown()
+
+
+def _hold(app, *pressed):
+    keys = collections.defaultdict(bool)
+    for key in pressed:
+        keys[key] = True
+    app.pacer.latch_input = lambda: keys
+
+
+def test_rewind_with_empty_ring_marks_run_edited(app):
+    #BACKSPACE right after a restart: nothing to rewind, but the timer still runs
+    _hold(app, pygame.K_BACKSPACE)
+    ticks = app.run_recorder.ticks
+    app._run_game_frame()
+    assert app.rewinding
+    assert app.rewind.available() == 0
+    assert app.run_recorder.ticks == ticks
+    assert app.run_recorder.edited
+
+
+def test_rewind_past_oldest_frame_marks_run_edited(app):
+    #Held longer than the ring goes back: the last frames rewind nothing
+    _hold(app, pygame.K_d)
+    for _ in range(5):
+        app._run_game_frame()
+    _hold(app, pygame.K_BACKSPACE)
+    for _ in range(10):
+        app._run_game_frame()
+    assert app.rewind.available() == 0
+    assert app.run_recorder.edited
+
+
+def _reach_goal(app, limit=300):
+    #Walks right into a goal placed close to the spawn
+    app.goal_rect = pygame.Rect(app.spawn_x + 300, app.world_h - 100, 40, 60)
+    _hold(app, pygame.K_d)
+    for _ in range(limit):
+        if app.win:
+            return
+        app._run_game_frame()
+    raise AssertionError("goal not reached")
+
+
+def _replay_of(app, tmp_path):
+    path = str(tmp_path / "run.rpl")
+    write_replay(path, app.run_recorder.encode(app.player_name, app.final_time_s, app.timer.finish_fraction,
+                                               app.platforms, app.goal_rect, app.world_w, app.world_h))
+    return verify_replay(path)
+
+
+def test_replay_verifies_without_rewind(app, tmp_path, monkeypatch):
+    monkeypatch.setattr(app, "_store_score", lambda: None)
+    _reach_goal(app)
+    assert _replay_of(app, tmp_path)["ok"]
+
+
+def test_replay_after_empty_rewind_is_not_accepted(app, tmp_path, monkeypatch):
+    #The rewound frames are in the run time but not in the replay: it must not pass as a clean run
+    monkeypatch.setattr(app, "_store_score", lambda: None)
+    _hold(app, pygame.K_BACKSPACE)
+    for _ in range(20):
+        app._run_game_frame()
+    _reach_goal(app)
+    result = _replay_of(app, tmp_path)
+    assert not result["ok"]
+    assert "edited" in result["reason"]
+
+
+def _body(x):
+    return PlayerBody(x, 500)
+
+
+def test_ring_wraps_around_to_the_oldest_kept_frame():
+    ring = RewindBuffer(seconds=1, fps=10)
+    body = _body(0)
+    for x in range(25):
+        body.rect.x = x
+        ring.push(body)
+    #10 frames kept (15..24): back 9 from the newest at most
+    assert ring.available() == 9
+    assert ring.rewind(100, body, []) == 9
+    assert body.rect.x == 15
+    assert ring.available() == 0
+    assert ring.rewind(1, body, []) == 0
+
+
+def test_rewind_restores_player_state():
+    ring = RewindBuffer(seconds=1, fps=10)
+    body = _body(10)
+    body.vx, body.vy, body.on_ground, body.facing_right = 120.0, -30.5, True, False
+    ring.push(body)
+    body.rect.x, body.vx, body.on_ground, body.facing_right = 99, 0.0, False, True
+    ring.push(body)
+    assert ring.rewind(1, body, []) == 1
+    assert (body.rect.x, body.vx, body.vy, body.on_ground, body.facing_right) == (10, 120.0, -30.5, True, False)
+
+
+def test_edits_are_undone_newest_first():
+    ring = RewindBuffer(seconds=1, fps=10)
+    body = _body(0)
+    floor, a, b = Platform(0, 1040, 1920, 40), Platform(10, 10, 60, 16), Platform(90, 10, 60, 16)
+    platforms = [floor, a]
+    ring.push(body)
+    #After frame 0: b added at index 2, then a removed from index 1
+    platforms.append(b)
+    ring.add(2, b)
+    del platforms[1]
+    ring.remove(1, a)
+    ring.push(body)
+    ring.rewind(1, body, platforms)
+    assert platforms == [floor, a]
+
+
+def test_edits_older_than_the_ring_stay():
+    ring = RewindBuffer(seconds=1, fps=10)
+    body = _body(0)
+    floor, a = Platform(0, 1040, 1920, 40), Platform(10, 10, 60, 16)
+    platforms = [floor]
+    ring.push(body)
+    platforms.append(a)
+    ring.add(1, a)
+    for _ in range(20):
+        ring.push(body)
+    ring.rewind(100, body, platforms)
+    assert platforms == [floor, a]
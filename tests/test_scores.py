@@ -0,0 +1,37 @@
+"""
+Score file: top 10 kept, and a replay that can't be deleted doesn't cost the new score.
+    python -m pytest tests
+"""
+import os
+
+from game import scores
+from game.scores import add_score, load_scores
+
+
+def test_keeps_top_ten_and_deletes_dropped_replays(tmp_path):
+    path = str(tmp_path / "scores.json")
+    replays = []
+    for i in range(11):
+        replay = tmp_path / f"{i}.rpl"
+        replay.write_bytes(b"x")
+        replays.append(str(replay))
+        add_score(f"p{i}", 10.0 + i, path, replay=str(replay))
+    table = load_scores(path)
+    assert [s["name"] for s in table] == [f"p{i}" for i in range(10)]
+    assert not os.path.exists(replays[10])
+    assert os.path.exists(replays[0])
+
+
+def test_score_saved_when_replay_cant_be_deleted(tmp_path, monkeypatch):
+    #On Windows a replay still open by a ghost can't be removed
+    path = str(tmp_path / "scores.json")
+    for i in range(10):
+        add_score(f"p{i}", 10.0 + i, path, replay=str(tmp_path / f"{i}.rpl"))
+
+    def locked(path):
+        raise PermissionError(path)
+    monkeypatch.setattr(scores.os, "remove", locked)
+    add_score("fast", 1.0, path)
+    table = load_scores(path)
+    assert table[0]["name"] == "fast"
+    assert len(table) == 10